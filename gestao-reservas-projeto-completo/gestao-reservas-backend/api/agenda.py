@@ -0,0 +1,221 @@
+"""Cálculos de agenda: intervalos livres e expansão de recorrências.
+
+A expansão das séries (``Recorrencia``) é sempre preguiçosa e limitada à
+janela consultada, e é compartilhada pela listagem, disponibilidade e
+verificação de conflitos.
+"""
+
+import heapq
+from bisect import insort
+from collections import namedtuple
+from datetime import date, time, timedelta
+from itertools import groupby
+
+from django.conf import settings
+from django.db.models import Exists, OuterRef
+
+from .models import Recorrencia, Reserva, Sala
+
+Ocorrencia = namedtuple(
+    "Ocorrencia",
+    ["data", "hora_inicio", "hora_fim", "sala_id", "usuario_id", "recorrencia_id"],
+)
+
+
+def expediente():
+    """Janela padrão (inicio, fim) usada quando a consulta não informa horário."""
+    return (
+        time.fromisoformat(settings.RESERVAS_EXPEDIENTE_INICIO),
+        time.fromisoformat(settings.RESERVAS_EXPEDIENTE_FIM),
+    )
+
+
+def lacunas_livres(ocupados, inicio, fim):
+    """Intervalos livres em [inicio, fim) dado ``ocupados`` ordenado por início.
+
+    Varre a lista uma única vez, mesclando reservas que se sobrepõem.
+    """
+    livres = []
+    cursor = inicio
+    for ocupado_inicio, ocupado_fim in ocupados:
+        if ocupado_fim <= cursor:
+            continue
+        if ocupado_inicio >= fim:
+            break
+        if ocupado_inicio > cursor:
+            livres.append((cursor, ocupado_inicio))
+        cursor = max(cursor, ocupado_fim)
+        if cursor >= fim:
+            break
+    if cursor < fim:
+        livres.append((cursor, fim))
+    return livres
+
+
+def _segunda(dia):
+    return dia - timedelta(days=dia.weekday())
+
+
+def _como_data(valor):
+    return valor if isinstance(valor, date) else date.fromisoformat(valor)
+
+
+def _dias_semana(recorrencia):
+    return sorted(set(recorrencia.dias_semana or [recorrencia.data_inicio.weekday()]))
+
+
+def ocorre_em(recorrencia, dia):
+    """Se a série tem ocorrência em ``dia`` (O(1), sem expandir)."""
+    if not recorrencia.data_inicio <= dia <= recorrencia.data_fim:
+        return False
+    if dia.isoformat() in recorrencia.excecoes:
+        return False
+    if recorrencia.frequencia == Recorrencia.DIARIA:
+        return (dia - recorrencia.data_inicio).days % recorrencia.intervalo == 0
+    semanas = (_segunda(dia) - _segunda(recorrencia.data_inicio)).days // 7
+    return (
+        dia.weekday() in _dias_semana(recorrencia)
+        and semanas % recorrencia.intervalo == 0
+    )
+
+
+def ocorrencias(recorrencia, inicio, fim):
+    """Gera as datas da série em [inicio, fim], em ordem."""
+    inicio = max(_como_data(inicio), recorrencia.data_inicio)
+    fim = min(_como_data(fim), recorrencia.data_fim)
+    if inicio > fim:
+        return
+    passo = recorrencia.intervalo
+    if recorrencia.frequencia == Recorrencia.DIARIA:
+        atraso = (inicio - recorrencia.data_inicio).days % passo
+        dia = inicio + timedelta(days=(passo - atraso) % passo)
+        while dia <= fim:
+            if dia.isoformat() not in recorrencia.excecoes:
+                yield dia
+            dia += timedelta(days=passo)
+        return
+
+    dias = _dias_semana(recorrencia)
+    origem = _segunda(recorrencia.data_inicio)
+    semana = _segunda(inicio)
+    atraso = ((semana - origem).days // 7) % passo
+    semana += timedelta(weeks=(passo - atraso) % passo)
+    while semana <= fim:
+        for dia_semana in dias:
+            dia = semana + timedelta(days=dia_semana)
+            if dia > fim:
+                return
+            if dia >= inicio and dia.isoformat() not in recorrencia.excecoes:
+                yield dia
+        semana += timedelta(weeks=passo)
+
+
+def expandir(recorrencias, inicio, fim):
+    """Ocorrências de várias séries na janela, intercaladas por data/horário."""
+    geradores = [
+        (
+            Ocorrencia(dia, r.hora_inicio, r.hora_fim, r.sala_id, r.usuario_id, r.pk)
+            for dia in ocorrencias(r, inicio, fim)
+        )
+        for r in recorrencias
+    ]
+    return heapq.merge(*geradores)
+
+
+def salas_livres(data, inicio, fim, capacidade_min=None):
+    """Salas sem reserva na janela: um anti-join, ainda não avaliado."""
+    salas = Sala.objects.all()
+    if capacidade_min is not None:
+        salas = salas.filter(capacidade__gte=capacidade_min)
+    ocupada = Reserva.objects.conflitantes(OuterRef("pk"), data, inicio, fim)
+    return salas.filter(~Exists(ocupada)).order_by("capacidade", "id")
+
+
+def agenda_do_dia(sala_ids, data):
+    """Consultas (reservas, séries) do dia para as salas, não avaliadas.
+
+    As reservas vêm ordenadas por (sala, hora_inicio) pelo índice.
+    """
+    reservas = (
+        Reserva.objects.filter(sala__in=sala_ids, data=data)
+        .order_by("sala_id", "hora_inicio")
+        .values_list("sala_id", "hora_inicio", "hora_fim")
+    )
+    series = Recorrencia.objects.filter(
+        sala__in=sala_ids, data_inicio__lte=data, data_fim__gte=data
+    )
+    return reservas, series
+
+
+def disponibilidade(salas, reservas, series, data, inicio, fim):
+    """[(sala, livres)] das salas livres em [inicio, fim) e suas lacunas no dia.
+
+    Recebe os resultados já avaliados de ``salas_livres`` e ``agenda_do_dia``.
+    """
+    ocupados = {
+        sala_id: [(ini, fim_ocupado) for _, ini, fim_ocupado in grupo]
+        for sala_id, grupo in groupby(reservas, key=lambda r: r[0])
+    }
+    # ocorrências de séries no dia entram na mesma agenda ordenada
+    bloqueadas = set()
+    for ocorrencia in expandir(series, data, data):
+        intervalos = ocupados.setdefault(ocorrencia.sala_id, [])
+        insort(intervalos, (ocorrencia.hora_inicio, ocorrencia.hora_fim))
+        if ocorrencia.hora_inicio < fim and ocorrencia.hora_fim > inicio:
+            bloqueadas.add(ocorrencia.sala_id)
+
+    abertura, fechamento = expediente()
+    janela_inicio = min(abertura, inicio)
+    janela_fim = max(fechamento, fim)
+    return [
+        (
+            sala,
+            [
+                {"inicio": ini.isoformat(), "fim": fim_livre.isoformat()}
+                for ini, fim_livre in lacunas_livres(
+                    ocupados.get(sala.id, []), janela_inicio, janela_fim
+                )
+            ],
+        )
+        for sala in salas
+        if sala.id not in bloqueadas
+    ]
+
+
+def sala_ocupada(sala, dia, inicio, fim, excluir_reserva=None):
+    """Conflito com reservas avulsas ou com ocorrências de séries."""
+    if Reserva.objects.conflitantes(
+        sala, dia, inicio, fim, excluir=excluir_reserva
+    ).exists():
+        return True
+    series = Recorrencia.objects.candidatas(sala, dia, dia, inicio, fim)
+    return any(ocorre_em(r, dia) for r in series)
+
+
+def recorrencia_em_conflito(recorrencia):
+    """Se alguma ocorrência da série colide com reservas ou outras séries."""
+    janela = (
+        recorrencia.sala_id,
+        recorrencia.data_inicio,
+        recorrencia.data_fim,
+        recorrencia.hora_inicio,
+        recorrencia.hora_fim,
+    )
+    reservas = Reserva.objects.filter(
+        sala_id=recorrencia.sala_id,
+        data__range=(recorrencia.data_inicio, recorrencia.data_fim),
+        hora_inicio__lt=recorrencia.hora_fim,
+        hora_fim__gt=recorrencia.hora_inicio,
+    ).values_list("data", flat=True)
+    if any(ocorre_em(recorrencia, dia) for dia in reservas.iterator()):
+        return True
+
+    outras = Recorrencia.objects.candidatas(*janela)
+    if recorrencia.pk is not None:
+        outras = outras.exclude(pk=recorrencia.pk)
+    for outra in outras:
+        inicio = max(recorrencia.data_inicio, outra.data_inicio)
+        fim = min(recorrencia.data_fim, outra.data_fim)
+        if any(ocorre_em(outra, dia) for dia in ocorrencias(recorrencia, inicio, fim)):
+            return True
+    return False
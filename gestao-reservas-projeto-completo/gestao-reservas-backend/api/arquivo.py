@@ -0,0 +1,120 @@
+"""Separação quente/fria das reservas por data.
+
+``python manage.py arquivar_reservas --antes=AAAA-MM-DD`` move, em lotes,
+as reservas anteriores à data para ``ReservaArquivada``; tombstones de
+reservas removidas há mais de ``SYNC_RETENCAO_DIAS`` são descartados e os
+mais recentes ficam na tabela quente até lá, para que o delta-sync ainda
+entregue a remoção (tokens mais antigos que a retenção são recusados pelo
+``api.sync``). O horizonte (primeiro dia ainda na
+tabela quente) separa as duas tabelas:
+
+- leituras consultam só a tabela quente, a menos que ``data_inicio`` peça
+  um período anterior ao horizonte (``api.filters.filtrar_com_arquivo``);
+- datas arquivadas são somente leitura: novas reservas antes do horizonte
+  são recusadas (checado no banco, não só no cache), então o arquivo nunca precisa entrar na checagem de
+  conflitos;
+- o delta-sync cobre apenas a tabela quente.
+"""
+
+from contextvars import ContextVar
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from .models import Reserva, ReservaArquivada
+
+CHAVE_HORIZONTE = "arquivo:horizonte"
+# o comando roda em outro processo: com cache local, a invalidação só
+# alcança os workers quando a entrada expira. Escritas não dependem disso
+# (``arquivada_no_banco``); leituras podem omitir o período recém-arquivado
+# até lá
+HORIZONTE_TTL = 5 * 60
+LOTE = 5000
+
+_movendo = ContextVar("arquivo_movendo", default=False)
+
+_CAMPOS = (
+    "id",
+    "sala_id",
+    "usuario_id",
+    "data",
+    "hora_inicio",
+    "hora_fim",
+    "atualizada_em",
+    "removida_em",
+)
+
+
+def horizonte():
+    """Primeira data mantida na tabela quente (None se nada foi arquivado)."""
+    valor = cache.get(CHAVE_HORIZONTE)
+    if valor is None:
+        ultima = ReservaArquivada.objects.aggregate(ultima=Max("data"))["ultima"]
+        valor = ultima + timedelta(days=1) if ultima else False
+        cache.set(CHAVE_HORIZONTE, valor, HORIZONTE_TTL)
+    return valor or None
+
+
+def invalidar():
+    cache.delete(CHAVE_HORIZONTE)
+
+
+def movendo():
+    """Reservas sendo movidas para o arquivo? Os signals de ``Reserva`` não
+    recalculam o rollup, que já conta o arquivo."""
+    return _movendo.get()
+
+
+def arquivada(data):
+    """A data está no período arquivado (somente leitura)?"""
+    limite = horizonte()
+    return limite is not None and data < limite
+
+
+def arquivada_no_banco(data):
+    """Como ``arquivada``, mas confirmada no banco quando o cache não sabe.
+
+    Usada para recusar escritas: o horizonte em cache de outro worker pode
+    estar até ``HORIZONTE_TTL`` atrasado. O custo é um ``EXISTS`` no índice
+    ``arquivo_ordem_idx``.
+    """
+    return arquivada(data) or ReservaArquivada.objects.filter(data__gte=data).exists()
+
+
+def arquivar(antes, lote=LOTE):
+    """Move as reservas com ``data < antes``, um lote por transação.
+
+    Gera (arquivadas, descartadas) a cada lote. O rollup de ocupação não
+    muda: ``api.ocupacao`` também conta as reservas arquivadas. Um id que já
+    existe no arquivo levanta ``IntegrityError`` e desfaz o lote.
+    """
+    retidas = timezone.now() - timedelta(days=settings.SYNC_RETENCAO_DIAS)
+    candidatas = Reserva.todas.filter(data__lt=antes).exclude(removida_em__gte=retidas)
+    try:
+        while True:
+            with transaction.atomic():
+                ids = list(
+                    candidatas.order_by("pk").values_list("pk", flat=True)[:lote]
+                )
+                if not ids:
+                    return
+                linhas = Reserva.todas.filter(pk__in=ids).values_list(*_CAMPOS)
+                copias = [
+                    ReservaArquivada(**dict(zip(_CAMPOS[:-1], linha[:-1])))
+                    for linha in linhas
+                    if linha[-1] is None
+                ]
+                ReservaArquivada.objects.bulk_create(copias)
+                token = _movendo.set(True)
+                try:
+                    Reserva.todas.filter(pk__in=ids).delete()
+                finally:
+                    _movendo.reset(token)
+            invalidar()
+            yield len(copias), len(ids) - len(copias)
+    finally:
+        invalidar()
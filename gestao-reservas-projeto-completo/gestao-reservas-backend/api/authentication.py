@@ -0,0 +1,106 @@
+"""Autenticação JWT com o usuário resolvido a partir do cache.
+
+O ``JWTAuthentication`` do simplejwt faz um SELECT em ``User`` a cada
+requisição. Aqui só os campos usados na autenticação e nas permissões
+(``CAMPOS``, mais o hash do hash da senha para a revogação de tokens) ficam no
+cache por ``AUTH_USUARIO_CACHE_TTL`` segundos, chaveados pelo id do token, e
+são descartados pelos signals quando o usuário é salvo ou removido. Sem cache
+compartilhado o descarte só vale no worker que salvou: nos demais, o TTL
+limita o atraso de uma desativação ou perda de permissão.
+"""
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core import signing
+from django.core.cache import cache
+from django.utils.translation import gettext_lazy as _
+from rest_framework import exceptions
+from rest_framework.authentication import BaseAuthentication
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+from . import calendario
+
+CAMPOS = ("id", "username", "is_active", "is_staff", "is_superuser", "nivel_acesso")
+
+
+def chave_usuario(user_id):
+    return f"auth:usuario:{user_id}"
+
+
+def guardar_usuario(usuario):
+    dados = {campo: getattr(usuario, campo) for campo in CAMPOS}
+    dados["senha"] = get_md5_hash_password(usuario.password)
+    cache.set(chave_usuario(usuario.pk), dados, settings.AUTH_USUARIO_CACHE_TTL)
+
+
+def usuario_em_cache(user_id):
+    """``User`` (só com ``CAMPOS``) e o hash da senha, ou (None, None)."""
+    dados = cache.get(chave_usuario(user_id))
+    if dados is None:
+        return None, None
+    dados = dict(dados)
+    senha = dados.pop("senha")
+    usuario = get_user_model()(**dados)
+    # como se viesse do banco: serve de FK e não é tratado como novo
+    usuario._state.adding = False
+    usuario._state.db = "default"
+    return usuario, senha
+
+
+def invalidar_usuario(user_id):
+    cache.delete(chave_usuario(user_id))
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(_("Token contained no recognizable user identification"))
+
+        usuario, senha = usuario_em_cache(user_id)
+        if usuario is None:
+            # validações do simplejwt na primeira busca; só usuários válidos
+            # entram no cache
+            usuario = super().get_user(validated_token)
+            guardar_usuario(usuario)
+            return usuario
+
+        # o token pode ter sido emitido antes de uma troca de senha
+        if (
+            api_settings.CHECK_REVOKE_TOKEN
+            and validated_token.get(api_settings.REVOKE_TOKEN_CLAIM) != senha
+        ):
+            raise AuthenticationFailed(
+                _("The user's password has been changed."), code="password_changed"
+            )
+        return usuario
+
+
+class CalendarioTokenAuthentication(BaseAuthentication):
+    """``?token=`` assinado dos links de assinatura de calendário.
+
+    ``request.auth`` fica com o feed liberado pelo token; a view confere que
+    é o feed pedido. Desativar o usuário revoga seus links.
+    """
+
+    def authenticate(self, request):
+        token = request.query_params.get("token")
+        if not token:
+            return None
+        try:
+            user_id, recurso = calendario.ler_assinatura(token)
+        except signing.BadSignature:
+            raise exceptions.AuthenticationFailed("Token de calendário inválido.")
+
+        usuario = usuario_em_cache(user_id)[0]
+        if usuario is None:
+            usuario = get_user_model().objects.filter(pk=user_id).first()
+            if usuario is not None:
+                guardar_usuario(usuario)
+        if usuario is None or not usuario.is_active:
+            raise exceptions.AuthenticationFailed("Token de calendário inválido.")
+        return usuario, {"recurso": recurso}
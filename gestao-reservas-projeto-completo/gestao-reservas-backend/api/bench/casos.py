@@ -0,0 +1,114 @@
+"""Casos de benchmark HTTP.
+
+Cada caso recebe o ``Contexto`` (cliente já autenticado e massa de dados) e
+devolve uma função sem argumentos que executa uma requisição e retorna a
+resposta; o executor mede latência e consultas de cada chamada. O formato é o
+mesmo de um ``benchmark(fn)`` do pytest-benchmark, então os casos podem ser
+reaproveitados lá.
+"""
+
+from datetime import timedelta
+from itertools import count
+
+CASOS = {}
+
+
+def caso(nome, status=200):
+    def registrar(funcao):
+        funcao.status_esperado = status
+        CASOS[nome] = funcao
+        return funcao
+
+    return registrar
+
+
+@caso("listar_salas")
+def listar_salas(ctx):
+    return lambda: ctx.client.get("/api/salas/", **ctx.auth)
+
+
+@caso("listar_reservas")
+def listar_reservas(ctx):
+    return lambda: ctx.client.get("/api/reservas/?page_size=50", **ctx.auth)
+
+
+@caso("listar_reservas_filtro")
+def listar_reservas_filtro(ctx):
+    sala = ctx.massa.salas[len(ctx.massa.salas) // 2].pk
+    meio = ctx.massa.data_inicial + timedelta(days=ctx.massa.dias // 2)
+    url = f"/api/reservas/?sala={sala}&data_inicio={meio}&page_size=50"
+    return lambda: ctx.client.get(url, **ctx.auth)
+
+
+@caso("disponiveis")
+def disponiveis(ctx):
+    url = (
+        f"/api/salas/disponiveis/?data={ctx.massa.data_inicial}"
+        "&inicio=14:00&fim=15:00&capacidade_min=15"
+    )
+    return lambda: ctx.client.get(url, **ctx.auth)
+
+
+@caso("listar_salas_async")
+def listar_salas_async(ctx):
+    return lambda: ctx.client.get("/api/async/salas/", **ctx.auth)
+
+
+@caso("listar_reservas_async")
+def listar_reservas_async(ctx):
+    return lambda: ctx.client.get("/api/async/reservas/?page_size=50", **ctx.auth)
+
+
+@caso("disponiveis_async")
+def disponiveis_async(ctx):
+    url = (
+        f"/api/async/salas/disponiveis/?data={ctx.massa.data_inicial}"
+        "&inicio=14:00&fim=15:00&capacidade_min=15"
+    )
+    return lambda: ctx.client.get(url, **ctx.auth)
+
+
+@caso("criar_reserva", status=201)
+def criar_reserva(ctx):
+    # cada chamada usa um dia livre depois da massa: nunca conflita
+    dias = count(ctx.massa.dias + 1)
+    sala = ctx.massa.salas[0].pk
+
+    def criar():
+        data = ctx.massa.data_inicial + timedelta(days=next(dias))
+        return ctx.client.post(
+            "/api/reservas/",
+            {
+                "sala_id": sala,
+                "usuario_id": ctx.massa.usuario.pk,
+                "data": str(data),
+                "hora_inicio": "09:00",
+                "hora_fim": "10:00",
+            },
+            content_type="application/json",
+            **ctx.auth,
+        )
+
+    return criar
+
+
+@caso("conflito", status=409)
+def conflito(ctx):
+    corpo = {
+        "sala_id": ctx.massa.salas[0].pk,
+        "usuario_id": ctx.massa.usuario.pk,
+        "data": str(ctx.massa.data_inicial),
+        "hora_inicio": "08:30",
+        "hora_fim": "09:30",
+    }
+    return lambda: ctx.client.post(
+        "/api/reservas/", corpo, content_type="application/json", **ctx.auth
+    )
+
+
+@caso("token")
+def token(ctx):
+    corpo = {"username": ctx.massa.usuario.username, "password": ctx.massa.senha}
+    return lambda: ctx.client.post(
+        "/api/auth/token/", corpo, content_type="application/json"
+    )
@@ -0,0 +1,60 @@
+"""Massa de dados para os benchmarks."""
+
+import time
+from dataclasses import dataclass, field
+from datetime import date, time as hora, timedelta
+
+from django.contrib.auth import get_user_model
+
+from api.models import Reserva, Sala
+
+User = get_user_model()
+
+SENHA = "bench-123"
+HORARIOS_POR_DIA = 10  # 08:00 às 18:00, uma hora cada
+
+
+@dataclass
+class Massa:
+    usuario: object
+    senha: str
+    salas: list
+    data_inicial: date
+    dias: int
+    reservas: int
+    extras: dict = field(default_factory=dict)
+
+
+def popular(reservas, salas=20, data_inicial=None):
+    """Cria ``salas`` salas e ``reservas`` reservas sem sobreposição.
+
+    As reservas preenchem os horários do expediente sala a sala, dia a dia,
+    a partir de ``data_inicial`` (hoje por padrão).
+    """
+    data_inicial = data_inicial or date.today()
+    usuario = User.objects.create_user(
+        username=f"bench-{time.time_ns()}", password=SENHA, is_staff=True
+    )
+    salas = Sala.objects.bulk_create(
+        Sala(nome=f"Bench {i}", capacidade=10 + i) for i in range(salas)
+    )
+    por_dia = len(salas) * HORARIOS_POR_DIA
+    novas = (
+        Reserva(
+            sala=salas[i % len(salas)],
+            usuario=usuario,
+            data=data_inicial + timedelta(days=i // por_dia),
+            hora_inicio=hora(8 + (i // len(salas)) % HORARIOS_POR_DIA),
+            hora_fim=hora(9 + (i // len(salas)) % HORARIOS_POR_DIA),
+        )
+        for i in range(reservas)
+    )
+    Reserva.objects.bulk_create(novas, batch_size=1000)
+    return Massa(
+        usuario=usuario,
+        senha=SENHA,
+        salas=salas,
+        data_inicial=data_inicial,
+        dias=-(-reservas // por_dia),
+        reservas=reservas,
+    )
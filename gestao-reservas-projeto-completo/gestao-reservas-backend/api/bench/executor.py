@@ -0,0 +1,160 @@
+"""Executa os casos de benchmark e agrega latência, vazão e consultas."""
+
+import platform
+import re
+import subprocess
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+from dataclasses import dataclass
+
+import django
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.utils import timezone
+
+from .casos import CASOS
+from .http import ClienteHTTP
+
+
+@dataclass
+class Contexto:
+    client: Client
+    massa: object
+    auth: dict
+
+
+def percentil(valores, p):
+    """Percentil por posição mais próxima sobre ``valores`` ordenados."""
+    if not valores:
+        return None
+    indice = max(0, min(len(valores) - 1, round(p / 100 * len(valores)) - 1))
+    return valores[indice]
+
+
+def autenticar(client, massa):
+    resp = client.post(
+        "/api/auth/token/",
+        {"username": massa.usuario.username, "password": massa.senha},
+        content_type="application/json",
+    )
+    return {"HTTP_AUTHORIZATION": f"Bearer {resp.json()['access']}"}
+
+
+_CONSULTAS_SERVER_TIMING = re.compile(r'db;[^,]*desc="(\d+) consultas"')
+
+
+def _consultas_remotas(resposta):
+    # servidor externo com API_METRICS=1 informa as consultas no Server-Timing
+    encontrado = _CONSULTAS_SERVER_TIMING.search(resposta.get("Server-Timing", ""))
+    return int(encontrado.group(1)) if encontrado else None
+
+
+def _medir_local(executar):
+    with CaptureQueriesContext(connection) as capturadas:
+        inicio = time.perf_counter()
+        resposta = executar()
+        latencia = (time.perf_counter() - inicio) * 1000
+    return latencia, resposta, len(capturadas)
+
+
+def _medir_remoto(executar):
+    inicio = time.perf_counter()
+    resposta = executar()
+    latencia = (time.perf_counter() - inicio) * 1000
+    return latencia, resposta, _consultas_remotas(resposta)
+
+
+def medir_caso(nome, ctx, iteracoes, aquecimento, concorrencia=1, remoto=False):
+    executar = CASOS[nome](ctx)
+    esperado = CASOS[nome].status_esperado
+    medir = _medir_remoto if remoto else _medir_local
+    for _ in range(aquecimento):
+        executar()
+
+    inicio_total = time.perf_counter()
+    if concorrencia > 1:
+        with ThreadPoolExecutor(max_workers=concorrencia) as pool:
+            medidas = list(pool.map(lambda _: medir(executar), range(iteracoes)))
+    else:
+        medidas = [medir(executar) for _ in range(iteracoes)]
+    duracao = time.perf_counter() - inicio_total
+
+    latencias = sorted(latencia for latencia, _, _ in medidas)
+    erros = sum(resposta.status_code != esperado for _, resposta, _ in medidas)
+    consultas = [n for _, _, n in medidas if n is not None]
+    return {
+        "iteracoes": iteracoes,
+        "erros": erros,
+        "vazao_rps": iteracoes / duracao,
+        "p50_ms": percentil(latencias, 50),
+        "p95_ms": percentil(latencias, 95),
+        "p99_ms": percentil(latencias, 99),
+        "max_ms": latencias[-1],
+        "consultas_por_req": (sum(consultas) / len(consultas) if consultas else None),
+    }
+
+
+def _commit_atual():
+    try:
+        saida = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return saida.stdout.strip()
+
+
+def executar(massa, casos, iteracoes, aquecimento, url=None, concorrencia=(1,)):
+    """Roda os casos no processo (test client) ou contra ``url`` via HTTP.
+
+    Com mais de um nível de ``concorrencia`` cada caso é medido em todos e
+    aparece como ``caso@nivel`` (varredura de limites de concorrência).
+    No processo o rate limiting fica desligado (o caso ``token`` esgotaria o
+    balde de login); contra ``url``, suba o servidor com ``API_THROTTLE=0``.
+    """
+    client = ClienteHTTP(url) if url else Client()
+    medidos = {}
+    with nullcontext() if url else override_settings(API_THROTTLE=False):
+        ctx = Contexto(client=client, massa=massa, auth=autenticar(client, massa))
+        for nome in casos:
+            for nivel in concorrencia:
+                chave = nome if len(concorrencia) == 1 else f"{nome}@{nivel}"
+                medidos[chave] = medir_caso(
+                    nome, ctx, iteracoes, aquecimento, nivel, remoto=bool(url)
+                )
+    return {
+        "meta": {
+            "commit": _commit_atual(),
+            "quando": timezone.now().isoformat(),
+            "python": platform.python_version(),
+            "django": django.get_version(),
+            "banco": connection.vendor,
+            "servidor": url or "test client",
+            "concorrencia": list(concorrencia),
+            "salas": len(massa.salas),
+            "reservas": massa.reservas,
+            "iteracoes": iteracoes,
+        },
+        "casos": medidos,
+    }
+
+
+def comparar(atual, anterior):
+    """Variação percentual de p95 e vazão por caso presente nos dois."""
+    diferencas = {}
+    for nome, dados in atual["casos"].items():
+        base = anterior.get("casos", {}).get(nome)
+        if not base:
+            continue
+        diferencas[nome] = {
+            "p95_pct": 100 * (dados["p95_ms"] - base["p95_ms"]) / base["p95_ms"],
+            "vazao_pct": 100
+            * (dados["vazao_rps"] - base["vazao_rps"])
+            / base["vazao_rps"],
+        }
+    return diferencas
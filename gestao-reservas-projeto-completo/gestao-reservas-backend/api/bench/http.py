@@ -0,0 +1,71 @@
+"""Cliente HTTP real para rodar os casos contra um servidor em execução.
+
+Imita a parte da API do ``django.test.Client`` usada pelos casos (``get``,
+``post`` e cabeçalhos ``HTTP_*``), com uma conexão keep-alive por thread.
+"""
+
+import http.client
+import json
+import threading
+from urllib.parse import urlsplit
+
+
+class Resposta:
+    def __init__(self, status_code, headers, content):
+        self.status_code = status_code
+        self.headers = headers
+        self.content = content
+
+    def __getitem__(self, nome):
+        return self.headers[nome]
+
+    def get(self, nome, padrao=None):
+        return self.headers.get(nome, padrao)
+
+    def json(self):
+        return json.loads(self.content)
+
+
+class ClienteHTTP:
+    def __init__(self, url):
+        partes = urlsplit(url)
+        self._classe = (
+            http.client.HTTPSConnection
+            if partes.scheme == "https"
+            else http.client.HTTPConnection
+        )
+        self._host = partes.netloc
+        self._prefixo = partes.path.rstrip("/")
+        self._local = threading.local()
+
+    def _conexao(self):
+        conexao = getattr(self._local, "conexao", None)
+        if conexao is None:
+            conexao = self._local.conexao = self._classe(self._host, timeout=30)
+        return conexao
+
+    def get(self, caminho, **extra):
+        return self._requisicao("GET", caminho, None, extra)
+
+    def post(self, caminho, data=None, content_type=None, **extra):
+        corpo = json.dumps(data).encode() if data is not None else None
+        if content_type:
+            extra["CONTENT_TYPE"] = content_type
+        return self._requisicao("POST", caminho, corpo, extra)
+
+    def _requisicao(self, metodo, caminho, corpo, extra):
+        cabecalhos = {}
+        for chave, valor in extra.items():
+            # formato WSGI do test client: HTTP_AUTHORIZATION -> Authorization
+            nome = chave[5:] if chave.startswith("HTTP_") else chave
+            cabecalhos[nome.replace("_", "-").title()] = valor
+        conexao = self._conexao()
+        try:
+            conexao.request(metodo, self._prefixo + caminho, corpo, cabecalhos)
+            resposta = conexao.getresponse()
+        except (http.client.HTTPException, OSError):
+            # servidor fechou a conexão keep-alive: reabre uma vez
+            conexao.close()
+            conexao.request(metodo, self._prefixo + caminho, corpo, cabecalhos)
+            resposta = conexao.getresponse()
+        return Resposta(resposta.status, resposta.headers, resposta.read())
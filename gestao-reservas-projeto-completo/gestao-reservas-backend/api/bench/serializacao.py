@@ -0,0 +1,49 @@
+"""Compara o ReservaSerializer com o caminho rápido de ``api.leitura``."""
+
+import time
+
+from django.db import transaction
+
+from api.bench.dados import popular
+from api.leitura import linhas_reserva, serializar_reservas
+from api.models import Reserva
+from api.serializers import ReservaSerializer
+
+
+def _medir(funcao, repeticoes):
+    melhor = float("inf")
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        resultado = funcao()
+        melhor = min(melhor, time.perf_counter() - inicio)
+    return melhor, resultado
+
+
+def comparar(total=5000, repeticoes=3):
+    """Mede as duas serializações sobre ``total`` reservas (em rollback).
+
+    Retorna um dict com os tempos (melhor de ``repeticoes``), linhas/s,
+    o ganho e se as saídas são idênticas.
+    """
+    with transaction.atomic():
+        popular(total)
+        queryset = Reserva.objects.select_related("sala", "usuario").order_by(
+            "data", "hora_inicio", "id"
+        )
+        t_drf, drf = _medir(
+            lambda: ReservaSerializer(queryset.all(), many=True).data, repeticoes
+        )
+        t_rapido, rapido = _medir(
+            lambda: serializar_reservas(linhas_reserva(queryset.all())), repeticoes
+        )
+        transaction.set_rollback(True)
+
+    return {
+        "linhas": total,
+        "drf_s": t_drf,
+        "rapido_s": t_rapido,
+        "drf_linhas_s": total / t_drf,
+        "rapido_linhas_s": total / t_rapido,
+        "ganho": t_drf / t_rapido,
+        "identico": [dict(item) for item in drf] == rapido,
+    }
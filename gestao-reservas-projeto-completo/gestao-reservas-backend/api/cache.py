@@ -0,0 +1,109 @@
+"""Cache versionado para dados de referência (salas, usuários).
+
+Cada namespace tem um token de versão guardado no cache do Django. Salvar ou
+remover um registro troca o token (via signals), o que invalida de uma vez
+todas as respostas em cache daquele namespace e muda o ETag. Requisições
+condicionais com o ETag atual recebem 304 sem tocar no banco.
+
+Com cache local (sem Redis) a troca só acontece no worker que gravou; os
+tokens expiram após ``CACHE_VERSAO_TTL`` segundos, o que limita a defasagem
+dos demais workers a esse intervalo.
+"""
+
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.http import http_date, quote_etag
+from rest_framework import status
+from rest_framework.response import Response
+
+TIMEOUT = 60 * 60
+
+
+def _chave_versao(namespace):
+    return f"versao:{namespace}"
+
+
+def versao(namespace):
+    """Token atual do namespace (nanossegundos da última invalidação)."""
+    atual = cache.get(_chave_versao(namespace))
+    if atual is None:
+        # cache vazio/evictado: um token novo nunca colide com ETags antigos
+        cache.add(_chave_versao(namespace), time.time_ns(), settings.CACHE_VERSAO_TTL)
+        atual = cache.get(_chave_versao(namespace))
+    return atual
+
+
+async def aversao(namespace):
+    """``versao`` para views assíncronas (API async do cache)."""
+    atual = await cache.aget(_chave_versao(namespace))
+    if atual is None:
+        await cache.aadd(
+            _chave_versao(namespace), time.time_ns(), settings.CACHE_VERSAO_TTL
+        )
+        atual = await cache.aget(_chave_versao(namespace))
+    return atual
+
+
+def validadores(namespace, token):
+    """ETag e Last-Modified (epoch) de uma versão do namespace."""
+    return quote_etag(f"{namespace}-{token}"), token // 1_000_000_000
+
+
+def aplicar_validadores(resposta, etag, modificado_em):
+    resposta["ETag"] = etag
+    resposta["Last-Modified"] = http_date(modificado_em)
+    resposta["Cache-Control"] = "no-cache"
+    return resposta
+
+
+def invalidar(namespace):
+    cache.set(_chave_versao(namespace), time.time_ns(), settings.CACHE_VERSAO_TTL)
+
+
+def nao_modificado(request, etag):
+    """304 somente pelo ETag.
+
+    ``If-Modified-Since`` é ignorado: o Last-Modified tem resolução de
+    segundos e uma troca de versão no mesmo segundo da resposta anterior
+    daria um 304 falso.
+    """
+    if_none_match = request.headers.get("If-None-Match")
+    if if_none_match is None:
+        return False
+    etags = [tag.strip() for tag in if_none_match.split(",")]
+    return etag in etags or "*" in etags
+
+
+class VersionedCacheMixin:
+    """Cacheia ``list``/``retrieve`` por versão e responde GETs condicionais.
+
+    A view define ``cache_namespace``; a invalidação fica nos signals.
+    """
+
+    cache_namespace = None
+
+    def list(self, request, *args, **kwargs):
+        return self._resposta_cacheada(request, super().list, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self._resposta_cacheada(request, super().retrieve, *args, **kwargs)
+
+    def _resposta_cacheada(self, request, gerar, *args, **kwargs):
+        token = versao(self.cache_namespace)
+        etag, modificado_em = validadores(self.cache_namespace, token)
+
+        if nao_modificado(request, etag):
+            resposta = Response(status=status.HTTP_304_NOT_MODIFIED)
+        else:
+            chave = f"{self.cache_namespace}:{token}:{request.get_full_path()}"
+            dados = cache.get(chave)
+            if dados is None:
+                resposta = gerar(request, *args, **kwargs)
+                if resposta.status_code != status.HTTP_200_OK:
+                    return resposta
+                cache.set(chave, resposta.data, TIMEOUT)
+            else:
+                resposta = Response(dados)
+        return aplicar_validadores(resposta, etag, modificado_em)
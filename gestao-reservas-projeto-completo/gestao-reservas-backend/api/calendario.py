@@ -0,0 +1,244 @@
+"""Feeds iCalendar (RFC 5545) por sala e por usuário.
+
+O feed traz as reservas a partir de ``CALENDARIO_DIAS_PASSADOS`` dias atrás
+e as séries como um único ``VEVENT`` com ``RRULE``/``EXDATE``. Os horários
+são "flutuantes" (sem fuso), como na API. O texto é gerado em streaming e
+guardado no cache sob um validador derivado dos próprios dados: contagem e
+maior ``atualizada_em`` das reservas (inclusive removidas) e das séries do
+feed, mais o dia. Não depende de versões em cache, então vale igual em todos
+os workers, com ou sem Redis, ao custo de dois agregados (reservas e séries)
+por requisição. Renomear uma sala ou um usuário não muda o validador: o texto
+novo aparece na próxima gravação do feed ou na virada do dia.
+
+Aplicativos de calendário não enviam ``Authorization``: o link de assinatura
+leva um ``token`` assinado (``assinar``) que identifica o usuário e o feed.
+"""
+
+import copy
+from datetime import datetime, timedelta
+from datetime import timezone as dt_timezone
+
+from django.conf import settings
+from django.core import signing
+from django.core.cache import cache
+from django.db.models import Count, Max
+from django.utils import timezone
+from django.utils.http import quote_etag
+
+from . import cache as cache_versionado
+from .agenda import ocorrencias
+from .models import Recorrencia, Reserva
+
+SAL = "api.calendario"
+CONTENT_TYPE = "text/calendar; charset=utf-8"
+CHUNK_SIZE = 2000
+PRODID = "-//Gestao de Reservas//Calendario//PT"
+_DIAS_RRULE = ("MO", "TU", "WE", "TH", "FR", "SA", "SU")
+
+
+def recurso(tipo, pk):
+    return f"{tipo}:{pk}"
+
+
+def _filtro(recurso):
+    tipo, pk = recurso.split(":")
+    return {f"{tipo}_id": int(pk)}
+
+
+def assinar(user_id, recurso):
+    return signing.dumps({"u": user_id, "r": recurso}, salt=SAL, compress=True)
+
+
+def ler_assinatura(token):
+    """(user_id, recurso) do token ou ``signing.BadSignature``."""
+    dados = signing.loads(token, salt=SAL)
+    return dados["u"], dados["r"]
+
+
+def _estado(consulta):
+    """(quantidade, última alteração) das linhas do feed, num só agregado."""
+    dados = consulta.aggregate(n=Count("id"), ultima=Max("atualizada_em"))
+    return dados["n"], dados["ultima"]
+
+
+def validadores(recurso):
+    """ETag, Last-Modified (epoch) e chave de cache do feed hoje.
+
+    A janela do feed anda com a data, então o dia também entra no validador.
+    Reservas removidas ficam na contagem: a remoção troca ``atualizada_em``.
+    """
+    hoje = timezone.localdate()
+    inicio, filtro = _inicio(), _filtro(recurso)
+    estados = [
+        _estado(Reserva.todas.filter(data__gte=inicio, **filtro)),
+        _estado(Recorrencia.objects.filter(data_fim__gte=inicio, **filtro)),
+    ]
+    meia_noite = datetime.combine(hoje, datetime.min.time(), tzinfo=dt_timezone.utc)
+    marcas = [int(meia_noite.timestamp())]
+    partes = []
+    for n, ultima in estados:
+        micro = 0
+        if ultima is not None:
+            marcas.append(int(ultima.timestamp()))
+            micro = marcas[-1] * 1_000_000 + ultima.microsecond
+        partes.append(f"{n}.{micro}")
+    token = "-".join(partes)
+    etag = quote_etag(f"{recurso}-{hoje.isoformat()}-{token}")
+    return etag, max(marcas), f"calendario:{recurso}:{hoje.isoformat()}:{token}"
+
+
+def _texto(valor):
+    return (
+        str(valor)
+        .replace("\\", "\\\\")
+        .replace(";", "\\;")
+        .replace(",", "\\,")
+        .replace("\n", "\\n")
+    )
+
+
+def _linha(conteudo):
+    """Linha terminada em CRLF, dobrada em 75 octetos (RFC 5545, 3.1)."""
+    bruto = conteudo.encode()
+    if len(bruto) <= 75:
+        return conteudo + "\r\n"
+    partes, inicio, limite = [], 0, 75
+    while inicio < len(bruto):
+        fim = min(inicio + limite, len(bruto))
+        # não corta um caractere UTF-8 ao meio
+        while fim < len(bruto) and bruto[fim] & 0xC0 == 0x80:
+            fim -= 1
+        partes.append(bruto[inicio:fim].decode())
+        inicio, limite = fim, 74  # continuação começa com um espaço
+    return "\r\n ".join(partes) + "\r\n"
+
+
+def _data_hora(data, hora):
+    return f"{data:%Y%m%d}T{hora:%H%M%S}"
+
+
+def _utc(momento):
+    return f"{momento.astimezone(dt_timezone.utc):%Y%m%dT%H%M%SZ}"
+
+
+def _evento(uid, carimbo, inicio, fim, resumo, local, extras=()):
+    linhas = [
+        "BEGIN:VEVENT",
+        f"UID:{uid}",
+        f"DTSTAMP:{carimbo}",
+        f"DTSTART:{inicio}",
+        f"DTEND:{fim}",
+        f"SUMMARY:{_texto(resumo)}",
+        f"LOCATION:{_texto(local)}",
+        *extras,
+        "END:VEVENT",
+    ]
+    return "".join(_linha(linha) for linha in linhas)
+
+
+def _regra(serie):
+    """(DTSTART, RRULE) equivalentes a ``agenda.ocorrencias`` ou None."""
+    sem_excecoes = copy.copy(serie)
+    sem_excecoes.excecoes = []
+    primeira = next(ocorrencias(sem_excecoes, serie.data_inicio, serie.data_fim), None)
+    if primeira is None:
+        return None
+    partes = [
+        "FREQ=DAILY" if serie.frequencia == Recorrencia.DIARIA else "FREQ=WEEKLY",
+        f"INTERVAL={serie.intervalo}",
+    ]
+    if serie.frequencia == Recorrencia.SEMANAL:
+        dias = sorted(set(serie.dias_semana or [serie.data_inicio.weekday()]))
+        # semanas contadas a partir da segunda-feira, como na agenda
+        partes += ["BYDAY=" + ",".join(_DIAS_RRULE[d] for d in dias), "WKST=MO"]
+    partes.append(f"UNTIL={_data_hora(serie.data_fim, serie.hora_inicio)}")
+    return primeira, ";".join(partes)
+
+
+def gerar(nome, reservas, series, chunk_size=CHUNK_SIZE):
+    """Trechos do .ics: cabeçalho, uma série por vez e reservas em blocos."""
+    carimbo = _utc(timezone.now())
+    yield "".join(
+        _linha(linha)
+        for linha in (
+            "BEGIN:VCALENDAR",
+            "VERSION:2.0",
+            f"PRODID:{PRODID}",
+            "CALSCALE:GREGORIAN",
+            "METHOD:PUBLISH",
+            f"X-WR-CALNAME:{_texto(nome)}",
+        )
+    )
+    for serie in series:
+        regra = _regra(serie)
+        if regra is None:
+            continue
+        primeira, rrule = regra
+        extras = [f"RRULE:{rrule}"] + [
+            f"EXDATE:{_data_hora(datetime.fromisoformat(d), serie.hora_inicio)}"
+            for d in serie.excecoes
+        ]
+        yield _evento(
+            f"recorrencia-{serie.pk}@gestao-reservas",
+            carimbo,
+            _data_hora(primeira, serie.hora_inicio),
+            _data_hora(primeira, serie.hora_fim),
+            f"{serie.sala.nome} ({serie.usuario.username})",
+            serie.sala.nome,
+            extras,
+        )
+
+    bloco = []
+    linhas = reservas.order_by("data", "hora_inicio", "id").values_list(
+        "id",
+        "data",
+        "hora_inicio",
+        "hora_fim",
+        "atualizada_em",
+        "sala__nome",
+        "usuario__username",
+    )
+    for pk, data, inicio, fim, atualizada_em, sala, usuario in linhas.iterator(
+        chunk_size=chunk_size
+    ):
+        bloco.append(
+            _evento(
+                f"reserva-{pk}@gestao-reservas",
+                carimbo,
+                _data_hora(data, inicio),
+                _data_hora(data, fim),
+                f"{sala} ({usuario})",
+                sala,
+                [f"LAST-MODIFIED:{_utc(atualizada_em)}"],
+            )
+        )
+        if len(bloco) >= chunk_size:
+            yield "".join(bloco)
+            bloco = []
+    bloco.append(_linha("END:VCALENDAR"))
+    yield "".join(bloco)
+
+
+def _inicio():
+    return timezone.localdate() - timedelta(days=settings.CALENDARIO_DIAS_PASSADOS)
+
+
+def consultas(**filtro):
+    """(reservas, séries) do feed para ``sala_id=`` ou ``usuario_id=``."""
+    inicio = _inicio()
+    reservas = Reserva.objects.filter(data__gte=inicio, **filtro)
+    series = (
+        Recorrencia.objects.filter(data_fim__gte=inicio, **filtro)
+        .select_related("sala", "usuario")
+        .order_by("id")
+    )
+    return reservas, series
+
+
+def em_cache(chave, trechos, timeout=cache_versionado.TIMEOUT):
+    """Repassa os trechos e guarda o texto completo no cache ao final."""
+    gerados = []
+    for trecho in trechos:
+        gerados.append(trecho)
+        yield trecho
+    cache.set(chave, "".join(gerados), timeout)
@@ -0,0 +1,8 @@
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+
+class ConflitoReserva(APIException):
+    status_code = status.HTTP_409_CONFLICT
+    default_detail = "A sala já está reservada neste horário."
+    default_code = "conflito_reserva"
@@ -0,0 +1,71 @@
+"""Exportação em streaming de reservas (NDJSON/CSV).
+
+As linhas são lidas como tuplas (``values_list``) em blocos via ``iterator``,
+sem instanciar modelos nem montar a resposta inteira em memória.
+"""
+
+import csv
+import json
+
+from django.db.models import QuerySet
+
+CAMPOS = (
+    "id",
+    "sala_id",
+    "sala__nome",
+    "usuario_id",
+    "usuario__username",
+    "data",
+    "hora_inicio",
+    "hora_fim",
+)
+CABECALHO = (
+    "id",
+    "sala_id",
+    "sala_nome",
+    "usuario_id",
+    "usuario",
+    "data",
+    "hora_inicio",
+    "hora_fim",
+)
+FORMATOS = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv; charset=utf-8",
+}
+CHUNK_SIZE = 2000
+
+
+class _Eco:
+    """Pseudo-arquivo: ``csv.writer`` devolve a linha em vez de acumular."""
+
+    def write(self, valor):
+        return valor
+
+
+def linhas(queryset, chunk_size=CHUNK_SIZE):
+    """Aceita um queryset ou uma lista deles, lidos em sequência."""
+    consultas = [queryset] if isinstance(queryset, QuerySet) else queryset
+    for consulta in consultas:
+        consulta = consulta.order_by("data", "hora_inicio", "id").values_list(*CAMPOS)
+        for linha in consulta.iterator(chunk_size=chunk_size):
+            yield tuple(
+                v.isoformat() if hasattr(v, "isoformat") else v for v in linha
+            )
+
+
+def gerar_ndjson(queryset, chunk_size=CHUNK_SIZE):
+    for linha in linhas(queryset, chunk_size):
+        yield json.dumps(dict(zip(CABECALHO, linha)), ensure_ascii=False) + "\n"
+
+
+def gerar_csv(queryset, chunk_size=CHUNK_SIZE):
+    writer = csv.writer(_Eco())
+    yield writer.writerow(CABECALHO)
+    for linha in linhas(queryset, chunk_size):
+        yield writer.writerow(linha)
+
+
+def gerar(formato, queryset, chunk_size=CHUNK_SIZE):
+    geradores = {"ndjson": gerar_ndjson, "csv": gerar_csv}
+    return geradores[formato](queryset, chunk_size)
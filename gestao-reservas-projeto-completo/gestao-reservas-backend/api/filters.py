@@ -0,0 +1,45 @@
+from . import arquivo
+from .models import ReservaArquivada
+from .serializers import ReservaFiltroSerializer
+
+
+def _validar(params):
+    serializer = ReservaFiltroSerializer(data=params)
+    serializer.is_valid(raise_exception=True)
+    return serializer.validated_data
+
+
+def _aplicar(queryset, filtros, usuario):
+    if "sala" in filtros:
+        queryset = queryset.filter(sala_id=filtros["sala"])
+    if "usuario" in filtros:
+        queryset = queryset.filter(usuario_id=filtros["usuario"])
+    if filtros.get("minhas") and usuario is not None:
+        queryset = queryset.filter(usuario_id=usuario.pk)
+    if "data_inicio" in filtros:
+        queryset = queryset.filter(data__gte=filtros["data_inicio"])
+    if "data_fim" in filtros:
+        queryset = queryset.filter(data__lte=filtros["data_fim"])
+    return queryset
+
+
+def filtrar_reservas(queryset, params, usuario=None):
+    """Aplica os filtros de query string (sala, usuario, período, minhas)."""
+    return _aplicar(queryset, _validar(params), usuario)
+
+
+def filtrar_com_arquivo(queryset, params, usuario=None):
+    """Consultas filtradas em ordem de data: arquivo (se pedido) e quente.
+
+    O arquivo só entra quando ``data_inicio`` é anterior ao horizonte; como
+    todo o arquivo vem antes do horizonte, ler as consultas em sequência
+    mantém a ordem (data, hora_inicio, id).
+    """
+    filtros = _validar(params)
+    inicio, fim = filtros.get("data_inicio"), filtros.get("data_fim")
+    if inicio is None or not arquivo.arquivada(inicio):
+        return [_aplicar(queryset, filtros, usuario)]
+    consultas = [_aplicar(ReservaArquivada.objects.all(), filtros, usuario)]
+    if fim is None or not arquivo.arquivada(fim):
+        consultas.append(_aplicar(queryset, filtros, usuario))
+    return consultas
@@ -0,0 +1,144 @@
+"""Gerador sintético de salas, usuários e reservas para testes de carga.
+
+A geração é determinística: cada dia usa um ``random.Random`` próprio
+derivado da semente, então o resultado não depende de como os dias são
+divididos entre processos. As reservas de uma sala num dia nunca se
+sobrepõem (são geradas em sequência, com folgas aleatórias entre elas).
+"""
+
+import random
+from concurrent.futures import ProcessPoolExecutor
+from datetime import time, timedelta
+
+import django
+from django.apps import apps
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.db import connections, transaction
+
+from .models import Reserva, Sala
+
+User = get_user_model()
+
+ABERTURA = 8 * 60  # minutos desde 00:00
+FECHAMENTO = 20 * 60
+DURACOES = (30, 60, 60, 60, 90, 120)
+FOLGAS = (0, 0, 15, 30, 60, 120)
+PESO_FIM_DE_SEMANA = 0.15
+
+
+def criar_salas(quantidade, semente):
+    rng = random.Random(f"{semente}:salas")
+    salas = Sala.objects.bulk_create(
+        Sala(nome=f"Sala {i + 1:04d}", capacidade=rng.choice((6, 8, 12, 20, 40)))
+        for i in range(quantidade)
+    )
+    return [sala.pk for sala in salas]
+
+
+def criar_usuarios(quantidade, semente, senha="123"):
+    # um único hash para todos: o PBKDF2 por usuário dominaria o tempo
+    hash_senha = make_password(senha)
+    prefixo = f"carga{semente}-"
+    User.objects.bulk_create(
+        (
+            User(username=f"{prefixo}{i:06d}", password=hash_senha)
+            for i in range(quantidade)
+        ),
+        batch_size=5000,
+        ignore_conflicts=True,
+    )
+    return list(
+        User.objects.filter(username__startswith=prefixo).values_list("pk", flat=True)
+    )
+
+
+def cotas_por_dia(total, data_inicial, dias):
+    """Distribui ``total`` reservas pelos dias (fins de semana mais vazios)."""
+    pesos = [
+        PESO_FIM_DE_SEMANA if (data_inicial + timedelta(d)).weekday() >= 5 else 1.0
+        for d in range(dias)
+    ]
+    soma = sum(pesos)
+    brutas = [total * p / soma for p in pesos]
+    cotas = [int(b) for b in brutas]
+    # maiores restos recebem as unidades que sobraram
+    restos = sorted(range(dias), key=lambda d: brutas[d] - cotas[d], reverse=True)
+    for d in restos[: total - sum(cotas)]:
+        cotas[d] += 1
+    return cotas
+
+
+def reservas_do_dia(semente, dia, data, cota, salas, usuarios):
+    """Gera até ``cota`` reservas em ``data`` sem sobreposição por sala."""
+    rng = random.Random(f"{semente}:{dia}")
+    cursores = {sala: ABERTURA + rng.choice(FOLGAS) for sala in salas}
+    livres = list(salas)
+    geradas = 0
+    while geradas < cota and livres:
+        posicao = rng.randrange(len(livres))
+        sala = livres[posicao]
+        inicio = cursores[sala]
+        fim = inicio + rng.choice(DURACOES)
+        if fim > FECHAMENTO:
+            # sala lotada no dia: remove em O(1) trocando com o último
+            livres[posicao] = livres[-1]
+            livres.pop()
+            continue
+        cursores[sala] = fim + rng.choice(FOLGAS)
+        geradas += 1
+        yield Reserva(
+            sala_id=sala,
+            usuario_id=rng.choice(usuarios),
+            data=data,
+            hora_inicio=time(inicio // 60, inicio % 60),
+            hora_fim=time(fim // 60, fim % 60),
+        )
+
+
+def gravar_intervalo(semente, data_inicial, dias, cotas, salas, usuarios, lote):
+    """Grava os dias ``dias`` (range) em transações de ``lote`` reservas."""
+    if not apps.ready:  # processos iniciados via spawn
+        django.setup()
+    total = 0
+    buffer = []
+    for dia in dias:
+        data = data_inicial + timedelta(days=dia)
+        buffer.extend(reservas_do_dia(semente, dia, data, cotas[dia], salas, usuarios))
+        if len(buffer) >= lote:
+            total += _gravar(buffer)
+            buffer = []
+    if buffer:
+        total += _gravar(buffer)
+    return total
+
+
+def _gravar(reservas):
+    with transaction.atomic():
+        Reserva.objects.bulk_create(reservas, batch_size=1000)
+    return len(reservas)
+
+
+def gerar_reservas(
+    total, data_inicial, dias, salas, usuarios, semente, lote=20000, processos=1
+):
+    """Gera e grava ``total`` reservas; retorna quantas foram criadas.
+
+    Com ``processos > 1`` os dias são divididos em faixas contíguas, uma por
+    processo, cada um com sua própria conexão.
+    """
+    cotas = cotas_por_dia(total, data_inicial, dias)
+    args = (semente, data_inicial)
+    if processos <= 1:
+        return gravar_intervalo(*args, range(dias), cotas, salas, usuarios, lote)
+
+    tamanho = -(-dias // processos)
+    faixas = [range(i, min(i + tamanho, dias)) for i in range(0, dias, tamanho)]
+    # conexões abertas não podem ser herdadas pelos processos filhos
+    connections.close_all()
+    with ProcessPoolExecutor(max_workers=processos) as pool:
+        futuros = [
+            pool.submit(gravar_intervalo, *args, faixa, cotas, salas, usuarios, lote)
+            for faixa in faixas
+        ]
+        return sum(f.result() for f in futuros)
@@ -0,0 +1,97 @@
+"""Caminho rápido de leitura para listagens de reservas.
+
+``PlanoLeitura`` percorre uma vez os campos legíveis de um serializer (incluindo
+os aninhados) e monta um plano: quais colunas buscar com ``values_list`` e
+como converter cada uma. Cada linha vira um dict diretamente, sem instanciar
+modelos nem passar pela maquinaria de campos do DRF, e o JSON resultante é
+idêntico ao do serializer original.
+"""
+
+from rest_framework import ISO_8601, serializers
+from rest_framework.settings import api_settings
+
+from .serializers import ReservaSerializer
+
+_FORMATOS_PADRAO = {
+    serializers.DateField: "DATE_FORMAT",
+    serializers.TimeField: "TIME_FORMAT",
+}
+_IDENTIDADE = (
+    serializers.IntegerField,
+    serializers.CharField,
+    serializers.BooleanField,
+)
+
+
+def _conversor(campo):
+    for classe, padrao in _FORMATOS_PADRAO.items():
+        if isinstance(campo, classe):
+            formato = getattr(campo, "format", getattr(api_settings, padrao))
+            if formato == ISO_8601:
+                return lambda valor: None if valor is None else valor.isoformat()
+    if isinstance(campo, _IDENTIDADE):
+        return None
+    raise TypeError(f"Campo sem suporte no caminho rápido: {campo!r}")
+
+
+class PlanoLeitura:
+    def __init__(self, serializer_class):
+        self.colunas = []
+        self._campos = self._montar(serializer_class(), prefixo="")
+
+    def _montar(self, serializer, prefixo):
+        campos = []
+        for nome, campo in serializer.fields.items():
+            if campo.write_only:
+                continue
+            origem = prefixo + campo.source.replace(".", "__")
+            if isinstance(campo, serializers.BaseSerializer):
+                campos.append((nome, None, self._montar(campo, origem + "__")))
+            else:
+                campos.append((nome, len(self.colunas), _conversor(campo)))
+                self.colunas.append(origem)
+        return campos
+
+    def indice(self, coluna):
+        return self.colunas.index(coluna)
+
+    def renderizar(self, linha, campos=None):
+        saida = {}
+        for nome, indice, extra in self._campos if campos is None else campos:
+            if indice is None:
+                saida[nome] = self.renderizar(linha, extra)
+            elif extra is None:
+                saida[nome] = linha[indice]
+            else:
+                saida[nome] = extra(linha[indice])
+        return saida
+
+
+class _PlanoReserva(PlanoLeitura):
+    def __init__(self):
+        super().__init__(ReservaSerializer)
+        self._posicao = [self.indice(c) for c in ("data", "hora_inicio", "id")]
+
+    def posicao(self, linha):
+        """Chave (data, hora_inicio, id) usada pela paginação por cursor."""
+        return tuple(linha[i] for i in self._posicao)
+
+
+_plano_reserva = None
+
+
+def plano_reserva():
+    global _plano_reserva
+    if _plano_reserva is None:
+        _plano_reserva = _PlanoReserva()
+    return _plano_reserva
+
+
+def linhas_reserva(queryset):
+    """``values_list`` com exatamente as colunas do plano (joins incluídos)."""
+    return queryset.values_list(*plano_reserva().colunas)
+
+
+def serializar_reservas(linhas):
+    plano = plano_reserva()
+    return [plano.renderizar(linha) for linha in linhas]
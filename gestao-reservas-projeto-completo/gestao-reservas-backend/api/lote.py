@@ -0,0 +1,277 @@
+"""Criação, atualização e remoção de reservas em lote.
+
+Todas as salas/usuários referenciados são resolvidos com um ``in_bulk`` cada,
+os conflitos (dentro do lote e contra o banco) são verificados numa única
+passada sobre intervalos ordenados por (sala, data) e a escrita é feita com
+``bulk_create``/``bulk_update`` numa só transação.
+"""
+
+from bisect import bisect_left
+from collections import defaultdict
+
+from django.contrib.auth import get_user_model
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from . import ocupacao
+from .agenda import ocorre_em
+from .models import Recorrencia, Reserva, Sala
+from .serializers import ReservaLoteItemSerializer
+
+User = get_user_model()
+
+ATOMICO = "atomico"
+PARCIAL = "parcial"
+
+# status de itens válidos que não foram gravados porque o lote foi abortado
+NAO_APLICADO = 424
+
+
+class _Agenda:
+    """Intervalos ocupados por (sala, data), mantidos ordenados para bisect."""
+
+    def __init__(self, ocupados):
+        self.intervalos = defaultdict(list)
+        for sala_id, data, inicio, fim in ocupados:
+            self.intervalos[(sala_id, data)].append((inicio, fim))
+        for lista in self.intervalos.values():
+            lista.sort()
+
+    def livre(self, sala_id, data, inicio, fim):
+        lista = self.intervalos.get((sala_id, data), [])
+        pos = bisect_left(lista, (inicio, fim))
+        if pos > 0 and lista[pos - 1][1] > inicio:
+            return False
+        return pos == len(lista) or lista[pos][0] >= fim
+
+    def ocupar(self, sala_id, data, inicio, fim):
+        lista = self.intervalos[(sala_id, data)]
+        lista.insert(bisect_left(lista, (inicio, fim)), (inicio, fim))
+
+
+def _carregar_agenda(alvos, ignorar_ids):
+    """Reservas e ocorrências de séries existentes nas (sala, data) envolvidas.
+
+    Uma consulta para cada tabela, independente do tamanho do lote.
+    """
+    if not alvos:
+        return _Agenda([])
+    salas = {sala_id for sala_id, _ in alvos}
+    datas = {data for _, data in alvos}
+    existentes = (
+        Reserva.objects.filter(sala_id__in=salas, data__in=datas)
+        .exclude(pk__in=ignorar_ids)
+        .values_list("sala_id", "data", "hora_inicio", "hora_fim")
+    )
+    ocupados = [r for r in existentes if (r[0], r[1]) in alvos]
+
+    series = Recorrencia.objects.filter(
+        sala_id__in=salas, data_inicio__lte=max(datas), data_fim__gte=min(datas)
+    )
+    for serie in series:
+        for data in datas:
+            if (serie.sala_id, data) in alvos and ocorre_em(serie, data):
+                ocupados.append(
+                    (serie.sala_id, data, serie.hora_inicio, serie.hora_fim)
+                )
+    return _Agenda(ocupados)
+
+
+def _validar(itens, partial):
+    validos, resultados, contexto = {}, {}, {}
+    for indice, item in enumerate(itens):
+        serializer = ReservaLoteItemSerializer(
+            data=item, partial=partial, context=contexto
+        )
+        if serializer.is_valid():
+            validos[indice] = serializer.validated_data
+        else:
+            resultados[indice] = {"status": 400, "erros": serializer.errors}
+    return validos, resultados
+
+
+def _resolver(validos, resultados):
+    """Valida as FKs de todos os itens com um ``in_bulk`` por modelo."""
+    salas = Sala.objects.in_bulk({d["sala_id"] for d in validos.values()})
+    usuarios = User.objects.in_bulk({d["usuario_id"] for d in validos.values()})
+    for indice, dados in list(validos.items()):
+        erros = {}
+        if dados["sala_id"] not in salas:
+            erros["sala_id"] = ["Sala inexistente."]
+        if dados["usuario_id"] not in usuarios:
+            erros["usuario_id"] = ["Usuário inexistente."]
+        if erros:
+            resultados[indice] = {"status": 400, "erros": erros}
+            del validos[indice]
+    return salas
+
+
+def _verificar_conflitos(validos, resultados, ignorar_ids):
+    alvos = {(d["sala_id"], d["data"]) for d in validos.values()}
+    agenda = _carregar_agenda(alvos, ignorar_ids)
+    for indice in sorted(validos):
+        d = validos[indice]
+        chave = (d["sala_id"], d["data"], d["hora_inicio"], d["hora_fim"])
+        if agenda.livre(*chave):
+            agenda.ocupar(*chave)
+        else:
+            resultados[indice] = {
+                "status": 409,
+                "erros": {"detail": "A sala já está reservada neste horário."},
+            }
+            del validos[indice]
+
+
+def _travar_salas(sala_ids):
+    # ordem fixa evita deadlock entre lotes concorrentes (no-op no SQLite)
+    list(Sala.objects.select_for_update().filter(pk__in=sala_ids).order_by("pk"))
+
+
+def _finalizar(total, resultados, modo, status_ok):
+    falhou = any(r["status"] >= 400 for r in resultados.values())
+    if modo == ATOMICO and falhou:
+        for indice in range(total):
+            resultados.setdefault(indice, {"status": NAO_APLICADO})
+    lista = [{"indice": i, **resultados[i]} for i in range(total)]
+    if modo == ATOMICO and falhou:
+        codigos = {r["status"] for r in lista}
+        return lista, next(c for c in (409, 400, 404) if c in codigos)
+    return lista, status_ok
+
+
+def criar(itens, modo):
+    validos, resultados = _validar(itens, partial=False)
+    for indice, dados in list(validos.items()):
+        # o id é gerado pelo banco; aceitar o do cliente adiantaria a sequência
+        if "id" in dados:
+            erros = {"id": ["Não permitido na criação."]}
+            resultados[indice] = {"status": 400, "erros": erros}
+            del validos[indice]
+    with transaction.atomic():
+        _resolver(validos, resultados)
+        _travar_salas({d["sala_id"] for d in validos.values()})
+        _verificar_conflitos(validos, resultados, ignorar_ids=())
+        if modo == ATOMICO and resultados:
+            validos = {}
+        novos = [Reserva(**validos[i]) for i in sorted(validos)]
+        try:
+            Reserva.objects.bulk_create(novos)
+        except IntegrityError:
+            # constraint de exclusão do Postgres: corrida com outra transação
+            transaction.set_rollback(True)
+            return _abortar_por_corrida(len(itens))
+        # bulk_create não dispara signals: o rollup é atualizado aqui
+        ocupacao.atualizar({(r.sala_id, r.data) for r in novos})
+    for indice, reserva in zip(sorted(validos), novos):
+        resultados[indice] = {"status": 201, "id": reserva.pk}
+    return _finalizar(len(itens), resultados, modo, 201)
+
+
+def atualizar(itens, modo):
+    validos, resultados = _validar(itens, partial=True)
+    vistos = set()
+    for indice, dados in sorted(validos.items()):
+        if "id" not in dados or dados["id"] in vistos:
+            erro = "Obrigatório." if "id" not in dados else "Repetido no lote."
+            resultados[indice] = {"status": 400, "erros": {"id": [erro]}}
+            del validos[indice]
+        else:
+            vistos.add(dados["id"])
+
+    with transaction.atomic():
+        instancias = Reserva.objects.in_bulk({d["id"] for d in validos.values()})
+        for indice, dados in list(validos.items()):
+            instancia = instancias.get(dados["id"])
+            if instancia is None:
+                resultados[indice] = {"status": 404}
+                del validos[indice]
+                continue
+            # completa o item com os valores atuais da reserva
+            for campo in ("sala_id", "usuario_id", "data", "hora_inicio", "hora_fim"):
+                dados.setdefault(campo, getattr(instancia, campo))
+            if dados["hora_fim"] <= dados["hora_inicio"]:
+                resultados[indice] = {
+                    "status": 400,
+                    "erros": {"hora_fim": ["Deve ser posterior à hora de início."]},
+                }
+                del validos[indice]
+
+        _resolver(validos, resultados)
+        _travar_salas(
+            {d["sala_id"] for d in validos.values()}
+            | {instancias[d["id"]].sala_id for d in validos.values()}
+        )
+        # cada item libera o horário antigo da sua reserva; se ele falhar, o
+        # horário continua ocupado e quem o tomou no lote precisa ser revisto:
+        # repete sem os itens recusados até nenhum falhar
+        while True:
+            tentativa, falhas = dict(validos), {}
+            _verificar_conflitos(
+                tentativa, falhas, ignorar_ids={d["id"] for d in validos.values()}
+            )
+            if not falhas:
+                break
+            for indice, falha in falhas.items():
+                resultados[indice] = falha
+                del validos[indice]
+        if modo == ATOMICO and resultados:
+            validos = {}
+
+        # bulk_update não aplica auto_now: o delta-sync depende de atualizada_em
+        agora = timezone.now()
+        alterados = []
+        estados = set()
+        for indice in sorted(validos):
+            dados = validos[indice]
+            instancia = instancias[dados["id"]]
+            estados.add((instancia.sala_id, instancia.data))
+            for campo, valor in dados.items():
+                setattr(instancia, campo, valor)
+            instancia.atualizada_em = agora
+            alterados.append(instancia)
+            estados.add((instancia.sala_id, instancia.data))
+        try:
+            Reserva.objects.bulk_update(
+                alterados,
+                [
+                    "sala_id",
+                    "usuario_id",
+                    "data",
+                    "hora_inicio",
+                    "hora_fim",
+                    "atualizada_em",
+                ],
+            )
+        except IntegrityError:
+            transaction.set_rollback(True)
+            return _abortar_por_corrida(len(itens))
+        ocupacao.atualizar(estados)
+    for indice in validos:
+        resultados[indice] = {"status": 200, "id": validos[indice]["id"]}
+    return _finalizar(len(itens), resultados, modo, 200)
+
+
+def remover(ids, modo):
+    resultados = {}
+    with transaction.atomic():
+        estados = {
+            pk: (sala_id, data)
+            for pk, sala_id, data in Reserva.objects.filter(pk__in=ids).values_list(
+                "pk", "sala_id", "data"
+            )
+        }
+        existentes = set(estados)
+        for indice, pk in enumerate(ids):
+            if pk not in existentes:
+                resultados[indice] = {"status": 404}
+        if modo == PARCIAL or not resultados:
+            Reserva.objects.filter(pk__in=existentes).remover()
+            ocupacao.atualizar(set(estados.values()))
+            for indice, pk in enumerate(ids):
+                resultados.setdefault(indice, {"status": 204, "id": pk})
+    return _finalizar(len(ids), resultados, modo, 200)
+
+
+def _abortar_por_corrida(total):
+    detalhe = {"detail": "Conflito com reserva concorrente; lote não aplicado."}
+    return [{"indice": i, "status": 409, "erros": detalhe} for i in range(total)], 409
@@ -0,0 +1,45 @@
+import time
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import IntegrityError
+from django.utils.dateparse import parse_date
+
+from api import arquivo
+
+
+class Command(BaseCommand):
+    help = "Move reservas anteriores a uma data para a tabela de arquivo, em lotes"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--antes", required=True, help="AAAA-MM-DD (exclusivo)")
+        parser.add_argument("--lote", type=int, default=arquivo.LOTE)
+
+    def handle(self, *args, **options):
+        antes = parse_date(options["antes"])
+        if antes is None:
+            raise CommandError(f"--antes inválida: {options['antes']}")
+        if antes > date.today():
+            # o arquivo não participa da checagem de conflitos
+            raise CommandError("--antes não pode ser uma data futura")
+        if options["lote"] < 1:
+            raise CommandError("--lote deve ser maior que zero")
+
+        inicio = time.perf_counter()
+        arquivadas = descartadas = 0
+        try:
+            for movidas, tombstones in arquivo.arquivar(antes, options["lote"]):
+                arquivadas += movidas
+                descartadas += tombstones
+                self.stdout.write(f"{arquivadas} reservas arquivadas...")
+        except IntegrityError as exc:
+            raise CommandError(
+                f"Id já existente no arquivo; lote desfeito após {arquivadas} "
+                f"reservas arquivadas: {exc}"
+            )
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{arquivadas} reservas arquivadas e {descartadas} removidas "
+                f"descartadas em {time.perf_counter() - inicio:.1f}s"
+            )
+        )
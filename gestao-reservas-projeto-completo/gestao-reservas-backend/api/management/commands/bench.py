@@ -0,0 +1,135 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.test.runner import DiscoverRunner
+from django.test.utils import setup_test_environment, teardown_test_environment
+
+from api.bench.casos import CASOS
+from api.bench.dados import popular
+from api.bench.executor import comparar, executar
+from api.models import Sala
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark da API: popula salas/reservas numa base de teste e mede "
+        "p50/p95/p99, vazão e consultas por endpoint"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--salas", type=int, default=20)
+        parser.add_argument("--reservas", type=int, default=10000)
+        parser.add_argument("--iteracoes", type=int, default=200)
+        parser.add_argument("--aquecimento", type=int, default=10)
+        parser.add_argument(
+            "--casos",
+            nargs="+",
+            choices=sorted(CASOS),
+            default=sorted(CASOS),
+            metavar="CASO",
+            help=f"Casos a executar (padrão: todos): {', '.join(sorted(CASOS))}",
+        )
+        parser.add_argument("--saida", help="Grava o resultado em JSON")
+        parser.add_argument(
+            "--comparar", help="JSON de uma execução anterior para comparação"
+        )
+        parser.add_argument(
+            "--banco-atual",
+            action="store_true",
+            help="Usa o banco configurado (em transação desfeita ao final) "
+            "em vez de criar uma base de teste",
+        )
+        parser.add_argument(
+            "--url",
+            help="Mede um servidor já em execução (ex.: http://127.0.0.1:8000) "
+            "por HTTP; a massa é gravada no banco configurado e removida ao final",
+        )
+        parser.add_argument(
+            "--concorrencia",
+            type=int,
+            nargs="+",
+            default=[1],
+            help="Requisições simultâneas (somente com --url); vários valores "
+            "medem cada caso em cada nível",
+        )
+
+    def handle(self, *args, **options):
+        anterior = None
+        if options["comparar"]:
+            try:
+                with open(options["comparar"], encoding="utf-8") as arquivo:
+                    anterior = json.load(arquivo)
+            except (OSError, ValueError) as exc:
+                raise CommandError(f"Não foi possível ler {options['comparar']}: {exc}")
+
+        if options["url"]:
+            resultado = self._remoto(options)
+        else:
+            if options["concorrencia"] != [1]:
+                raise CommandError("--concorrencia exige --url")
+            resultado = self._local(options)
+
+        if anterior is not None:
+            resultado["comparacao"] = comparar(resultado, anterior)
+        self._relatorio(resultado)
+        if options["saida"]:
+            with open(options["saida"], "w", encoding="utf-8") as arquivo:
+                json.dump(resultado, arquivo, indent=2)
+            self.stdout.write(
+                self.style.SUCCESS(f"Resultado salvo em {options['saida']}")
+            )
+
+    def _local(self, options):
+        setup_test_environment()
+        runner = DiscoverRunner(verbosity=0, interactive=False)
+        bancos = None if options["banco_atual"] else runner.setup_databases()
+        try:
+            with transaction.atomic():
+                massa = popular(options["reservas"], options["salas"])
+                resultado = executar(
+                    massa,
+                    options["casos"],
+                    options["iteracoes"],
+                    options["aquecimento"],
+                )
+                transaction.set_rollback(True)
+        finally:
+            if bancos is not None:
+                runner.teardown_databases(bancos)
+            teardown_test_environment()
+        return resultado
+
+    def _remoto(self, options):
+        # o servidor é outro processo: a massa precisa estar commitada
+        massa = popular(options["reservas"], options["salas"])
+        try:
+            return executar(
+                massa,
+                options["casos"],
+                options["iteracoes"],
+                options["aquecimento"],
+                url=options["url"],
+                concorrencia=[max(1, n) for n in options["concorrencia"]],
+            )
+        finally:
+            Sala.objects.filter(pk__in=[s.pk for s in massa.salas]).delete()
+            massa.usuario.delete()
+
+    def _relatorio(self, resultado):
+        self.stdout.write(
+            f"{'caso':<24}{'req/s':>9}{'p50 ms':>9}{'p95 ms':>9}"
+            f"{'p99 ms':>9}{'queries':>9}{'erros':>7}"
+        )
+        for nome, r in resultado["casos"].items():
+            consultas = r["consultas_por_req"]
+            consultas = "-" if consultas is None else f"{consultas:.1f}"
+            self.stdout.write(
+                f"{nome:<24}{r['vazao_rps']:>9.1f}{r['p50_ms']:>9.2f}"
+                f"{r['p95_ms']:>9.2f}{r['p99_ms']:>9.2f}"
+                f"{consultas:>9}{r['erros']:>7}"
+            )
+        for nome, d in resultado.get("comparacao", {}).items():
+            self.stdout.write(
+                f"{nome:<24}p95 {d['p95_pct']:+.1f}%  vazão {d['vazao_pct']:+.1f}%"
+            )
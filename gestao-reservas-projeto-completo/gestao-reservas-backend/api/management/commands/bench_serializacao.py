@@ -0,0 +1,23 @@
+import json
+
+from django.core.management.base import BaseCommand
+from api.bench.serializacao import comparar
+
+
+class Command(BaseCommand):
+    help = "Compara o ReservaSerializer com o caminho rápido de leitura"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--linhas", type=int, default=5000)
+        parser.add_argument("--repeticoes", type=int, default=3)
+
+    def handle(self, *args, **options):
+        resultado = comparar(options["linhas"], options["repeticoes"])
+        self.stdout.write(json.dumps(resultado, indent=2))
+        estilo = self.style.SUCCESS if resultado["identico"] else self.style.ERROR
+        self.stdout.write(
+            estilo(
+                f"{resultado['ganho']:.1f}x mais rápido; "
+                f"saída idêntica: {resultado['identico']}"
+            )
+        )
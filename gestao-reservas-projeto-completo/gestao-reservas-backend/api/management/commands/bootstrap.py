@@ -0,0 +1,115 @@
+import fcntl
+import time
+import zlib
+from contextlib import contextmanager
+from pathlib import Path
+
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import IntegrityError, connections, transaction
+from django.db.migrations.executor import MigrationExecutor
+
+import create_superuser
+
+# chave do advisory lock das migrações (igual em todas as réplicas)
+CHAVE_LOCK = zlib.crc32(b"gestao-reservas:migrate")
+
+
+def pendentes(conexao):
+    """Migrações ainda não aplicadas no banco da conexão."""
+    executor = MigrationExecutor(conexao)
+    return executor.migration_plan(executor.loader.graph.leaf_nodes())
+
+
+@contextmanager
+def trava_migracoes(conexao):
+    """Serializa as migrações entre réplicas que sobem ao mesmo tempo.
+
+    Postgres: advisory lock da sessão. SQLite: ``flock`` num arquivo ao lado
+    do banco (as réplicas estão no mesmo host).
+    """
+    if conexao.vendor == "postgresql":
+        with conexao.cursor() as cursor:
+            cursor.execute("SELECT pg_advisory_lock(%s)", [CHAVE_LOCK])
+        try:
+            yield
+        finally:
+            with conexao.cursor() as cursor:
+                cursor.execute("SELECT pg_advisory_unlock(%s)", [CHAVE_LOCK])
+    elif conexao.vendor == "sqlite" and not conexao.is_in_memory_db():
+        caminho = Path(f"{conexao.settings_dict['NAME']}.migrate.lock")
+        with open(caminho, "w") as arquivo:
+            fcntl.flock(arquivo, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(arquivo, fcntl.LOCK_UN)
+    else:
+        yield
+
+
+class Command(BaseCommand):
+    help = (
+        "Prepara o banco na subida do container num único processo: aplica "
+        "migrações pendentes (com lock entre réplicas) e garante o superuser"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--collectstatic",
+            action="store_true",
+            help="Também coleta os arquivos estáticos (modo de produção)",
+        )
+        parser.add_argument("--database", default="default")
+
+    def handle(self, *args, **options):
+        conexao = connections[options["database"]]
+        self.fases = []
+        inicio = time.perf_counter()
+
+        with self.fase("verificar migrações"):
+            plano = pendentes(conexao)
+        if plano:
+            with self.fase("lock + migrar"), trava_migracoes(conexao):
+                # outra réplica pode ter aplicado enquanto esperávamos o lock
+                plano = pendentes(conexao)
+                if plano:
+                    self.stdout.write(f"Aplicando {len(plano)} migrações...")
+                    call_command(
+                        "migrate",
+                        database=options["database"],
+                        interactive=False,
+                        verbosity=0,
+                    )
+                else:
+                    self.stdout.write("Migrações aplicadas por outra réplica")
+        else:
+            self.stdout.write("Nenhuma migração pendente")
+
+        with self.fase("superuser"):
+            try:
+                with transaction.atomic(using=options["database"]):
+                    create_superuser.run()
+            except IntegrityError:
+                # outra réplica criou o mesmo usuário entre a busca e o INSERT
+                self.stdout.write("Superuser criado por outra réplica")
+
+        if options["collectstatic"]:
+            with self.fase("estáticos"):
+                call_command("collectstatic", interactive=False, verbosity=0)
+
+        for nome, duracao in self.fases:
+            self.stdout.write(f"  {nome}: {duracao:.2f}s")
+        self.stdout.write(
+            self.style.SUCCESS(f"Bootstrap em {time.perf_counter() - inicio:.2f}s")
+        )
+
+    @contextmanager
+    def fase(self, nome):
+        registro = [nome, 0.0]
+        self.fases.append(registro)
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            registro[1] = time.perf_counter() - inicio
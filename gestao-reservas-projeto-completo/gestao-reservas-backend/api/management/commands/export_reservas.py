@@ -0,0 +1,36 @@
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.exceptions import ValidationError
+from api.exportacao import CHUNK_SIZE, FORMATOS, gerar
+from api.filters import filtrar_com_arquivo
+from api.models import Reserva
+
+
+class Command(BaseCommand):
+    help = "Exporta reservas em NDJSON ou CSV (streaming, memória constante)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--formato", choices=sorted(FORMATOS), default="ndjson")
+        parser.add_argument("--data-inicio")
+        parser.add_argument("--data-fim")
+        parser.add_argument("--sala", type=int)
+        parser.add_argument("--saida", help="Arquivo de saída (padrão: stdout)")
+        parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        params = {
+            chave: options[chave]
+            for chave in ("data_inicio", "data_fim", "sala")
+            if options[chave] is not None
+        }
+        try:
+            consultas = filtrar_com_arquivo(Reserva.objects.all(), params)
+        except ValidationError as exc:
+            raise CommandError(exc.detail)
+
+        trechos = gerar(options["formato"], consultas, options["chunk_size"])
+        if not options["saida"]:
+            for trecho in trechos:
+                self.stdout.write(trecho, ending="")
+            return
+        with open(options["saida"], "w", encoding="utf-8", newline="") as saida:
+            saida.writelines(trechos)
@@ -1,14 +1,48 @@
-from django.core.management.base import BaseCommand
+import time as relogio
+
+from django.core.management.base import BaseCommand, CommandError
 from django.contrib.auth import get_user_model
+from api import geracao, ocupacao
 from api.models import Sala, Reserva
-from datetime import date, time
+from datetime import date, time, timedelta
 
 User = get_user_model()
 
+
 class Command(BaseCommand):
-    help = "Popula o banco com dados iniciais"
+    help = "Popula o banco com dados iniciais (ou massa sintética com --reservas)"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--reservas",
+            type=int,
+            default=0,
+            help="Gera N reservas sintéticas sem sobreposição (modo carga)",
+        )
+        parser.add_argument("--salas", type=int, default=50)
+        parser.add_argument("--usuarios", type=int, default=500)
+        parser.add_argument("--dias", type=int, default=365)
+        parser.add_argument(
+            "--data-inicial",
+            type=date.fromisoformat,
+            default=None,
+            help="Primeiro dia da massa (AAAA-MM-DD, padrão: hoje)",
+        )
+        parser.add_argument("--semente", type=int, default=42)
+        parser.add_argument(
+            "--lote", type=int, default=20000, help="Reservas por transação"
+        )
+        parser.add_argument(
+            "--processos",
+            type=int,
+            default=1,
+            help="Processos em paralelo, cada um com uma faixa de datas",
+        )
+
+    def handle(self, *args, **options):
+        if options["reservas"]:
+            return self._carga(options)
 
-    def handle(self, *args, **kwargs):
         if not User.objects.filter(username="admin").exists():
             User.objects.create_superuser("admin", "admin@example.com", "123")
             self.stdout.write(self.style.SUCCESS("Usuário admin criado"))
@@ -32,3 +66,57 @@ class Command(BaseCommand):
             hora_fim=time(10, 0),
         )
         self.stdout.write(self.style.SUCCESS("Reserva de exemplo criada"))
+
+    def _carga(self, options):
+        for opcao in ("salas", "usuarios", "dias", "lote", "processos"):
+            if options[opcao] < 1:
+                raise CommandError(f"--{opcao} deve ser maior que zero")
+        semente = options["semente"]
+        inicio = relogio.perf_counter()
+
+        salas = geracao.criar_salas(options["salas"], semente)
+        usuarios = geracao.criar_usuarios(options["usuarios"], semente)
+        self.stdout.write(
+            f"{len(salas)} salas e {len(usuarios)} usuários em "
+            f"{relogio.perf_counter() - inicio:.1f}s"
+        )
+
+        data_inicial = options["data_inicial"] or date.today()
+        inicio_reservas = relogio.perf_counter()
+        criadas = geracao.gerar_reservas(
+            options["reservas"],
+            data_inicial,
+            options["dias"],
+            salas,
+            usuarios,
+            semente,
+            lote=options["lote"],
+            processos=options["processos"],
+        )
+        duracao = relogio.perf_counter() - inicio_reservas
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{criadas} reservas em {duracao:.1f}s "
+                f"({criadas / duracao:,.0f} linhas/s)"
+            )
+        )
+
+        # bulk_create não dispara os signals: o rollup é refeito no intervalo
+        inicio_rollup = relogio.perf_counter()
+        linhas = ocupacao.reconstruir(
+            data_inicial,
+            data_inicial + timedelta(days=options["dias"] - 1),
+            salas,
+            lote=options["lote"],
+        )
+        self.stdout.write(
+            f"{linhas} linhas de ocupação em "
+            f"{relogio.perf_counter() - inicio_rollup:.1f}s"
+        )
+        if criadas < options["reservas"]:
+            self.stdout.write(
+                self.style.WARNING(
+                    f"Capacidade insuficiente: {options['reservas'] - criadas} "
+                    "reservas não couberam; aumente --salas ou --dias"
+                )
+            )
@@ -0,0 +1,241 @@
+"""Instrumentação opcional por requisição (``API_METRICS=1``).
+
+O ``MetricsMiddleware`` mede, para cada view, o número de consultas SQL, o
+tempo gasto no banco, o tempo de serialização e a latência total. Os valores
+da requisição vão no cabeçalho ``Server-Timing`` e são agregados em memória
+(por processo) para ``GET /api/_metrics`` no formato texto do Prometheus.
+
+A serialização é o tempo de renderização da resposta mais os trechos
+marcados explicitamente com ``serializacao()`` dentro das views.
+"""
+
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.http import Http404, HttpResponse
+
+CAMINHO = "/api/_metrics"
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+_atual = ContextVar("metricas", default=None)
+
+
+class _Medicao:
+    __slots__ = ("inicio", "consultas", "db", "serializacao")
+
+    def __init__(self):
+        self.inicio = time.perf_counter()
+        self.consultas = 0
+        self.db = 0.0
+        self.serializacao = 0.0
+
+
+def _medir_consulta(execute, sql, params, many, context):
+    # a medição vem do contextvar, que acompanha a requisição também nas
+    # threads do sync_to_async usadas pelo ORM assíncrono
+    medicao = _atual.get()
+    if medicao is None:
+        return execute(sql, params, many, context)
+    inicio = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        medicao.db += time.perf_counter() - inicio
+        medicao.consultas += 1
+
+
+def _instrumentar(sender=None, connection=None, **kwargs):
+    if _medir_consulta not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_medir_consulta)
+
+
+@contextmanager
+def serializacao():
+    """Conta o bloco como tempo de serialização da requisição atual."""
+    medicao = _atual.get()
+    inicio = time.perf_counter()
+    try:
+        yield
+    finally:
+        if medicao is not None:
+            medicao.serializacao += time.perf_counter() - inicio
+
+
+class _Registro:
+    """Agregados por (view, método, status), protegidos por um lock."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.limpar()
+
+    def limpar(self):
+        self.requisicoes = defaultdict(int)
+        self.buckets = defaultdict(lambda: [0] * len(BUCKETS))
+        self.latencia = defaultdict(float)
+        self.contagem = defaultdict(int)
+        self.consultas = defaultdict(int)
+        self.db = defaultdict(float)
+        self.serializacao = defaultdict(float)
+
+    def registrar(self, view, metodo, status, medicao, total):
+        with self._lock:
+            self.requisicoes[(view, metodo, str(status))] += 1
+            buckets = self.buckets[view]
+            for i, limite in enumerate(BUCKETS):
+                if total <= limite:
+                    buckets[i] += 1
+            self.latencia[view] += total
+            self.contagem[view] += 1
+            self.consultas[view] += medicao.consultas
+            self.db[view] += medicao.db
+            self.serializacao[view] += medicao.serializacao
+
+    def prometheus(self):
+        with self._lock:
+            linhas = []
+            _metrica(
+                linhas,
+                "api_requests_total",
+                "counter",
+                "Requisições por view, método e status.",
+                (
+                    ({"view": v, "method": m, "status": s}, n)
+                    for (v, m, s), n in sorted(self.requisicoes.items())
+                ),
+            )
+            linhas += _histograma(
+                "api_request_duration_seconds",
+                "Latência total da requisição.",
+                self.buckets,
+                self.latencia,
+                self.contagem,
+            )
+            for nome, ajuda, valores in (
+                ("api_db_queries_total", "Consultas SQL executadas.", self.consultas),
+                ("api_db_duration_seconds_total", "Tempo no banco.", self.db),
+                (
+                    "api_serialization_seconds_total",
+                    "Tempo de serialização/renderização.",
+                    self.serializacao,
+                ),
+            ):
+                _metrica(
+                    linhas,
+                    nome,
+                    "counter",
+                    ajuda,
+                    (({"view": v}, n) for v, n in sorted(valores.items())),
+                )
+            return "\n".join(linhas) + "\n"
+
+
+def _rotulos(rotulos):
+    pares = ",".join(
+        '{}="{}"'.format(chave, str(valor).replace("\\", "\\\\").replace('"', '\\"'))
+        for chave, valor in rotulos.items()
+    )
+    return "{" + pares + "}"
+
+
+def _metrica(linhas, nome, tipo, ajuda, amostras):
+    linhas.append(f"# HELP {nome} {ajuda}")
+    linhas.append(f"# TYPE {nome} {tipo}")
+    for rotulos, valor in amostras:
+        linhas.append(f"{nome}{_rotulos(rotulos)} {valor}")
+
+
+def _histograma(nome, ajuda, buckets, soma, contagem):
+    linhas = [f"# HELP {nome} {ajuda}", f"# TYPE {nome} histogram"]
+    for view in sorted(contagem):
+        for limite, n in zip(BUCKETS, buckets[view]):
+            rotulos = _rotulos({"view": view, "le": limite})
+            linhas.append(f"{nome}_bucket{rotulos} {n}")
+        rotulos = _rotulos({"view": view, "le": "+Inf"})
+        linhas.append(f"{nome}_bucket{rotulos} {contagem[view]}")
+        linhas.append(f"{nome}_sum{_rotulos({'view': view})} {soma[view]}")
+        linhas.append(f"{nome}_count{_rotulos({'view': view})} {contagem[view]}")
+    return linhas
+
+
+registro = _Registro()
+
+
+class MetricsMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self._async = iscoroutinefunction(get_response)
+        if self._async:
+            markcoroutinefunction(self)
+        # conexões novas (de qualquer thread) e as já abertas nesta thread
+        connection_created.connect(_instrumentar, dispatch_uid="api.metrics")
+        for conexao in connections.all():
+            _instrumentar(connection=conexao)
+
+    def __call__(self, request):
+        if self._async:
+            return self._acall(request)
+        if request.path_info.rstrip("/") == CAMINHO:
+            return self.get_response(request)
+        medicao = _Medicao()
+        contexto = _atual.set(medicao)
+        try:
+            resposta = self.get_response(request)
+        finally:
+            _atual.reset(contexto)
+        return self._registrar(request, resposta, medicao)
+
+    async def _acall(self, request):
+        if request.path_info.rstrip("/") == CAMINHO:
+            return await self.get_response(request)
+        medicao = _Medicao()
+        contexto = _atual.set(medicao)
+        try:
+            resposta = await self.get_response(request)
+        finally:
+            _atual.reset(contexto)
+        return self._registrar(request, resposta, medicao)
+
+    def _registrar(self, request, resposta, medicao):
+        total = time.perf_counter() - medicao.inicio
+        match = getattr(request, "resolver_match", None)
+        view = (match.view_name or match._func_path) if match else "nao_resolvida"
+        registro.registrar(view, request.method, resposta.status_code, medicao, total)
+        resposta["Server-Timing"] = ", ".join(
+            (
+                f'db;dur={medicao.db * 1000:.2f};desc="{medicao.consultas} consultas"',
+                f"ser;dur={medicao.serializacao * 1000:.2f}",
+                f"total;dur={total * 1000:.2f}",
+            )
+        )
+        return resposta
+
+    def process_template_response(self, request, response):
+        # respostas do DRF são renderizadas depois das views: mede o render
+        medicao = _atual.get()
+        if medicao is not None:
+            inicio = time.perf_counter()
+
+            def fim(resposta):
+                medicao.serializacao += time.perf_counter() - inicio
+
+            response.add_post_render_callback(fim)
+        return response
+
+
+def metrics_view(request):
+    if not settings.API_METRICS:
+        raise Http404
+    return HttpResponse(
+        registro.prometheus(), content_type="text/plain; version=0.0.4; charset=utf-8"
+    )
+
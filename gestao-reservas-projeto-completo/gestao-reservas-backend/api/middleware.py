@@ -0,0 +1,38 @@
+"""Middlewares do projeto compatíveis com ASGI."""
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from whitenoise.middleware import WhiteNoiseMiddleware as BaseWhiteNoiseMiddleware
+
+
+class WhiteNoiseMiddleware(BaseWhiteNoiseMiddleware):
+    """WhiteNoise que não força a cadeia assíncrona para uma thread.
+
+    O middleware original só é síncrono: sob ASGI o Django passaria cada
+    requisição por ``sync_to_async``, serializando as views assíncronas. A
+    busca do arquivo é em memória, então o mesmo código serve os dois modos.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response=None, **kwargs):
+        super().__init__(get_response, **kwargs)
+        self._async = iscoroutinefunction(get_response)
+        if self._async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self._async:
+            return self._acall(request)
+        return super().__call__(request)
+
+    def _arquivo(self, request):
+        if self.autorefresh:
+            return self.find_file(request.path_info)
+        return self.files.get(request.path_info)
+
+    async def _acall(self, request):
+        static_file = self._arquivo(request)
+        if static_file is not None:
+            return self.serve(static_file, request)
+        return await self.get_response(request)
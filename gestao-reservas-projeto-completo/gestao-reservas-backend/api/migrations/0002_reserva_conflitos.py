@@ -0,0 +1,51 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:23
+
+from django.db import migrations, models
+
+
+def criar_exclusao_postgres(apps, schema_editor):
+    # garantia no banco contra reservas sobrepostas na mesma sala;
+    # no SQLite a serialização fica por conta das transações IMMEDIATE
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute("CREATE EXTENSION IF NOT EXISTS btree_gist")
+    schema_editor.execute(
+        "ALTER TABLE api_reserva ADD CONSTRAINT reserva_sem_sobreposicao "
+        "EXCLUDE USING gist ("
+        "sala_id WITH =, "
+        "tsrange(data + hora_inicio, data + hora_fim) WITH &&"
+        ")"
+    )
+
+
+def remover_exclusao_postgres(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute(
+        "ALTER TABLE api_reserva DROP CONSTRAINT IF EXISTS reserva_sem_sobreposicao"
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="reserva",
+            index=models.Index(
+                fields=["sala", "data", "hora_inicio", "hora_fim"],
+                name="reserva_sala_horario_idx",
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="reserva",
+            constraint=models.CheckConstraint(
+                condition=models.Q(("hora_fim__gt", models.F("hora_inicio"))),
+                name="reserva_horario_valido",
+            ),
+        ),
+        migrations.RunPython(criar_exclusao_postgres, remover_exclusao_postgres),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0002_reserva_conflitos"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="reserva",
+            index=models.Index(
+                fields=["data", "hora_inicio", "id"], name="reserva_ordem_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="reserva",
+            index=models.Index(
+                fields=["usuario", "data", "hora_inicio"], name="reserva_usuario_idx"
+            ),
+        ),
+    ]
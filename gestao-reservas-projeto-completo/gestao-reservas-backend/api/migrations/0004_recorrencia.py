@@ -0,0 +1,74 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:29
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0003_reserva_paginacao_indices"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="Recorrencia",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "frequencia",
+                    models.CharField(
+                        choices=[("diaria", "Diária"), ("semanal", "Semanal")],
+                        max_length=10,
+                    ),
+                ),
+                ("intervalo", models.PositiveSmallIntegerField(default=1)),
+                ("dias_semana", models.JSONField(blank=True, default=list)),
+                ("data_inicio", models.DateField()),
+                ("data_fim", models.DateField()),
+                ("hora_inicio", models.TimeField()),
+                ("hora_fim", models.TimeField()),
+                ("excecoes", models.JSONField(blank=True, default=list)),
+                (
+                    "sala",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE, to="api.sala"
+                    ),
+                ),
+                (
+                    "usuario",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "indexes": [
+                    models.Index(
+                        fields=["sala", "data_inicio", "data_fim"],
+                        name="recorrencia_sala_periodo_idx",
+                    )
+                ],
+                "constraints": [
+                    models.CheckConstraint(
+                        condition=models.Q(("hora_fim__gt", models.F("hora_inicio"))),
+                        name="recorrencia_horario_valido",
+                    ),
+                    models.CheckConstraint(
+                        condition=models.Q(("data_fim__gte", models.F("data_inicio"))),
+                        name="recorrencia_periodo_valido",
+                    ),
+                ],
+            },
+        ),
+    ]
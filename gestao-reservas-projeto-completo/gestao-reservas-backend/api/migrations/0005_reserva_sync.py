@@ -0,0 +1,52 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:32
+
+from django.db import migrations, models
+
+
+def _recriar_exclusao(schema_editor, condicao):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute(
+        "ALTER TABLE api_reserva DROP CONSTRAINT IF EXISTS reserva_sem_sobreposicao"
+    )
+    schema_editor.execute(
+        "ALTER TABLE api_reserva ADD CONSTRAINT reserva_sem_sobreposicao "
+        "EXCLUDE USING gist ("
+        "sala_id WITH =, "
+        "tsrange(data + hora_inicio, data + hora_fim) WITH &&"
+        f"){condicao}"
+    )
+
+
+def exclusao_ignora_removidas(apps, schema_editor):
+    # tombstones do delta-sync não ocupam mais o horário
+    _recriar_exclusao(schema_editor, " WHERE (removida_em IS NULL)")
+
+
+def exclusao_original(apps, schema_editor):
+    _recriar_exclusao(schema_editor, "")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0004_recorrencia"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="reserva",
+            name="atualizada_em",
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name="reserva",
+            name="removida_em",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name="reserva",
+            index=models.Index(fields=["atualizada_em", "id"], name="reserva_sync_idx"),
+        ),
+        migrations.RunPython(exclusao_ignora_removidas, exclusao_original),
+    ]
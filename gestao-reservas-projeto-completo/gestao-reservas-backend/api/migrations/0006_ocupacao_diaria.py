@@ -0,0 +1,49 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:57
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0005_reserva_sync"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="OcupacaoDiaria",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("data", models.DateField()),
+                ("reservas", models.PositiveIntegerField(default=0)),
+                ("minutos", models.PositiveIntegerField(default=0)),
+                ("minutos_por_hora", models.JSONField(default=list)),
+                ("atualizada_em", models.DateTimeField(auto_now=True)),
+                (
+                    "sala",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE, to="api.sala"
+                    ),
+                ),
+            ],
+            options={
+                "indexes": [
+                    models.Index(fields=["data", "sala"], name="ocupacao_data_idx")
+                ],
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("sala", "data"), name="ocupacao_sala_data_unica"
+                    )
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,51 @@
+# Generated by Django 5.2.18 on 2026-10-18 10:03
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0006_ocupacao_diaria"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ReservaArquivada",
+            fields=[
+                ("id", models.BigIntegerField(primary_key=True, serialize=False)),
+                ("data", models.DateField()),
+                ("hora_inicio", models.TimeField()),
+                ("hora_fim", models.TimeField()),
+                ("atualizada_em", models.DateTimeField()),
+                ("arquivada_em", models.DateTimeField(auto_now_add=True)),
+                (
+                    "sala",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE, to="api.sala"
+                    ),
+                ),
+                (
+                    "usuario",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "indexes": [
+                    models.Index(
+                        fields=["data", "hora_inicio", "id"], name="arquivo_ordem_idx"
+                    ),
+                    models.Index(fields=["sala", "data"], name="arquivo_sala_data_idx"),
+                    models.Index(
+                        fields=["usuario", "data", "hora_inicio"],
+                        name="arquivo_usuario_idx",
+                    ),
+                ],
+            },
+        ),
+    ]
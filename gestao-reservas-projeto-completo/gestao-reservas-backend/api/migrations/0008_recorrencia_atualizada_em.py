@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 10:46
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0007_reserva_arquivada"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="recorrencia",
+            name="atualizada_em",
+            field=models.DateTimeField(auto_now=True),
+        ),
+    ]
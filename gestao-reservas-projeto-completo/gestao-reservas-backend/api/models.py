@@ -1,5 +1,6 @@
 from django.db import models
 from django.contrib.auth.models import AbstractUser
+from django.utils import timezone
 
 class User(AbstractUser):
     nivel_acesso = models.CharField(max_length=20, default="user")
@@ -14,12 +15,195 @@ class Sala(models.Model):
     def __str__(self):
         return self.nome
 
+class ReservaQuerySet(models.QuerySet):
+    def conflitantes(self, sala, data, hora_inicio, hora_fim, excluir=None):
+        """Reservas da sala que se sobrepõem ao intervalo [hora_inicio, hora_fim)."""
+        qs = self.filter(
+            sala=sala,
+            data=data,
+            hora_inicio__lt=hora_fim,
+            hora_fim__gt=hora_inicio,
+        )
+        if excluir is not None:
+            qs = qs.exclude(pk=excluir)
+        return qs
+
+    def remover(self):
+        """Remoção lógica: mantém a linha como tombstone para o delta-sync."""
+        agora = timezone.now()
+        return self.update(removida_em=agora, atualizada_em=agora)
+
+class ReservaManager(models.Manager.from_queryset(ReservaQuerySet)):
+    """Somente reservas ativas; ``Reserva.todas`` inclui as removidas."""
+
+    def get_queryset(self):
+        return super().get_queryset().filter(removida_em__isnull=True)
+
 class Reserva(models.Model):
     sala = models.ForeignKey(Sala, on_delete=models.CASCADE)
     usuario = models.ForeignKey(User, on_delete=models.CASCADE)
     data = models.DateField()
     hora_inicio = models.TimeField()
     hora_fim = models.TimeField()
+    atualizada_em = models.DateTimeField(auto_now=True)
+    removida_em = models.DateTimeField(null=True, blank=True)
+
+    objects = ReservaManager()
+    todas = ReservaQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            # cobre a busca de conflitos: igualdade em sala/data + faixa de horário
+            models.Index(
+                fields=["sala", "data", "hora_inicio", "hora_fim"],
+                name="reserva_sala_horario_idx",
+            ),
+            # ordem da listagem paginada e filtros por período
+            models.Index(
+                fields=["data", "hora_inicio", "id"], name="reserva_ordem_idx"
+            ),
+            # filtros por usuário ("minhas reservas")
+            models.Index(
+                fields=["usuario", "data", "hora_inicio"], name="reserva_usuario_idx"
+            ),
+            # varredura incremental do delta-sync
+            models.Index(fields=["atualizada_em", "id"], name="reserva_sync_idx"),
+        ]
+        constraints = [
+            models.CheckConstraint(
+                condition=models.Q(hora_fim__gt=models.F("hora_inicio")),
+                name="reserva_horario_valido",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.usuario.username} - {self.sala.nome} ({self.data})"
+
+    def remover(self):
+        self.removida_em = timezone.now()
+        self.save(update_fields=["removida_em", "atualizada_em"])
+
+
+class RecorrenciaQuerySet(models.QuerySet):
+    def candidatas(self, sala, data_inicio, data_fim, hora_inicio, hora_fim):
+        """Séries da sala ativas no período com horário sobreposto.
+
+        Ainda é preciso confirmar com ``agenda.ocorre_em`` se há ocorrência
+        de fato nas datas de interesse.
+        """
+        return self.filter(
+            sala=sala,
+            data_inicio__lte=data_fim,
+            data_fim__gte=data_inicio,
+            hora_inicio__lt=hora_fim,
+            hora_fim__gt=hora_inicio,
+        )
+
+class Recorrencia(models.Model):
+    """Série de reservas (diária/semanal) armazenada como uma única linha.
+
+    As ocorrências são expandidas sob demanda por ``api.agenda.ocorrencias``.
+    """
+
+    DIARIA = "diaria"
+    SEMANAL = "semanal"
+    FREQUENCIAS = [(DIARIA, "Diária"), (SEMANAL, "Semanal")]
+
+    sala = models.ForeignKey(Sala, on_delete=models.CASCADE)
+    usuario = models.ForeignKey(User, on_delete=models.CASCADE)
+    frequencia = models.CharField(max_length=10, choices=FREQUENCIAS)
+    intervalo = models.PositiveSmallIntegerField(default=1)
+    # 0 = segunda ... 6 = domingo (usado apenas na frequência semanal)
+    dias_semana = models.JSONField(default=list, blank=True)
+    data_inicio = models.DateField()
+    data_fim = models.DateField()
+    hora_inicio = models.TimeField()
+    hora_fim = models.TimeField()
+    # datas ISO (AAAA-MM-DD) canceladas dentro da série
+    excecoes = models.JSONField(default=list, blank=True)
+    # entra no ETag dos feeds .ics (``api.calendario.validadores``)
+    atualizada_em = models.DateTimeField(auto_now=True)
+
+    objects = RecorrenciaQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["sala", "data_inicio", "data_fim"],
+                name="recorrencia_sala_periodo_idx",
+            ),
+        ]
+        constraints = [
+            models.CheckConstraint(
+                condition=models.Q(hora_fim__gt=models.F("hora_inicio")),
+                name="recorrencia_horario_valido",
+            ),
+            models.CheckConstraint(
+                condition=models.Q(data_fim__gte=models.F("data_inicio")),
+                name="recorrencia_periodo_valido",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.sala.nome} ({self.get_frequencia_display()})"
+
+
+class OcupacaoDiaria(models.Model):
+    """Rollup de ocupação de uma sala num dia (reservas + ocorrências de séries).
+
+    Mantido por ``api.ocupacao``; os relatórios leem apenas esta tabela.
+    """
+
+    sala = models.ForeignKey(Sala, on_delete=models.CASCADE)
+    data = models.DateField()
+    reservas = models.PositiveIntegerField(default=0)
+    minutos = models.PositiveIntegerField(default=0)
+    # minutos ocupados em cada hora do dia (24 posições), para horas de pico
+    minutos_por_hora = models.JSONField(default=list)
+    atualizada_em = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["sala", "data"], name="ocupacao_sala_data_unica"
+            ),
+        ]
+        indexes = [
+            # relatórios de todas as salas num período
+            models.Index(fields=["data", "sala"], name="ocupacao_data_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.sala_id} {self.data}: {self.minutos} min"
+
+
+class ReservaArquivada(models.Model):
+    """Reserva antiga movida para fora da tabela quente por ``arquivar_reservas``.
+
+    Mantém o ``id`` original; consultada apenas quando o período pedido
+    alcança datas arquivadas (``api.arquivo``).
+    """
+
+    id = models.BigIntegerField(primary_key=True)
+    sala = models.ForeignKey(Sala, on_delete=models.CASCADE)
+    usuario = models.ForeignKey(User, on_delete=models.CASCADE)
+    data = models.DateField()
+    hora_inicio = models.TimeField()
+    hora_fim = models.TimeField()
+    atualizada_em = models.DateTimeField()
+    arquivada_em = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            # mesma ordem da listagem paginada
+            models.Index(
+                fields=["data", "hora_inicio", "id"], name="arquivo_ordem_idx"
+            ),
+            models.Index(fields=["sala", "data"], name="arquivo_sala_data_idx"),
+            models.Index(
+                fields=["usuario", "data", "hora_inicio"], name="arquivo_usuario_idx"
+            ),
+        ]
 
     def __str__(self):
         return f"{self.usuario.username} - {self.sala.nome} ({self.data})"
@@ -0,0 +1,281 @@
+"""Rollup de ocupação por sala e dia, e o relatório de utilização.
+
+``OcupacaoDiaria`` guarda por (sala, data) as reservas, os minutos reservados
+e o perfil por hora, somando reservas avulsas e ocorrências de séries. As
+linhas são recalculadas pelos signals de ``Reserva``/``Recorrencia``, pelos
+caminhos em lote (que não disparam signals) e por completo com
+``python manage.py recalcular_ocupacao``. Reservas arquivadas continuam
+contando. O relatório agrega somente essas
+linhas, nunca a tabela de reservas.
+"""
+
+import heapq
+from collections import defaultdict
+from datetime import date, timedelta
+
+from django.db import transaction
+
+from . import arquivo
+from .agenda import expediente, ocorrencias
+from .models import OcupacaoDiaria, Recorrencia, Reserva, ReservaArquivada, Sala
+
+DIA = "dia"
+SEMANA = "semana"
+MES = "mes"
+AGRUPAMENTOS = (DIA, SEMANA, MES)
+HORAS_PICO = 3
+
+
+def _minutos(hora):
+    return hora.hour * 60 + hora.minute
+
+
+def _linha(sala_id, data, intervalos):
+    """``OcupacaoDiaria`` a partir dos intervalos (inicio, fim) do dia."""
+    por_hora = [0] * 24
+    total = 0
+    fim_anterior = 0
+    # intervalos mesclados: sobreposições não contam duas vezes
+    for inicio, fim in sorted((_minutos(i), _minutos(f)) for i, f in intervalos):
+        inicio = max(inicio, fim_anterior)
+        if fim <= inicio:
+            continue
+        total += fim - inicio
+        fim_anterior = fim
+        while inicio < fim:
+            hora = inicio // 60
+            proxima = min(fim, (hora + 1) * 60)
+            por_hora[hora] += proxima - inicio
+            inicio = proxima
+    return OcupacaoDiaria(
+        sala_id=sala_id,
+        data=data,
+        reservas=len(intervalos),
+        minutos=total,
+        minutos_por_hora=por_hora,
+    )
+
+
+def _ocorrencias_por_par(series, inicio, fim, pares=None):
+    ocupados = defaultdict(list)
+    for serie in series:
+        for dia in ocorrencias(serie, inicio, fim):
+            if pares is None or (serie.sala_id, dia) in pares:
+                ocupados[(serie.sala_id, dia)].append(
+                    (serie.hora_inicio, serie.hora_fim)
+                )
+    return ocupados
+
+
+def atualizar(pares):
+    """Recalcula as linhas das (sala_id, data) informadas a partir da origem."""
+    pares = set(pares)
+    if not pares:
+        return
+    salas = {sala_id for sala_id, _ in pares}
+    inicio = min(data for _, data in pares)
+    fim = max(data for _, data in pares)
+
+    series = Recorrencia.objects.filter(
+        sala_id__in=salas, data_inicio__lte=fim, data_fim__gte=inicio
+    )
+    ocupados = _ocorrencias_por_par(series, inicio, fim, pares)
+    fontes = [Reserva.objects]
+    if arquivo.arquivada(inicio):
+        fontes.append(ReservaArquivada.objects)
+    for fonte in fontes:
+        reservas = fonte.filter(
+            sala_id__in=salas, data__range=(inicio, fim)
+        ).values_list("sala_id", "data", "hora_inicio", "hora_fim")
+        for sala_id, data, hora_inicio, hora_fim in reservas:
+            if (sala_id, data) in pares:
+                ocupados[(sala_id, data)].append((hora_inicio, hora_fim))
+
+    with transaction.atomic():
+        vazios = defaultdict(list)
+        for sala_id, data in pares - ocupados.keys():
+            vazios[sala_id].append(data)
+        for sala_id, datas in vazios.items():
+            OcupacaoDiaria.objects.filter(sala_id=sala_id, data__in=datas).delete()
+        OcupacaoDiaria.objects.bulk_create(
+            [_linha(*par, intervalos) for par, intervalos in ocupados.items()],
+            batch_size=500,
+            update_conflicts=True,
+            unique_fields=["sala", "data"],
+            update_fields=["reservas", "minutos", "minutos_por_hora", "atualizada_em"],
+        )
+
+
+def pares_da_serie(serie):
+    """(sala_id, data) das ocorrências da série.
+
+    Ao editar, os signals juntam as ocorrências da versão anterior: datas que
+    deixaram de ocorrer também são recalculadas.
+    """
+    return {
+        (serie.sala_id, dia)
+        for dia in ocorrencias(serie, serie.data_inicio, serie.data_fim)
+    }
+
+
+def reconstruir(inicio=None, fim=None, sala_ids=None, lote=2000):
+    """Refaz o rollup do período (tudo por padrão); retorna as linhas gravadas.
+
+    As reservas são lidas em streaming na ordem do índice (sala, data), então
+    a memória depende do lote e não do tamanho da tabela.
+    """
+    fontes = [Reserva.objects.all(), ReservaArquivada.objects.all()]
+    series = Recorrencia.objects.all()
+    existentes = OcupacaoDiaria.objects.all()
+    if inicio is not None:
+        fontes = [f.filter(data__gte=inicio) for f in fontes]
+        series = series.filter(data_fim__gte=inicio)
+        existentes = existentes.filter(data__gte=inicio)
+    if fim is not None:
+        fontes = [f.filter(data__lte=fim) for f in fontes]
+        series = series.filter(data_inicio__lte=fim)
+        existentes = existentes.filter(data__lte=fim)
+    if sala_ids:
+        fontes = [f.filter(sala_id__in=sala_ids) for f in fontes]
+        series = series.filter(sala_id__in=sala_ids)
+        existentes = existentes.filter(sala_id__in=sala_ids)
+
+    # ocorrências de séries são poucas em relação às reservas: cabem em memória
+    de_series = _ocorrencias_por_par(
+        series.iterator(), inicio or date.min, fim or date.max
+    )
+
+    gravadas = 0
+    buffer = []
+
+    def gravar():
+        nonlocal gravadas, buffer
+        OcupacaoDiaria.objects.bulk_create(buffer, batch_size=500)
+        gravadas += len(buffer)
+        buffer = []
+
+    with transaction.atomic():
+        existentes.delete()
+        atual, intervalos = None, []
+        # reservas quentes e arquivadas intercaladas na ordem (sala, data)
+        linhas = heapq.merge(
+            *(
+                fonte.order_by("sala_id", "data")
+                .values_list("sala_id", "data", "hora_inicio", "hora_fim")
+                .iterator(chunk_size=lote)
+                for fonte in fontes
+            ),
+            key=lambda linha: linha[:2],
+        )
+        for sala_id, data, hora_inicio, hora_fim in linhas:
+            if (sala_id, data) != atual:
+                if atual is not None:
+                    buffer.append(_linha(*atual, intervalos + de_series.pop(atual, [])))
+                    if len(buffer) >= lote:
+                        gravar()
+                atual, intervalos = (sala_id, data), []
+            intervalos.append((hora_inicio, hora_fim))
+        if atual is not None:
+            buffer.append(_linha(*atual, intervalos + de_series.pop(atual, [])))
+        # dias ocupados apenas por séries
+        for par, intervalos in de_series.items():
+            buffer.append(_linha(*par, intervalos))
+            if len(buffer) >= lote:
+                gravar()
+        gravar()
+    return gravadas
+
+
+def _periodo(data, agrupamento):
+    if agrupamento == SEMANA:
+        return data - timedelta(days=data.weekday())
+    if agrupamento == MES:
+        return data.replace(day=1)
+    return data
+
+
+def relatorio(inicio, fim, agrupamento=DIA, sala_ids=None):
+    """Utilização por sala e período em [inicio, fim], a partir do rollup.
+
+    Horas disponíveis = dias do período dentro da janela × expediente. A
+    ocupação frente à capacidade pondera a utilização pela ``capacidade``
+    de cada sala (horas-assento reservadas / horas-assento disponíveis).
+    """
+    abertura, fechamento = expediente()
+    expediente_min = _minutos(fechamento) - _minutos(abertura)
+
+    dias_por_periodo = defaultdict(int)
+    dia = inicio
+    while dia <= fim:
+        dias_por_periodo[_periodo(dia, agrupamento)] += 1
+        dia += timedelta(days=1)
+
+    salas = Sala.objects.order_by("id")
+    linhas = OcupacaoDiaria.objects.filter(data__range=(inicio, fim))
+    if sala_ids:
+        salas = salas.filter(pk__in=sala_ids)
+        linhas = linhas.filter(sala_id__in=sala_ids)
+    salas = list(salas)
+
+    acumulado = defaultdict(lambda: {"reservas": 0, "minutos": 0, "hora": [0] * 24})
+    for sala_id, data, reservas, minutos, por_hora in linhas.values_list(
+        "sala_id", "data", "reservas", "minutos", "minutos_por_hora"
+    ).iterator():
+        item = acumulado[(sala_id, _periodo(data, agrupamento))]
+        item["reservas"] += reservas
+        item["minutos"] += minutos
+        item["hora"] = [a + b for a, b in zip(item["hora"], por_hora)]
+
+    resultados, totais = [], []
+    for periodo in sorted(dias_por_periodo):
+        disponiveis = dias_por_periodo[periodo] * expediente_min
+        total = {"reservas": 0, "minutos": 0, "hora": [0] * 24}
+        assento_reservado = assento_disponivel = 0
+        for sala in salas:
+            item = acumulado.get((sala.id, periodo))
+            item = item or {"reservas": 0, "minutos": 0, "hora": [0] * 24}
+            resultados.append(
+                {
+                    "sala": sala.id,
+                    "nome": sala.nome,
+                    "capacidade": sala.capacidade,
+                    "periodo": periodo.isoformat(),
+                    **_indicadores(item, disponiveis),
+                }
+            )
+            total["reservas"] += item["reservas"]
+            total["minutos"] += item["minutos"]
+            total["hora"] = [a + b for a, b in zip(total["hora"], item["hora"])]
+            assento_reservado += item["minutos"] * sala.capacidade
+            assento_disponivel += disponiveis * sala.capacidade
+        indicadores = _indicadores(total, disponiveis * len(salas))
+        indicadores["ocupacao_capacidade"] = _razao(
+            assento_reservado, assento_disponivel
+        )
+        totais.append({"periodo": periodo.isoformat(), **indicadores})
+    return {
+        "inicio": inicio.isoformat(),
+        "fim": fim.isoformat(),
+        "agrupamento": agrupamento,
+        "expediente": {"inicio": abertura.isoformat(), "fim": fechamento.isoformat()},
+        "resultados": resultados,
+        "totais": totais,
+    }
+
+
+def _razao(parte, todo):
+    return round(parte / todo, 4) if todo else 0.0
+
+
+def _indicadores(item, disponiveis):
+    pico = sorted(
+        (hora for hora in range(24) if item["hora"][hora]),
+        key=lambda hora: (-item["hora"][hora], hora),
+    )[:HORAS_PICO]
+    return {
+        "reservas": item["reservas"],
+        "horas_reservadas": round(item["minutos"] / 60, 2),
+        "horas_disponiveis": round(disponiveis / 60, 2),
+        "utilizacao": _razao(item["minutos"], disponiveis),
+        "horas_pico": sorted(pico),
+    }
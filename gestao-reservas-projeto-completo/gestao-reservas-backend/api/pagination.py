@@ -0,0 +1,107 @@
+import base64
+import binascii
+import json
+from datetime import date, time
+
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class ReservaCursorPagination(BasePagination):
+    """Paginação por chave (data, hora_inicio, id).
+
+    Cada página é um ``WHERE (data, hora_inicio, id) > cursor ORDER BY ... LIMIT``
+    sobre o índice de ordenação, então o custo depende do tamanho da página e
+    não da posição na tabela (diferente de OFFSET).
+    """
+
+    ordering = ("data", "hora_inicio", "id")
+    cursor_query_param = "cursor"
+    page_size = 50
+    page_size_query_param = "page_size"
+    max_page_size = 500
+    invalid_cursor_message = "Cursor inválido."
+
+    @staticmethod
+    def posicao(item):
+        """Chave de ordenação de um item da página (instância por padrão)."""
+        return item.data, item.hora_inicio, item.pk
+
+    def paginate_queryset(self, queryset, request, view=None):
+        return self.paginar(list(self.preparar(queryset, request)))
+
+    def preparar(self, queryset, request):
+        """Consulta da página (ainda não avaliada, para views sync ou async)."""
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        queryset = queryset.order_by(*self.ordering)
+
+        posicao = self.decode_cursor(request)
+        if posicao is not None:
+            data, hora_inicio, pk = posicao
+            queryset = queryset.filter(
+                Q(data__gt=data)
+                | Q(data=data, hora_inicio__gt=hora_inicio)
+                | Q(data=data, hora_inicio=hora_inicio, id__gt=pk)
+            )
+        # um registro a mais indica se existe próxima página
+        return queryset[: self.page_size + 1]
+
+    def paginar_consultas(self, consultas, request):
+        """Página sobre consultas lidas em sequência (arquivo e depois quente)."""
+        resultados = []
+        for consulta in consultas:
+            resultados += self.preparar(consulta, request)
+            if len(resultados) > self.page_size:
+                break
+        return self.paginar(resultados)
+
+    def paginar(self, resultados):
+        self.has_next = len(resultados) > self.page_size
+        self.page = resultados[: self.page_size]
+        return self.page
+
+    def get_page_size(self, request):
+        try:
+            tamanho = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return max(1, min(tamanho, self.max_page_size))
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        cursor = self.encode_cursor(self.posicao(self.page[-1]))
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, cursor)
+
+    def get_paginated_response(self, data):
+        return Response({"next": self.get_next_link(), "results": data})
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            "type": "object",
+            "required": ["results"],
+            "properties": {
+                "next": {"type": "string", "nullable": True, "format": "uri"},
+                "results": schema,
+            },
+        }
+
+    def encode_cursor(self, posicao):
+        data, hora_inicio, pk = posicao
+        bruto = json.dumps([data.isoformat(), hora_inicio.isoformat(), pk])
+        return base64.urlsafe_b64encode(bruto.encode()).decode()
+
+    def decode_cursor(self, request):
+        cursor = request.query_params.get(self.cursor_query_param)
+        if not cursor:
+            return None
+        try:
+            data, hora_inicio, pk = json.loads(base64.urlsafe_b64decode(cursor))
+            return date.fromisoformat(data), time.fromisoformat(hora_inicio), int(pk)
+        except (binascii.Error, TypeError, ValueError):
+            raise NotFound(self.invalid_cursor_message)
@@ -6,3 +6,8 @@ class IsAdminOrReadOnly(permissions.BasePermission):
         if request.method in permissions.SAFE_METHODS:
             return True
         return bool(request.user and request.user.is_staff)
+
+class IsSelfOrAdmin(permissions.IsAuthenticated):
+    """O próprio usuário (objeto ``User``) ou um admin."""
+    def has_object_permission(self, request, view, obj):
+        return bool(request.user.is_staff or obj.pk == request.user.pk)
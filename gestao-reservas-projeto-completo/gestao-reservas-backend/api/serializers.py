@@ -1,6 +1,7 @@
 from rest_framework import serializers
 from django.contrib.auth import get_user_model
-from .models import Sala, Reserva
+from . import arquivo
+from .models import Sala, Reserva, Recorrencia
 
 User = get_user_model()
 
@@ -14,6 +15,19 @@ class SalaSerializer(serializers.ModelSerializer):
         model = Sala
         fields = ["id", "nome", "capacidade"]
 
+def _validar_data_ativa(attrs, contexto):
+    if "data" not in attrs:
+        return
+    # memoizado por data no contexto: um lote consulta o banco uma vez por dia
+    datas = contexto.setdefault("datas_arquivadas", {})
+    data = attrs["data"]
+    if data not in datas:
+        datas[data] = arquivo.arquivada_no_banco(data)
+    if datas[data]:
+        raise serializers.ValidationError(
+            {"data": "Período arquivado: não aceita novas reservas."}
+        )
+
 class ReservaSerializer(serializers.ModelSerializer):
     sala = SalaSerializer(read_only=True)
     usuario = UserSerializer(read_only=True)
@@ -31,3 +45,180 @@ class ReservaSerializer(serializers.ModelSerializer):
             "id", "sala", "usuario", "data", "hora_inicio", "hora_fim",
             "sala_id", "usuario_id"
         ]
+
+    def validate(self, attrs):
+        inicio = attrs.get("hora_inicio", getattr(self.instance, "hora_inicio", None))
+        fim = attrs.get("hora_fim", getattr(self.instance, "hora_fim", None))
+        if inicio is not None and fim is not None and fim <= inicio:
+            raise serializers.ValidationError(
+                {"hora_fim": "A hora de fim deve ser posterior à hora de início."}
+            )
+        _validar_data_ativa(attrs, self.context)
+        return attrs
+
+
+class DisponibilidadeQuerySerializer(serializers.Serializer):
+    data = serializers.DateField()
+    inicio = serializers.TimeField(required=False)
+    fim = serializers.TimeField(required=False)
+    capacidade_min = serializers.IntegerField(required=False, min_value=0)
+
+    def validate(self, attrs):
+        if ("inicio" in attrs) != ("fim" in attrs):
+            raise serializers.ValidationError("Informe inicio e fim juntos.")
+        if "inicio" in attrs and attrs["fim"] <= attrs["inicio"]:
+            raise serializers.ValidationError(
+                {"fim": "O fim deve ser posterior ao início."}
+            )
+        return attrs
+
+
+class ReservaFiltroSerializer(serializers.Serializer):
+    sala = serializers.IntegerField(required=False)
+    usuario = serializers.IntegerField(required=False)
+    data_inicio = serializers.DateField(required=False)
+    data_fim = serializers.DateField(required=False)
+    minhas = serializers.BooleanField(required=False)
+
+    def validate(self, attrs):
+        if "data_inicio" in attrs and "data_fim" in attrs:
+            if attrs["data_fim"] < attrs["data_inicio"]:
+                raise serializers.ValidationError(
+                    {"data_fim": "O fim do período deve ser após o início."}
+                )
+        return attrs
+
+
+class ReservaLoteItemSerializer(serializers.Serializer):
+    """Item de lote: FKs como inteiros, resolvidas em bloco por ``api.lote``."""
+
+    id = serializers.IntegerField(required=False)
+    sala_id = serializers.IntegerField()
+    usuario_id = serializers.IntegerField()
+    data = serializers.DateField()
+    hora_inicio = serializers.TimeField()
+    hora_fim = serializers.TimeField()
+
+    def validate(self, attrs):
+        inicio, fim = attrs.get("hora_inicio"), attrs.get("hora_fim")
+        if inicio is not None and fim is not None and fim <= inicio:
+            raise serializers.ValidationError(
+                {"hora_fim": "A hora de fim deve ser posterior à hora de início."}
+            )
+        _validar_data_ativa(attrs, self.context)
+        return attrs
+
+
+class ReservaLoteSerializer(serializers.Serializer):
+    modo = serializers.ChoiceField(choices=["atomico", "parcial"], default="atomico")
+    reservas = serializers.ListField(
+        child=serializers.JSONField(), required=False, max_length=1000
+    )
+    ids = serializers.ListField(
+        child=serializers.IntegerField(), required=False, max_length=1000
+    )
+
+
+class RecorrenciaSerializer(serializers.ModelSerializer):
+    sala = SalaSerializer(read_only=True)
+    usuario = UserSerializer(read_only=True)
+
+    sala_id = serializers.PrimaryKeyRelatedField(
+        queryset=Sala.objects.all(), source="sala", write_only=True
+    )
+    usuario_id = serializers.PrimaryKeyRelatedField(
+        queryset=User.objects.all(), source="usuario", write_only=True
+    )
+    dias_semana = serializers.ListField(
+        child=serializers.IntegerField(min_value=0, max_value=6), required=False
+    )
+    excecoes = serializers.ListField(child=serializers.DateField(), required=False)
+
+    class Meta:
+        model = Recorrencia
+        fields = [
+            "id",
+            "sala",
+            "usuario",
+            "frequencia",
+            "intervalo",
+            "dias_semana",
+            "data_inicio",
+            "data_fim",
+            "hora_inicio",
+            "hora_fim",
+            "excecoes",
+            "sala_id",
+            "usuario_id",
+        ]
+        extra_kwargs = {"intervalo": {"min_value": 1}}
+
+    # limita o trabalho síncrono dos signals (rollup) a um ano de ocorrências
+    MAX_DIAS = 366
+
+    def validate(self, attrs):
+        def atual(campo):
+            return attrs.get(campo, getattr(self.instance, campo, None))
+
+        if atual("hora_fim") is not None and atual("hora_fim") <= atual("hora_inicio"):
+            raise serializers.ValidationError(
+                {"hora_fim": "A hora de fim deve ser posterior à hora de início."}
+            )
+        if atual("data_fim") is not None and atual("data_fim") < atual("data_inicio"):
+            raise serializers.ValidationError(
+                {"data_fim": "O fim da série deve ser após o início."}
+            )
+        if (
+            atual("data_fim") is not None
+            and (atual("data_fim") - atual("data_inicio")).days > self.MAX_DIAS
+        ):
+            raise serializers.ValidationError(
+                {"data_fim": f"A série pode durar no máximo {self.MAX_DIAS} dias."}
+            )
+        if "dias_semana" in attrs:
+            attrs["dias_semana"] = sorted(set(attrs["dias_semana"]))
+        if "excecoes" in attrs:
+            # armazenadas como texto ISO no JSONField
+            attrs["excecoes"] = sorted({d.isoformat() for d in attrs["excecoes"]})
+        return attrs
+
+
+class OcorrenciaQuerySerializer(serializers.Serializer):
+    MAX_DIAS = 366
+
+    data_inicio = serializers.DateField()
+    data_fim = serializers.DateField()
+    sala = serializers.IntegerField(required=False)
+    usuario = serializers.IntegerField(required=False)
+
+    def validate(self, attrs):
+        dias = (attrs["data_fim"] - attrs["data_inicio"]).days
+        if not 0 <= dias <= self.MAX_DIAS:
+            raise serializers.ValidationError(
+                f"A janela deve ter entre 0 e {self.MAX_DIAS} dias."
+            )
+        return attrs
+
+
+class SyncQuerySerializer(serializers.Serializer):
+    since = serializers.CharField(required=False, allow_blank=True)
+    limite = serializers.IntegerField(required=False, min_value=1, max_value=5000)
+
+
+class RelatorioOcupacaoQuerySerializer(serializers.Serializer):
+    MAX_DIAS = 366
+
+    data_inicio = serializers.DateField()
+    data_fim = serializers.DateField()
+    agrupamento = serializers.ChoiceField(
+        choices=["dia", "semana", "mes"], default="dia"
+    )
+    sala = serializers.IntegerField(required=False)
+
+    def validate(self, attrs):
+        dias = (attrs["data_fim"] - attrs["data_inicio"]).days
+        if not 0 <= dias <= self.MAX_DIAS:
+            raise serializers.ValidationError(
+                f"A janela deve ter entre 0 e {self.MAX_DIAS} dias."
+            )
+        return attrs
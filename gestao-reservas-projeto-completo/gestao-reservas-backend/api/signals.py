@@ -0,0 +1,63 @@
+from django.contrib.auth import get_user_model
+from django.contrib.auth.signals import user_login_failed
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from . import arquivo, cache, ocupacao, throttling
+from .authentication import invalidar_usuario
+from .models import Recorrencia, Reserva, Sala
+
+User = get_user_model()
+
+
+@receiver([post_save, post_delete], sender=Sala)
+def invalidar_salas(sender, **kwargs):
+    cache.invalidar("salas")
+
+
+@receiver([post_save, post_delete], sender=User)
+def invalidar_usuarios(sender, instance, **kwargs):
+    cache.invalidar("usuarios")
+    # salvar cobre desativação, troca de senha e mudança de permissões
+    invalidar_usuario(instance.pk)
+
+
+@receiver(pre_save, sender=Reserva)
+def guardar_estado_anterior(sender, instance, **kwargs):
+    # uma edição pode mover a reserva de sala/dia: o estado antigo também é
+    # recalculado no rollup
+    instance._anterior = (
+        Reserva.todas.filter(pk=instance.pk).values_list("sala_id", "data").first()
+        if instance.pk
+        else None
+    )
+
+
+@receiver([post_save, post_delete], sender=Reserva)
+def atualizar_derivados_reserva(sender, instance, **kwargs):
+    if arquivo.movendo():
+        return
+    estados = {(instance.sala_id, instance.data)}
+    if getattr(instance, "_anterior", None):
+        estados.add(instance._anterior)
+    ocupacao.atualizar(estados)
+
+
+@receiver(pre_save, sender=Recorrencia)
+def guardar_serie_anterior(sender, instance, **kwargs):
+    instance._anterior = (
+        Recorrencia.objects.filter(pk=instance.pk).first() if instance.pk else None
+    )
+
+
+@receiver([post_save, post_delete], sender=Recorrencia)
+def atualizar_derivados_serie(sender, instance, **kwargs):
+    series = [instance]
+    if getattr(instance, "_anterior", None):
+        series.append(instance._anterior)
+    ocupacao.atualizar(set().union(*(ocupacao.pares_da_serie(s) for s in series)))
+
+
+@receiver(user_login_failed)
+def contar_falha_de_login(sender, credentials, **kwargs):
+    throttling.login_falhou(credentials.get("username"))
@@ -0,0 +1,86 @@
+"""Delta-sync de reservas por token opaco.
+
+O token codifica a última posição (atualizada_em, id) entregue ao cliente;
+a próxima chamada lê apenas o que mudou depois dela pelo índice
+``reserva_sync_idx``, incluindo tombstones de reservas removidas.
+
+``atualizada_em`` é o horário da gravação, não do commit: uma transação lenta
+pode confirmar uma linha com horário anterior a outras já entregues. Por
+isso o token não avança sobre as linhas dos últimos ``JANELA`` segundos; elas
+voltam na próxima chamada e o cliente as aplica de novo pelo id. A janela
+supõe que nenhuma transação de escrita dura mais que ``DB_TRANSACAO_MAX_S``:
+o SQLite desiste do lock nesse prazo e, no Postgres, ``statement_timeout`` e
+``idle_in_transaction_session_timeout`` são configurados com ele. Uma
+transação com vários comandos lentos ainda pode passar disso; escritas
+longas (comandos de manutenção) devem ser divididas em lotes.
+
+O arquivamento descarta tombstones com mais de ``SYNC_RETENCAO_DIAS``: um
+token mais antigo que isso pode ter perdido remoções e é recusado (o cliente
+sincroniza do zero, sem ``since``).
+"""
+
+import base64
+import binascii
+import json
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+from rest_framework.exceptions import ValidationError
+
+from .models import Reserva
+
+LIMITE_PADRAO = 500
+# acima do teto de uma transação de escrita (``DB_TRANSACAO_MAX_S``)
+JANELA = timedelta(seconds=settings.DB_TRANSACAO_MAX_S + 10)
+
+
+def codificar_token(atualizada_em, pk):
+    bruto = json.dumps([atualizada_em.isoformat(), pk])
+    return base64.urlsafe_b64encode(bruto.encode()).decode()
+
+
+def decodificar_token(token):
+    try:
+        atualizada_em, pk = json.loads(base64.urlsafe_b64decode(token))
+        return datetime.fromisoformat(atualizada_em), int(pk)
+    except (binascii.Error, TypeError, ValueError):
+        raise ValidationError({"since": "Token de sincronização inválido."})
+
+
+def alteracoes_desde(token=None, limite=LIMITE_PADRAO):
+    """Retorna (alteradas, removidas_ids, novo_token, ha_mais).
+
+    Sem token, devolve o estado atual (somente reservas ativas). Linhas
+    recentes podem ser entregues de novo em chamadas seguintes. Uma página
+    cheia só de linhas recentes devolve o mesmo token com ``ha_mais``: o
+    cliente repete depois de alguns segundos, quando elas assentarem.
+    """
+    queryset = Reserva.todas.select_related("sala", "usuario")
+    if token:
+        atualizada_em, pk = decodificar_token(token)
+        retencao = timedelta(days=settings.SYNC_RETENCAO_DIAS)
+        if atualizada_em < timezone.now() - retencao:
+            raise ValidationError(
+                {"since": "Token expirado: sincronize do zero (sem since)."}
+            )
+        queryset = queryset.filter(
+            Q(atualizada_em__gt=atualizada_em)
+            | Q(atualizada_em=atualizada_em, id__gt=pk)
+        )
+    else:
+        queryset = queryset.filter(removida_em__isnull=True)
+
+    lote = list(queryset.order_by("atualizada_em", "id")[: limite + 1])
+    ha_mais = len(lote) > limite
+    lote = lote[:limite]
+
+    alteradas = [r for r in lote if r.removida_em is None]
+    removidas = [r.pk for r in lote if r.removida_em is not None]
+    corte = timezone.now() - JANELA
+    assentadas = [r for r in lote if r.atualizada_em <= corte]
+    if assentadas:
+        ultima = assentadas[-1]
+        token = codificar_token(ultima.atualizada_em, ultima.pk)
+    return alteradas, removidas, token, ha_mais
@@ -0,0 +1,23 @@
+"""Utilitários para os testes da API (não importados pelo código da aplicação)."""
+
+from contextlib import contextmanager
+
+from django.db import connections
+from django.test.utils import CaptureQueriesContext
+
+
+@contextmanager
+def limite_consultas(maximo, using="default"):
+    """Falha (AssertionError) se o bloco executar mais de ``maximo`` consultas.
+
+    ``with limite_consultas(3): client.get("/api/reservas/")``.
+    """
+    with CaptureQueriesContext(connections[using]) as capturadas:
+        yield capturadas
+    if len(capturadas) > maximo:
+        sql = "\n".join(
+            f"{i}. {q['sql']}" for i, q in enumerate(capturadas.captured_queries, 1)
+        )
+        raise AssertionError(
+            f"{len(capturadas)} consultas executadas, orçamento de {maximo}:\n{sql}"
+        )
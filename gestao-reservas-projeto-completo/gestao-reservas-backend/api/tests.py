@@ -1,6 +1,41 @@
-from django.test import TestCase, Client
+import json
+import threading
+import time as time_module
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import redirect_stdout
+from datetime import date, time, timedelta
+from io import StringIO
+from unittest import mock
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.test import (
+    AsyncClient,
+    Client,
+    LiveServerTestCase,
+    TestCase,
+    TransactionTestCase,
+    override_settings,
+)
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
 from django.contrib.auth import get_user_model
-from .models import Sala, Reserva
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+from . import arquivo, geracao, ocupacao, sync, throttling
+from .agenda import ocorre_em, ocorrencias
+from .authentication import chave_usuario
+from .bench.dados import popular
+from .bench.executor import executar, percentil
+from .bench.serializacao import comparar
+from .metrics import registro
+from .models import Sala, Reserva, Recorrencia, OcupacaoDiaria, ReservaArquivada
+from .serializers import ReservaSerializer
+from .testing import limite_consultas
 
 User = get_user_model()
 
@@ -55,3 +90,1504 @@ class ApiTests(TestCase):
         )
         self.assertEqual(resp.status_code, 201)
         self.assertEqual(Reserva.objects.count(), 1)
+
+
+class ConflitoReservaTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(username="ana", password="123")
+        self.client.force_authenticate(self.user)
+        self.sala = Sala.objects.create(nome="Sala Teste", capacidade=10)
+
+    def reservar(self, inicio, fim, data="2025-09-21"):
+        return self.client.post(
+            "/api/reservas/",
+            {
+                "sala_id": self.sala.id,
+                "usuario_id": self.user.id,
+                "data": data,
+                "hora_inicio": inicio,
+                "hora_fim": fim,
+            },
+            format="json",
+        )
+
+    def test_sobreposicao_retorna_409(self):
+        self.assertEqual(self.reservar("09:00", "10:00").status_code, 201)
+        self.assertEqual(self.reservar("09:30", "10:30").status_code, 409)
+        self.assertEqual(self.reservar("08:00", "11:00").status_code, 409)
+        self.assertEqual(Reserva.objects.count(), 1)
+
+    def test_horarios_adjacentes_e_outro_dia_permitidos(self):
+        self.assertEqual(self.reservar("09:00", "10:00").status_code, 201)
+        self.assertEqual(self.reservar("10:00", "11:00").status_code, 201)
+        self.assertEqual(self.reservar("09:00", "10:00", "2025-09-22").status_code, 201)
+
+    def test_atualizacao_ignora_a_propria_reserva(self):
+        reserva_id = self.reservar("09:00", "10:00").json()["id"]
+        self.reservar("10:00", "11:00")
+        resp = self.client.patch(
+            f"/api/reservas/{reserva_id}/", {"hora_fim": "09:45"}, format="json"
+        )
+        self.assertEqual(resp.status_code, 200)
+        resp = self.client.patch(
+            f"/api/reservas/{reserva_id}/", {"hora_fim": "10:30"}, format="json"
+        )
+        self.assertEqual(resp.status_code, 409)
+
+    def test_hora_fim_antes_do_inicio(self):
+        self.assertEqual(self.reservar("10:00", "09:00").status_code, 400)
+
+
+class ConcorrenciaReservaTests(TransactionTestCase):
+    def test_reservas_paralelas_no_mesmo_horario(self):
+        user = User.objects.create_user(username="ana", password="123")
+        sala = Sala.objects.create(nome="Sala Teste", capacidade=10)
+        barreira = threading.Barrier(8)
+
+        def reservar():
+            client = APIClient()
+            client.force_authenticate(user)
+            barreira.wait()
+            try:
+                return client.post(
+                    "/api/reservas/",
+                    {
+                        "sala_id": sala.id,
+                        "usuario_id": user.id,
+                        "data": "2025-09-21",
+                        "hora_inicio": "09:00",
+                        "hora_fim": "10:00",
+                    },
+                    format="json",
+                ).status_code
+            finally:
+                connection.close()
+
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            status = sorted(pool.map(lambda _: reservar(), range(8)))
+
+        self.assertEqual(status, [201] + [409] * 7)
+        self.assertEqual(Reserva.objects.count(), 1)
+
+
+class DisponibilidadeTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        user = User.objects.create_user(username="ana", password="123")
+        self.grande = Sala.objects.create(nome="Auditório", capacidade=50)
+        self.pequena = Sala.objects.create(nome="Sala 2", capacidade=8)
+        Reserva.objects.create(
+            sala=self.grande,
+            usuario=user,
+            data=date(2025, 9, 21),
+            hora_inicio=time(14, 0),
+            hora_fim=time(15, 0),
+        )
+
+    def test_salas_livres_na_janela(self):
+        resp = self.client.get(
+            "/api/salas/disponiveis/",
+            {"data": "2025-09-21", "inicio": "14:30", "fim": "15:30"},
+        )
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual([s["id"] for s in resp.json()], [self.pequena.id])
+
+    def test_capacidade_minima_e_lacunas(self):
+        resp = self.client.get(
+            "/api/salas/disponiveis/",
+            {
+                "data": "2025-09-21",
+                "inicio": "09:00",
+                "fim": "10:00",
+                "capacidade_min": 20,
+            },
+        )
+        salas = resp.json()
+        self.assertEqual([s["id"] for s in salas], [self.grande.id])
+        self.assertEqual(
+            salas[0]["livres"],
+            [
+                {"inicio": "08:00:00", "fim": "14:00:00"},
+                {"inicio": "15:00:00", "fim": "18:00:00"},
+            ],
+        )
+
+    def test_parametros_invalidos(self):
+        resp = self.client.get("/api/salas/disponiveis/", {"inicio": "09:00"})
+        self.assertEqual(resp.status_code, 400)
+
+
+class PaginacaoReservaTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.ana = User.objects.create_user(username="ana", password="123")
+        self.bia = User.objects.create_user(username="bia", password="123")
+        self.client.force_authenticate(self.ana)
+        self.sala1 = Sala.objects.create(nome="Sala 1", capacidade=10)
+        self.sala2 = Sala.objects.create(nome="Sala 2", capacidade=10)
+        for dia in (21, 22, 23):
+            for hora in (9, 10):
+                for sala, usuario in ((self.sala1, self.ana), (self.sala2, self.bia)):
+                    Reserva.objects.create(
+                        sala=sala,
+                        usuario=usuario,
+                        data=date(2025, 9, dia),
+                        hora_inicio=time(hora, 0),
+                        hora_fim=time(hora + 1, 0),
+                    )
+
+    def test_percorre_todas_as_paginas_em_ordem(self):
+        url = "/api/reservas/?page_size=5"
+        vistos = []
+        while url:
+            resp = self.client.get(url)
+            self.assertEqual(resp.status_code, 200)
+            self.assertLessEqual(len(resp.json()["results"]), 5)
+            vistos += [
+                (r["data"], r["hora_inicio"], r["id"]) for r in resp.json()["results"]
+            ]
+            url = resp.json()["next"]
+        self.assertEqual(len(vistos), 12)
+        self.assertEqual(vistos, sorted(vistos))
+
+    def test_filtros(self):
+        resp = self.client.get(
+            "/api/reservas/",
+            {
+                "sala": self.sala2.id,
+                "data_inicio": "2025-09-22",
+                "data_fim": "2025-09-22",
+            },
+        )
+        resultados = resp.json()["results"]
+        self.assertEqual(len(resultados), 2)
+        self.assertTrue(all(r["sala"]["id"] == self.sala2.id for r in resultados))
+
+        resp = self.client.get("/api/reservas/", {"minhas": "true"})
+        self.assertEqual(
+            {r["usuario"]["username"] for r in resp.json()["results"]}, {"ana"}
+        )
+
+    def test_lista_legada(self):
+        resp = self.client.get("/api/reservas/?lista=1")
+        self.assertTrue(isinstance(resp.json(), list))
+        self.assertEqual(len(resp.json()), 12)
+
+    def test_cursor_invalido(self):
+        resp = self.client.get("/api/reservas/?cursor=invalido")
+        self.assertEqual(resp.status_code, 404)
+
+
+class ExportacaoReservaTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.admin = User.objects.create_user(
+            username="admin", password="123", is_staff=True
+        )
+        self.client.force_authenticate(self.admin)
+        self.sala = Sala.objects.create(nome="Sala 1", capacidade=10)
+        outra = Sala.objects.create(nome="Sala 2", capacidade=10)
+        for dia, sala in ((20, self.sala), (21, self.sala), (21, outra)):
+            Reserva.objects.create(
+                sala=sala,
+                usuario=self.admin,
+                data=date(2025, 9, dia),
+                hora_inicio=time(9, 0),
+                hora_fim=time(10, 0),
+            )
+
+    def test_exporta_ndjson_filtrado(self):
+        resp = self.client.get(
+            "/api/reservas/exportar/",
+            {"sala": self.sala.id, "data_inicio": "2025-09-21"},
+        )
+        self.assertEqual(resp.status_code, 200)
+        self.assertTrue(resp.streaming)
+        linhas = [
+            json.loads(linha)
+            for linha in b"".join(resp.streaming_content).decode().splitlines()
+        ]
+        self.assertEqual(len(linhas), 1)
+        self.assertEqual(linhas[0]["sala_nome"], "Sala 1")
+        self.assertEqual(linhas[0]["data"], "2025-09-21")
+        self.assertEqual(linhas[0]["hora_inicio"], "09:00:00")
+
+    def test_exporta_csv(self):
+        resp = self.client.get("/api/reservas/exportar/", {"formato": "csv"})
+        linhas = b"".join(resp.streaming_content).decode().splitlines()
+        self.assertEqual(linhas[0].split(",")[:3], ["id", "sala_id", "sala_nome"])
+        self.assertEqual(len(linhas), 4)
+
+    def test_somente_admin(self):
+        self.client.force_authenticate(User.objects.create_user(username="ana"))
+        resp = self.client.get("/api/reservas/exportar/")
+        self.assertEqual(resp.status_code, 403)
+
+    def test_comando_export_reservas(self):
+        saida = StringIO()
+        call_command(
+            "export_reservas", "--formato=csv", "--data-fim=2025-09-20", stdout=saida
+        )
+        self.assertEqual(len(saida.getvalue().splitlines()), 2)
+
+
+class LoteReservaTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(username="ana", password="123")
+        self.client.force_authenticate(self.user)
+        self.sala = Sala.objects.create(nome="Sala 1", capacidade=10)
+        self.existente = Reserva.objects.create(
+            sala=self.sala,
+            usuario=self.user,
+            data=date(2025, 9, 21),
+            hora_inicio=time(9, 0),
+            hora_fim=time(10, 0),
+        )
+
+    def item(self, inicio, fim, **extra):
+        return {
+            "sala_id": self.sala.id,
+            "usuario_id": self.user.id,
+            "data": "2025-09-21",
+            "hora_inicio": inicio,
+            "hora_fim": fim,
+            **extra,
+        }
+
+    def test_atomico_aborta_tudo_em_conflito(self):
+        resp = self.client.post(
+            "/api/reservas/lote/",
+            {
+                "reservas": [
+                    self.item("10:00", "11:00"),
+                    self.item("10:30", "11:30"),  # conflita dentro do lote
+                    self.item("09:30", "10:00"),  # conflita com o banco
+                ]
+            },
+            format="json",
+        )
+        self.assertEqual(resp.status_code, 409)
+        status = [r["status"] for r in resp.json()["resultados"]]
+        self.assertEqual(status, [424, 409, 409])
+        self.assertEqual(Reserva.objects.count(), 1)
+
+    def test_criacao_rejeita_id_do_cliente(self):
+        resp = self.client.post(
+            "/api/reservas/lote/",
+            {"reservas": [self.item("10:00", "11:00", id=10**9)]},
+            format="json",
+        )
+        self.assertEqual(resp.status_code, 400)
+        self.assertIn("id", resp.json()["resultados"][0]["erros"])
+        self.assertFalse(Reserva.todas.filter(pk=10**9).exists())
+
+    def test_parcial_grava_itens_validos(self):
+        resp = self.client.post(
+            "/api/reservas/lote/",
+            {
+                "modo": "parcial",
+                "reservas": [
+                    self.item("10:00", "11:00"),
+                    self.item("10:30", "11:30"),
+                    self.item("12:00", "13:00", sala_id=9999),
+                    self.item("12:00", "13:00"),
+                ],
+            },
+            format="json",
+        )
+        self.assertEqual(resp.status_code, 201)
+        status = [r["status"] for r in resp.json()["resultados"]]
+        self.assertEqual(status, [201, 409, 400, 201])
+        self.assertEqual(Reserva.objects.count(), 3)
+
+    def test_consultas_nao_crescem_com_o_lote(self):
+        def criar(n, dia):
+            itens = [
+                self.item(f"{h:02d}:00", f"{h:02d}:30", data=f"2025-10-{dia}")
+                for h in range(n)
+            ]
+            with CaptureQueriesContext(connection) as ctx:
+                resp = self.client.post(
+                    "/api/reservas/lote/", {"reservas": itens}, format="json"
+                )
+            self.assertEqual(resp.status_code, 201)
+            return len(ctx)
+
+        self.assertEqual(criar(2, 10), criar(20, 11))
+
+    def test_troca_recusada_nao_libera_o_horario_antigo(self):
+        a = self.existente
+        b, _ = (
+            Reserva.objects.create(
+                sala=self.sala,
+                usuario=self.user,
+                data=a.data,
+                hora_inicio=time(inicio, 0),
+                hora_fim=time(inicio + 1, 0),
+            )
+            for inicio in (11, 14)
+        )
+        resp = self.client.patch(
+            "/api/reservas/lote/",
+            {
+                "modo": "parcial",
+                "reservas": [
+                    {"id": a.id, "hora_inicio": "14:00", "hora_fim": "15:00"},
+                    {"id": b.id, "hora_inicio": "09:00", "hora_fim": "10:00"},
+                ],
+            },
+            format="json",
+        )
+        status = [r["status"] for r in resp.json()["resultados"]]
+        self.assertEqual(status, [409, 409])
+        horarios = Reserva.objects.order_by("hora_inicio").values_list(
+            "hora_inicio", flat=True
+        )
+        self.assertEqual(list(horarios), [time(9, 0), time(11, 0), time(14, 0)])
+
+    def test_atualiza_e_remove(self):
+        resp = self.client.patch(
+            "/api/reservas/lote/",
+            {"reservas": [{"id": self.existente.id, "hora_fim": "09:30"}]},
+            format="json",
+        )
+        self.assertEqual(resp.status_code, 200)
+        self.existente.refresh_from_db()
+        self.assertEqual(self.existente.hora_fim, time(9, 30))
+
+        resp = self.client.delete(
+            "/api/reservas/lote/",
+            {"ids": [self.existente.id, 9999]},
+            format="json",
+        )
+        self.assertEqual(resp.status_code, 404)
+        self.assertEqual(Reserva.objects.count(), 1)
+
+        resp = self.client.delete(
+            "/api/reservas/lote/",
+            {"modo": "parcial", "ids": [self.existente.id, 9999]},
+            format="json",
+        )
+        status = [r["status"] for r in resp.json()["resultados"]]
+        self.assertEqual(status, [204, 404])
+        self.assertEqual(Reserva.objects.count(), 0)
+
+
+class RecorrenciaTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(username="ana", password="123")
+        self.client.force_authenticate(self.user)
+        self.sala = Sala.objects.create(nome="Sala 1", capacidade=10)
+
+    def criar_serie(self, **extra):
+        dados = {
+            "sala_id": self.sala.id,
+            "usuario_id": self.user.id,
+            "frequencia": "semanal",
+            "dias_semana": [0, 2],  # segundas e quartas
+            "data_inicio": "2025-09-01",
+            "data_fim": "2026-08-31",
+            "hora_inicio": "14:00",
+            "hora_fim": "15:00",
+            **extra,
+        }
+        return self.client.post("/api/recorrencias/", dados, format="json")
+
+    def test_serie_anual_ocupa_uma_linha(self):
+        self.assertEqual(self.criar_serie().status_code, 201)
+        self.assertEqual(Recorrencia.objects.count(), 1)
+        self.assertEqual(Reserva.objects.count(), 0)
+
+    def test_serie_limitada_e_rollup_so_nas_ocorrencias(self):
+        resp = self.criar_serie(data_inicio="2030-01-07", data_fim="2079-12-31")
+        self.assertEqual(resp.status_code, 400)
+        self.assertIn("data_fim", resp.json())
+
+        self.assertEqual(self.criar_serie().status_code, 201)
+        serie = Recorrencia.objects.get()
+        dias = list(ocorrencias(serie, serie.data_inicio, serie.data_fim))
+        self.assertEqual(OcupacaoDiaria.objects.count(), len(dias))
+
+    def test_expansao_com_intervalo_e_excecoes(self):
+        serie = Recorrencia(
+            sala=self.sala,
+            usuario=self.user,
+            frequencia=Recorrencia.SEMANAL,
+            intervalo=2,
+            dias_semana=[0],
+            data_inicio=date(2025, 9, 1),
+            data_fim=date(2025, 10, 31),
+            hora_inicio=time(14, 0),
+            hora_fim=time(15, 0),
+            excecoes=["2025-09-29"],
+        )
+        dias = list(ocorrencias(serie, date(2025, 9, 10), date(2025, 12, 31)))
+        self.assertEqual(
+            dias, [date(2025, 9, 15), date(2025, 10, 13), date(2025, 10, 27)]
+        )
+        self.assertTrue(all(ocorre_em(serie, d) for d in dias))
+        self.assertFalse(ocorre_em(serie, date(2025, 9, 29)))
+        self.assertFalse(ocorre_em(serie, date(2025, 9, 22)))
+
+    def test_reserva_conflita_com_ocorrencia(self):
+        self.criar_serie(excecoes=["2025-09-22"])
+        reserva = {
+            "sala_id": self.sala.id,
+            "usuario_id": self.user.id,
+            "hora_inicio": "14:30",
+            "hora_fim": "15:30",
+        }
+        resp = self.client.post(
+            "/api/reservas/", {**reserva, "data": "2025-09-15"}, format="json"
+        )
+        self.assertEqual(resp.status_code, 409)
+        # exceção da série e terça-feira ficam livres
+        for dia in ("2025-09-22", "2025-09-16"):
+            resp = self.client.post(
+                "/api/reservas/", {**reserva, "data": dia}, format="json"
+            )
+            self.assertEqual(resp.status_code, 201)
+
+    def test_serie_conflita_com_reserva_e_outra_serie(self):
+        Reserva.objects.create(
+            sala=self.sala,
+            usuario=self.user,
+            data=date(2026, 3, 4),  # quarta-feira
+            hora_inicio=time(14, 30),
+            hora_fim=time(15, 30),
+        )
+        self.assertEqual(self.criar_serie().status_code, 409)
+        self.assertEqual(self.criar_serie(dias_semana=[0]).status_code, 201)
+        resp = self.criar_serie(frequencia="diaria", data_inicio="2025-09-06")
+        self.assertEqual(resp.status_code, 409)
+
+    def test_disponibilidade_e_listagem_de_ocorrencias(self):
+        self.criar_serie()
+        resp = self.client.get(
+            "/api/salas/disponiveis/",
+            {"data": "2025-09-03", "inicio": "14:00", "fim": "14:30"},
+        )
+        self.assertEqual(resp.json(), [])
+        resp = self.client.get(
+            "/api/salas/disponiveis/",
+            {"data": "2025-09-03", "inicio": "10:00", "fim": "11:00"},
+        )
+        self.assertEqual(
+            resp.json()[0]["livres"],
+            [
+                {"inicio": "08:00:00", "fim": "14:00:00"},
+                {"inicio": "15:00:00", "fim": "18:00:00"},
+            ],
+        )
+
+        resp = self.client.get(
+            "/api/recorrencias/ocorrencias/",
+            {"data_inicio": "2025-09-01", "data_fim": "2025-09-07"},
+        )
+        self.assertEqual([o["data"] for o in resp.json()], ["2025-09-01", "2025-09-03"])
+
+    def test_lote_considera_ocorrencias(self):
+        self.criar_serie()
+        resp = self.client.post(
+            "/api/reservas/lote/",
+            {
+                "reservas": [
+                    {
+                        "sala_id": self.sala.id,
+                        "usuario_id": self.user.id,
+                        "data": "2025-09-01",
+                        "hora_inicio": "14:00",
+                        "hora_fim": "15:00",
+                    }
+                ]
+            },
+            format="json",
+        )
+        self.assertEqual(resp.status_code, 409)
+
+
+class CacheSalasTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.sala = Sala.objects.create(nome="Sala 1", capacidade=10)
+
+    def test_get_condicional_retorna_304_sem_consultas(self):
+        resp = self.client.get("/api/salas/")
+        etag = resp["ETag"]
+        self.assertEqual(resp.status_code, 200)
+        self.assertTrue(resp.has_header("Last-Modified"))
+
+        with self.assertNumQueries(0):
+            resp = self.client.get("/api/salas/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(resp.status_code, 304)
+
+        with self.assertNumQueries(0):
+            resp = self.client.get("/api/salas/")
+        self.assertEqual(resp.json()[0]["nome"], "Sala 1")
+
+    def test_alteracao_invalida_cache_e_etag(self):
+        etag = self.client.get("/api/salas/")["ETag"]
+        self.sala.nome = "Sala Renomeada"
+        self.sala.save()
+
+        resp = self.client.get("/api/salas/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(resp.status_code, 200)
+        self.assertNotEqual(resp["ETag"], etag)
+        self.assertEqual(resp.json()[0]["nome"], "Sala Renomeada")
+
+        self.sala.delete()
+        self.assertEqual(self.client.get("/api/salas/").json(), [])
+
+    def test_if_modified_since_nao_gera_304_falso(self):
+        modificado = self.client.get("/api/salas/")["Last-Modified"]
+        # troca no mesmo segundo: o Last-Modified não muda
+        self.sala.nome = "Sala Renomeada"
+        self.sala.save()
+        resp = self.client.get("/api/salas/", HTTP_IF_MODIFIED_SINCE=modificado)
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.json()[0]["nome"], "Sala Renomeada")
+
+    @override_settings(CACHE_VERSAO_TTL=30)
+    def test_versao_expira_para_workers_sem_cache_compartilhado(self):
+        etag = self.client.get("/api/salas/")["ETag"]
+        agora = time_module.time()
+        with mock.patch("time.time", return_value=agora + 31):
+            resp = self.client.get("/api/salas/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(resp.status_code, 200)
+        self.assertNotEqual(resp["ETag"], etag)
+
+    def test_detalhe_usa_cache_por_url(self):
+        outra = Sala.objects.create(nome="Sala 2", capacidade=5)
+        resp = self.client.get(f"/api/salas/{self.sala.id}/")
+        self.assertEqual(resp.json()["nome"], "Sala 1")
+        resp = self.client.get(f"/api/salas/{outra.id}/")
+        self.assertEqual(resp.json()["nome"], "Sala 2")
+        self.assertEqual(self.client.get("/api/salas/999/").status_code, 404)
+
+
+class SyncReservaTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(username="ana", password="123")
+        self.client.force_authenticate(self.user)
+        self.sala = Sala.objects.create(nome="Sala 1", capacidade=10)
+        # sem janela de segurança, salvo no teste que a exercita
+        janela = mock.patch("api.sync.JANELA", timedelta(0))
+        janela.start()
+        self.addCleanup(janela.stop)
+
+    def reservar(self, hora):
+        return Reserva.objects.create(
+            sala=self.sala,
+            usuario=self.user,
+            data=date(2025, 9, 21),
+            hora_inicio=time(hora, 0),
+            hora_fim=time(hora + 1, 0),
+        )
+
+    def envelhecer(self, reserva, segundos):
+        atualizada_em = reserva.atualizada_em - timedelta(seconds=segundos)
+        Reserva.todas.filter(pk=reserva.pk).update(atualizada_em=atualizada_em)
+        reserva.atualizada_em = atualizada_em
+
+    def sync(self, token=None, **params):
+        if token:
+            params["since"] = token
+        resp = self.client.get("/api/reservas/sync/", params)
+        self.assertEqual(resp.status_code, 200)
+        return resp.json()
+
+    def test_retorna_apenas_o_que_mudou(self):
+        a, b = self.reservar(9), self.reservar(10)
+        inicial = self.sync()
+        self.assertEqual({r["id"] for r in inicial["alteradas"]}, {a.id, b.id})
+
+        vazio = self.sync(inicial["token"])
+        self.assertEqual((vazio["alteradas"], vazio["removidas"]), ([], []))
+        self.assertEqual(vazio["token"], inicial["token"])
+
+        c = self.reservar(11)
+        self.client.patch(
+            f"/api/reservas/{a.id}/", {"hora_fim": "09:30"}, format="json"
+        )
+        self.client.delete(f"/api/reservas/{b.id}/")
+        delta = self.sync(inicial["token"])
+        self.assertEqual([r["id"] for r in delta["alteradas"]], [c.id, a.id])
+        self.assertEqual(delta["removidas"], [b.id])
+
+    def test_remocao_logica_libera_horario_e_some_da_listagem(self):
+        reserva = self.reservar(9)
+        resp = self.client.delete(f"/api/reservas/{reserva.id}/")
+        self.assertEqual(resp.status_code, 204)
+        self.assertEqual(Reserva.objects.count(), 0)
+        self.assertEqual(Reserva.todas.count(), 1)
+        self.assertEqual(self.client.get("/api/reservas/").json()["results"], [])
+        self.reservar(9)
+
+    def test_paginacao_por_token(self):
+        for hora in range(8, 13):
+            self.reservar(hora)
+        vistos, token, mais = [], None, True
+        while mais:
+            pagina = self.sync(token, limite=2)
+            vistos += [r["id"] for r in pagina["alteradas"]]
+            token, mais = pagina["token"], pagina["mais"]
+        self.assertEqual(len(vistos), 5)
+
+    def test_commit_tardio_nao_e_pulado(self):
+        antiga = self.reservar(8)
+        self.envelhecer(antiga, 3600)
+        recente = self.reservar(10)
+        with mock.patch("api.sync.JANELA", timedelta(seconds=30)):
+            inicial = self.sync()
+            self.assertEqual(
+                [r["id"] for r in inicial["alteradas"]], [antiga.id, recente.id]
+            )
+            # transação lenta: gravada antes de "recente", confirmada depois
+            tardia = self.reservar(12)
+            self.envelhecer(tardia, 10)
+            self.assertLess(antiga.atualizada_em, tardia.atualizada_em)
+            delta = self.sync(inicial["token"])
+        self.assertEqual(
+            [r["id"] for r in delta["alteradas"]], [tardia.id, recente.id]
+        )
+
+    def test_pagina_so_de_recentes_nao_avanca(self):
+        antiga = self.reservar(8)
+        self.envelhecer(antiga, 3600)
+        inicial = self.sync(limite=1)
+        recentes = [self.reservar(9), self.reservar(10)]
+        with mock.patch("api.sync.JANELA", timedelta(seconds=30)):
+            pagina = self.sync(inicial["token"], limite=1)
+        self.assertEqual([r["id"] for r in pagina["alteradas"]], [recentes[0].id])
+        self.assertTrue(pagina["mais"])
+        # o token fica antes das linhas ainda abertas a commits tardios
+        self.assertEqual(pagina["token"], inicial["token"])
+
+    def test_token_invalido(self):
+        resp = self.client.get("/api/reservas/sync/", {"since": "x"})
+        self.assertEqual(resp.status_code, 400)
+
+
+class LeituraRapidaTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(username="ana", nivel_acesso="admin")
+        self.client.force_authenticate(self.user)
+        salas = [Sala.objects.create(nome=f"Sala {i}", capacidade=i) for i in (5, 9)]
+        for i, sala in enumerate(salas * 3):
+            Reserva.objects.create(
+                sala=sala,
+                usuario=self.user,
+                data=date(2025, 9, 21 + i // 2),
+                hora_inicio=time(9, 15, 30),
+                hora_fim=time(10, 0),
+            )
+
+    def test_json_identico_ao_serializer(self):
+        esperado = ReservaSerializer(
+            Reserva.objects.order_by("data", "hora_inicio", "id"), many=True
+        ).data
+        resp = self.client.get("/api/reservas/?lista=1")
+        self.assertEqual(resp.content, JSONRenderer().render(esperado))
+
+        resp = self.client.get("/api/reservas/?page_size=4")
+        self.assertEqual(
+            resp.json()["results"], json.loads(JSONRenderer().render(esperado[:4]))
+        )
+
+    def test_listagem_usa_uma_consulta(self):
+        with self.assertNumQueries(1):
+            self.client.get("/api/reservas/?page_size=4")
+
+    def test_benchmark_confere_saida(self):
+        self.assertTrue(comparar(total=50, repeticoes=1)["identico"])
+
+
+class BenchTests(TestCase):
+    def test_executa_casos_e_agrega_metricas(self):
+        massa = popular(reservas=40, salas=2)
+        resultado = executar(massa, ["listar_reservas", "conflito"], 5, 1)
+        self.assertEqual(resultado["meta"]["reservas"], 40)
+        for nome in ("listar_reservas", "conflito"):
+            metricas = resultado["casos"][nome]
+            self.assertEqual(metricas["erros"], 0)
+            self.assertLessEqual(metricas["p50_ms"], metricas["p99_ms"])
+            self.assertGreater(metricas["consultas_por_req"], 0)
+        json.dumps(resultado)
+
+    def test_percentil(self):
+        valores = list(range(1, 101))
+        self.assertEqual(percentil(valores, 50), 50)
+        self.assertEqual(percentil(valores, 99), 99)
+        self.assertEqual(percentil([7], 95), 7)
+
+
+class BenchHTTPTests(LiveServerTestCase):
+    def test_executa_contra_servidor(self):
+        massa = popular(reservas=20, salas=2)
+        resultado = executar(
+            massa,
+            ["listar_salas", "criar_reserva"],
+            6,
+            0,
+            url=self.live_server_url,
+            concorrencia=[3],
+        )
+        self.assertEqual(resultado["meta"]["servidor"], self.live_server_url)
+        for metricas in resultado["casos"].values():
+            self.assertEqual(metricas["erros"], 0)
+            self.assertIsNone(metricas["consultas_por_req"])
+        self.assertEqual(Reserva.objects.count(), 26)
+
+
+class ViewsAsyncTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username="ana", password="123")
+        token = AccessToken.for_user(self.user)
+        self.auth = {"Authorization": f"Bearer {token}"}
+        self.salas = [
+            Sala.objects.create(nome=f"Sala {i}", capacidade=10 * i)
+            for i in (1, 2, 3)
+        ]
+        for i in range(7):
+            Reserva.objects.create(
+                sala=self.salas[i % 3],
+                usuario=self.user,
+                data=date(2025, 9, 22),
+                hora_inicio=time(8 + i),
+                hora_fim=time(9 + i),
+            )
+
+    async def _comparar(self, caminho):
+        sincrona = await sync_to_async(Client().get)(
+            f"/api/{caminho}", headers=self.auth
+        )
+        assincrona = await AsyncClient().get(f"/api/async/{caminho}", headers=self.auth)
+        self.assertEqual(assincrona.status_code, sincrona.status_code)
+        esperado = sincrona.content.replace(b"/api/", b"/api/async/")
+        self.assertEqual(assincrona.content, esperado)
+
+    async def test_respostas_iguais_as_sincronas(self):
+        reserva = await Reserva.objects.afirst()
+        for caminho in (
+            "salas/",
+            f"salas/{self.salas[0].pk}/",
+            "salas/disponiveis/?data=2025-09-22&inicio=09:00&fim=10:00",
+            "reservas/?page_size=3",
+            "reservas/?lista=1&sala=%d" % self.salas[1].pk,
+            f"reservas/{reserva.pk}/",
+            "salas/999/",
+            "reservas/?data_inicio=x",
+        ):
+            with self.subTest(caminho=caminho):
+                await self._comparar(caminho)
+
+    async def test_cursor_percorre_todas_as_paginas(self):
+        url, ids = "/api/async/reservas/?page_size=3", []
+        while url:
+            dados = (await AsyncClient().get(url, headers=self.auth)).json()
+            ids += [r["id"] for r in dados["results"]]
+            url = dados["next"]
+        self.assertEqual(len(ids), 7)
+
+    async def test_autenticacao_e_etag(self):
+        resp = await AsyncClient().get("/api/async/reservas/")
+        self.assertEqual(resp.status_code, 401)
+        self.assertIn("Bearer", resp["WWW-Authenticate"])
+
+        resp = await AsyncClient().get("/api/async/salas/")
+        resp = await AsyncClient().get(
+            "/api/async/salas/", headers={"If-None-Match": resp["ETag"]}
+        )
+        self.assertEqual(resp.status_code, 304)
+
+
+class AuthCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username="bia", password="123")
+        token = AccessToken.for_user(self.user)
+        self.auth = {"HTTP_AUTHORIZATION": f"Bearer {token}"}
+        self.client.get("/api/salas/", **self.auth)
+
+    def test_requisicao_autenticada_sem_consultas(self):
+        # salas em cache + usuário em cache: nenhuma consulta
+        with self.assertNumQueries(0):
+            resp = self.client.get("/api/salas/", **self.auth)
+        self.assertEqual(resp.status_code, 200)
+
+    def test_cache_sem_hash_da_senha(self):
+        dados = cache.get(chave_usuario(self.user.pk))
+        self.assertTrue(dados["is_active"])
+        self.assertNotIn(self.user.password, dados.values())
+
+    def test_salvar_usuario_invalida(self):
+        self.user.is_active = False
+        self.user.save()
+        self.assertEqual(self.client.get("/api/salas/", **self.auth).status_code, 401)
+
+    def test_permissoes_atualizadas(self):
+        dados = {"nome": "Nova", "capacidade": 4}
+        resp = self.client.post("/api/salas/", dados, **self.auth)
+        self.assertEqual(resp.status_code, 403)
+        self.user.is_staff = True
+        self.user.save()
+        resp = self.client.post("/api/salas/", dados, **self.auth)
+        self.assertEqual(resp.status_code, 201)
+
+
+class SeedCargaTests(TestCase):
+    def test_gera_reservas_sem_sobreposicao(self):
+        saida = StringIO()
+        call_command(
+            "seed",
+            "--reservas=300",
+            "--salas=5",
+            "--usuarios=10",
+            "--dias=14",
+            "--data-inicial=2025-09-01",
+            "--lote=50",
+            stdout=saida,
+        )
+        self.assertIn("300 reservas", saida.getvalue())
+        self.assertEqual(Reserva.objects.count(), 300)
+        anterior = {}
+        for r in Reserva.objects.order_by("sala_id", "data", "hora_inicio"):
+            chave = (r.sala_id, r.data)
+            self.assertGreaterEqual(r.hora_inicio, anterior.get(chave, time(0)))
+            anterior[chave] = r.hora_fim
+
+    def test_geracao_deterministica(self):
+        def gerar():
+            return [
+                (r.sala_id, r.usuario_id, r.hora_inicio, r.hora_fim)
+                for r in geracao.reservas_do_dia(
+                    7, 3, date(2025, 9, 4), 40, [1, 2, 3], [9]
+                )
+            ]
+
+        self.assertEqual(gerar(), gerar())
+        self.assertLessEqual(len(gerar()), 40)
+
+    def test_cotas_somam_o_total(self):
+        cotas = geracao.cotas_por_dia(1000, date(2025, 9, 1), 30)
+        self.assertEqual(sum(cotas), 1000)
+        self.assertLess(cotas[5], cotas[0])  # sábado x segunda
+
+
+@override_settings(
+    API_METRICS=True,
+    MIDDLEWARE=["api.metrics.MetricsMiddleware", *settings.MIDDLEWARE],
+)
+class MetricasTests(TestCase):
+    def setUp(self):
+        registro.limpar()
+        cache.clear()
+        self.user = User.objects.create_user(username="u", password="123")
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        sala = Sala.objects.create(nome="A", capacidade=5)
+        for hora in range(8, 18):
+            Reserva.objects.create(
+                sala=sala,
+                usuario=self.user,
+                data=date(2025, 9, 22),
+                hora_inicio=time(hora),
+                hora_fim=time(hora, 30),
+            )
+
+    def test_server_timing_e_prometheus(self):
+        resp = self.client.get("/api/reservas/")
+        timing = resp["Server-Timing"]
+        self.assertRegex(timing, r'db;dur=[\d.]+;desc="\d+ consultas"')
+        self.assertIn("ser;dur=", timing)
+        self.assertIn("total;dur=", timing)
+
+        metricas = self.client.get("/api/_metrics").content.decode()
+        self.assertIn(
+            'api_requests_total{view="reserva-list",method="GET",status="200"} 1',
+            metricas,
+        )
+        self.assertIn(
+            'api_request_duration_seconds_count{view="reserva-list"} 1', metricas
+        )
+        self.assertIn('api_db_queries_total{view="reserva-list"}', metricas)
+
+    def test_orcamento_de_consultas(self):
+        # a listagem não pode crescer com o número de reservas (N+1); a de
+        # usuários é restrita a admins
+        self.user.is_staff = True
+        self.user.save()
+        with limite_consultas(2):
+            resp = self.client.get("/api/reservas/")
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(len(resp.json()["results"]), 10)
+        with limite_consultas(2):
+            resp = self.client.get("/api/usuarios/")
+        self.assertEqual(resp.status_code, 200)
+        with self.assertRaisesMessage(AssertionError, "orçamento de 0"):
+            with limite_consultas(0):
+                self.client.get("/api/salas/disponiveis/?data=2025-09-22")
+
+    @override_settings(API_METRICS=False)
+    def test_endpoint_desativado(self):
+        self.assertEqual(self.client.get("/api/_metrics").status_code, 404)
+
+
+class OcupacaoTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.admin = User.objects.create_user(
+            username="admin", password="123", is_staff=True
+        )
+        self.client.force_authenticate(self.admin)
+        self.sala = Sala.objects.create(nome="Sala 1", capacidade=10)
+        self.outra = Sala.objects.create(nome="Sala 2", capacidade=30)
+
+    def reservar(self, sala, data, inicio, fim):
+        return Reserva.objects.create(
+            sala=sala,
+            usuario=self.admin,
+            data=data,
+            hora_inicio=time(*inicio),
+            hora_fim=time(*fim),
+        )
+
+    def linha(self, sala, data):
+        return OcupacaoDiaria.objects.filter(sala=sala, data=data).first()
+
+    def test_signals_mantem_rollup(self):
+        dia = date(2025, 9, 1)
+        reserva = self.reservar(self.sala, dia, (9, 30), (11, 0))
+        linha = self.linha(self.sala, dia)
+        self.assertEqual((linha.reservas, linha.minutos), (1, 90))
+        self.assertEqual(linha.minutos_por_hora[9:11], [30, 60])
+
+        # mover de dia recalcula os dois pares
+        reserva.data = date(2025, 9, 2)
+        reserva.save()
+        self.assertIsNone(self.linha(self.sala, dia))
+        self.assertEqual(self.linha(self.sala, date(2025, 9, 2)).minutos, 90)
+
+        reserva.remover()
+        self.assertFalse(OcupacaoDiaria.objects.exists())
+
+    def test_lote_e_series_atualizam_rollup(self):
+        resp = self.client.post(
+            "/api/reservas/lote/",
+            {
+                "reservas": [
+                    {
+                        "sala_id": self.sala.id,
+                        "usuario_id": self.admin.id,
+                        "data": "2025-09-03",
+                        "hora_inicio": "08:00",
+                        "hora_fim": "09:00",
+                    }
+                ]
+            },
+            format="json",
+        )
+        self.assertEqual(resp.status_code, 201)
+        self.assertEqual(self.linha(self.sala, date(2025, 9, 3)).minutos, 60)
+
+        serie = Recorrencia.objects.create(
+            sala=self.sala,
+            usuario=self.admin,
+            frequencia=Recorrencia.SEMANAL,
+            dias_semana=[2],  # quartas
+            data_inicio=date(2025, 9, 1),
+            data_fim=date(2025, 9, 30),
+            hora_inicio=time(14, 0),
+            hora_fim=time(15, 0),
+        )
+        linha = self.linha(self.sala, date(2025, 9, 3))
+        self.assertEqual((linha.reservas, linha.minutos), (2, 120))
+        self.assertEqual(self.linha(self.sala, date(2025, 9, 24)).minutos, 60)
+
+        serie.excecoes = ["2025-09-24"]
+        serie.save()
+        self.assertIsNone(self.linha(self.sala, date(2025, 9, 24)))
+
+        ids = list(Reserva.objects.values_list("pk", flat=True))
+        resp = self.client.delete("/api/reservas/lote/", {"ids": ids}, format="json")
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(self.linha(self.sala, date(2025, 9, 3)).minutos, 60)
+
+    def test_reconstruir_igual_ao_incremental(self):
+        self.reservar(self.sala, date(2025, 9, 1), (9, 0), (10, 0))
+        self.reservar(self.sala, date(2025, 9, 1), (10, 0), (12, 0))
+        self.reservar(self.outra, date(2025, 9, 8), (8, 0), (9, 0))
+        Recorrencia.objects.create(
+            sala=self.outra,
+            usuario=self.admin,
+            frequencia=Recorrencia.DIARIA,
+            data_inicio=date(2025, 9, 7),
+            data_fim=date(2025, 9, 9),
+            hora_inicio=time(8, 30),
+            hora_fim=time(9, 30),
+        )
+        campos = ("sala_id", "data", "reservas", "minutos", "minutos_por_hora")
+        incremental = list(
+            OcupacaoDiaria.objects.order_by("sala", "data").values_list(*campos)
+        )
+        self.assertEqual(ocupacao.reconstruir(lote=2), len(incremental))
+        reconstruido = list(
+            OcupacaoDiaria.objects.order_by("sala", "data").values_list(*campos)
+        )
+        self.assertEqual(reconstruido, incremental)
+        # sobreposição entre série e avulsa não conta duas vezes
+        self.assertEqual(self.linha(self.outra, date(2025, 9, 8)).minutos, 90)
+
+    def test_relatorio_por_semana_e_mes(self):
+        self.reservar(self.sala, date(2025, 9, 1), (8, 0), (14, 0))
+        self.reservar(self.outra, date(2025, 9, 2), (9, 0), (11, 0))
+        self.reservar(self.sala, date(2025, 9, 8), (10, 0), (11, 0))
+        params = {"data_inicio": "2025-09-01", "data_fim": "2025-09-14"}
+
+        with self.assertNumQueries(2):
+            resp = self.client.get(
+                "/api/relatorios/ocupacao/", {**params, "agrupamento": "semana"}
+            )
+        self.assertEqual(resp.status_code, 200)
+        semanas = [r for r in resp.json()["resultados"] if r["sala"] == self.sala.id]
+        self.assertEqual([s["periodo"] for s in semanas], ["2025-09-01", "2025-09-08"])
+        # expediente padrão 08:00-18:00: 7 dias x 10h
+        self.assertEqual(semanas[0]["horas_reservadas"], 6)
+        self.assertEqual(semanas[0]["horas_disponiveis"], 70)
+        self.assertEqual(semanas[0]["utilizacao"], round(6 / 70, 4))
+        self.assertEqual(semanas[0]["horas_pico"], [8, 9, 10])
+
+        resp = self.client.get(
+            "/api/relatorios/ocupacao/", {**params, "agrupamento": "mes"}
+        )
+        (total,) = resp.json()["totais"]
+        self.assertEqual(total["reservas"], 3)
+        self.assertEqual(total["horas_reservadas"], 9)
+        self.assertEqual(
+            total["ocupacao_capacidade"],
+            round((7 * 10 + 2 * 30) / (14 * 10 * (10 + 30)), 4),
+        )
+
+    def test_relatorio_restrito_e_validado(self):
+        self.client.force_authenticate(
+            User.objects.create_user(username="bia", password="123")
+        )
+        params = {"data_inicio": "2025-09-01", "data_fim": "2025-09-30"}
+        self.assertEqual(
+            self.client.get("/api/relatorios/ocupacao/", params).status_code, 403
+        )
+        self.client.force_authenticate(self.admin)
+        params["data_fim"] = "2027-01-01"
+        self.assertEqual(
+            self.client.get("/api/relatorios/ocupacao/", params).status_code, 400
+        )
+
+
+class ArquivoReservaTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            username="ana", password="123", is_staff=True
+        )
+        self.client.force_authenticate(self.user)
+        self.sala = Sala.objects.create(nome="Sala 1", capacidade=10)
+        self.reservas = [
+            Reserva.objects.create(
+                sala=self.sala,
+                usuario=self.user,
+                data=date(2025, 9, dia),
+                hora_inicio=time(9, 0),
+                hora_fim=time(10, 0),
+            )
+            for dia in (1, 2, 3, 20, 21)
+        ]
+        self.reservas[1].remover()
+
+    def arquivar(self, antes="2025-09-10", lote="2"):
+        saida = StringIO()
+        call_command(
+            "arquivar_reservas", f"--antes={antes}", f"--lote={lote}", stdout=saida
+        )
+        return saida.getvalue()
+
+    def ids(self, resp):
+        return [r["id"] for r in resp.json()["results"]]
+
+    def test_colisao_de_id_no_arquivo_falha(self):
+        existente = self.reservas[0]
+        ReservaArquivada.objects.create(
+            id=existente.pk,
+            sala=self.sala,
+            usuario=self.user,
+            data=existente.data,
+            hora_inicio=existente.hora_inicio,
+            hora_fim=existente.hora_fim,
+            atualizada_em=existente.atualizada_em,
+        )
+        with self.assertRaisesMessage(CommandError, "Id já existente no arquivo"):
+            self.arquivar(lote="10")
+        self.assertTrue(Reserva.objects.filter(pk=existente.pk).exists())
+
+    def test_move_em_lotes_e_descarta_tombstones(self):
+        # removida há mais tempo que a retenção do delta-sync
+        Reserva.todas.filter(pk=self.reservas[1].pk).update(
+            removida_em=timezone.now() - timedelta(days=40)
+        )
+        saida = self.arquivar()
+        self.assertIn("2 reservas arquivadas e 1 removidas", saida)
+        self.assertEqual(
+            sorted(ReservaArquivada.objects.values_list("id", flat=True)),
+            [self.reservas[0].pk, self.reservas[2].pk],
+        )
+        self.assertEqual(Reserva.todas.filter(data__lt=date(2025, 9, 10)).count(), 0)
+        # o rollup continua contando as reservas arquivadas
+        self.assertTrue(OcupacaoDiaria.objects.filter(data=date(2025, 9, 1)).exists())
+        self.assertEqual(ocupacao.reconstruir(), 4)
+
+    def test_tombstone_recente_fica_para_o_delta_sync(self):
+        removida = self.reservas[1].pk
+        self.assertIn("2 reservas arquivadas e 0 removidas", self.arquivar())
+        self.assertTrue(Reserva.todas.filter(pk=removida).exists())
+
+        ontem = sync.codificar_token(timezone.now() - timedelta(days=1), 0)
+        resp = self.client.get("/api/reservas/sync/", {"since": ontem})
+        self.assertEqual(resp.json()["removidas"], [removida])
+
+        antigo = sync.codificar_token(timezone.now() - timedelta(days=31), 0)
+        resp = self.client.get("/api/reservas/sync/", {"since": antigo})
+        self.assertEqual(resp.status_code, 400)
+        self.assertIn("since", resp.json())
+
+    def test_leitura_quente_por_padrao(self):
+        self.arquivar()
+        resp = self.client.get("/api/reservas/")
+        self.assertEqual(self.ids(resp), [self.reservas[3].pk, self.reservas[4].pk])
+
+        # período que alcança o arquivo: arquivo e depois quente, paginado
+        params = {"data_inicio": "2025-09-01", "page_size": 2}
+        resp = self.client.get("/api/reservas/", params)
+        self.assertEqual(self.ids(resp), [self.reservas[0].pk, self.reservas[2].pk])
+        resp = self.client.get(resp.json()["next"])
+        self.assertEqual(self.ids(resp), [self.reservas[3].pk, self.reservas[4].pk])
+        self.assertIsNone(resp.json()["next"])
+
+        resp = self.client.get(
+            "/api/reservas/",
+            {"data_inicio": "2025-09-01", "data_fim": "2025-09-05", "lista": 1},
+        )
+        self.assertEqual(
+            [r["id"] for r in resp.json()], [self.reservas[0].pk, self.reservas[2].pk]
+        )
+        resp = self.client.get(
+            "/api/reservas/exportar/", {"data_inicio": "2025-09-01", "formato": "csv"}
+        )
+        self.assertEqual(len(b"".join(resp.streaming_content).splitlines()), 5)
+
+    async def test_leitura_assincrona(self):
+        await sync_to_async(self.arquivar)()
+        token = AccessToken.for_user(self.user)
+        resp = await self.async_client.get(
+            "/api/async/reservas/",
+            {"data_inicio": "2025-09-01", "page_size": 3},
+            headers={"Authorization": f"Bearer {token}"},
+        )
+        self.assertEqual(
+            self.ids(resp),
+            [self.reservas[0].pk, self.reservas[2].pk, self.reservas[3].pk],
+        )
+
+    def test_periodo_arquivado_somente_leitura(self):
+        self.arquivar()
+        dados = {
+            "sala_id": self.sala.id,
+            "usuario_id": self.user.id,
+            "data": "2025-09-01",
+            "hora_inicio": "11:00",
+            "hora_fim": "12:00",
+        }
+        resp = self.client.post("/api/reservas/", dados)
+        self.assertEqual(resp.status_code, 400)
+        self.assertIn("data", resp.json())
+        resp = self.client.post(
+            "/api/reservas/lote/", {"reservas": [dados]}, format="json"
+        )
+        self.assertEqual(resp.status_code, 400)
+        # dias depois do último arquivado continuam abertos
+        dados["data"] = "2025-09-08"
+        self.assertEqual(self.client.post("/api/reservas/", dados).status_code, 201)
+
+    def test_horizonte_desatualizado_nao_libera_escrita(self):
+        self.arquivar()
+        # outro worker com cache local ainda acredita que nada foi arquivado
+        cache.set(arquivo.CHAVE_HORIZONTE, False, arquivo.HORIZONTE_TTL)
+        dados = {
+            "sala_id": self.sala.id,
+            "usuario_id": self.user.id,
+            "data": "2025-09-01",
+            "hora_inicio": "11:00",
+            "hora_fim": "12:00",
+        }
+        resp = self.client.post("/api/reservas/", dados)
+        self.assertEqual(resp.status_code, 400)
+        self.assertIn("data", resp.json())
+        resp = self.client.post(
+            "/api/reservas/lote/", {"reservas": [dados, dados]}, format="json"
+        )
+        self.assertEqual(resp.status_code, 400)
+
+    def test_recusa_data_futura(self):
+        with self.assertRaises(CommandError):
+            self.arquivar(antes="2999-01-01")
+
+
+class CalendarioTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username="ana", password="123")
+        self.sala = Sala.objects.create(nome="Sala 1, térreo", capacidade=10)
+        self.outra = Sala.objects.create(nome="Sala 2", capacidade=10)
+        self.dia = date.today() + timedelta(days=1)
+        self.reserva = self.reservar(self.sala)
+        self.url = self.link(f"/api/salas/{self.sala.pk}/calendario/")
+
+    def reservar(self, sala, hora=9):
+        with self.captureOnCommitCallbacks(execute=True):
+            return Reserva.objects.create(
+                sala=sala,
+                usuario=self.user,
+                data=self.dia,
+                hora_inicio=time(hora, 0),
+                hora_fim=time(hora + 1, 0),
+            )
+
+    def link(self, caminho):
+        token = AccessToken.for_user(self.user)
+        resp = self.client.get(caminho, HTTP_AUTHORIZATION=f"Bearer {token}")
+        self.assertEqual(resp.status_code, 200)
+        return resp.json()["url"]
+
+    def baixar(self, url, **extra):
+        resp = self.client.get(url, **extra)
+        corpo = b"".join(resp.streaming_content) if resp.streaming else resp.content
+        return resp, corpo.decode()
+
+    def test_feed_com_token_e_304_so_com_agregados(self):
+        resp, corpo = self.baixar(self.url)
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp["Content-Type"], "text/calendar; charset=utf-8")
+        self.assertTrue(corpo.startswith("BEGIN:VCALENDAR\r\n"))
+        self.assertIn(f"UID:reserva-{self.reserva.pk}@gestao-reservas", corpo)
+        self.assertIn(f"DTSTART:{self.dia:%Y%m%d}T090000", corpo)
+        self.assertIn("LOCATION:Sala 1\\, térreo", corpo)
+
+        # um agregado de reservas e um de séries por requisição
+        with self.assertNumQueries(4):
+            self.assertEqual(self.baixar(self.url)[1], corpo)
+            resp = self.client.get(self.url, HTTP_IF_NONE_MATCH=resp["ETag"])
+        self.assertEqual(resp.status_code, 304)
+
+    def test_validador_nao_depende_do_cache(self):
+        etag = self.baixar(self.url)[0]["ETag"]
+        # outro worker, ou versões expiradas: o ETag vem dos dados
+        cache.clear()
+        resp = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(resp.status_code, 304)
+
+    def test_invalidado_apenas_pelo_proprio_feed(self):
+        etag = self.baixar(self.url)[0]["ETag"]
+        self.reservar(self.outra)
+        self.assertEqual(self.baixar(self.url)[0]["ETag"], etag)
+
+        nova = self.reservar(self.sala, hora=11)
+        resp, corpo = self.baixar(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(resp.status_code, 200)
+        self.assertIn(f"UID:reserva-{nova.pk}@gestao-reservas", corpo)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            nova.remover()
+        self.assertNotIn(f"reserva-{nova.pk}@", self.baixar(self.url)[1])
+
+    def test_series_como_rrule(self):
+        inicio = self.dia + timedelta(days=(2 - self.dia.weekday()) % 7)  # quarta
+        with self.captureOnCommitCallbacks(execute=True):
+            Recorrencia.objects.create(
+                sala=self.sala,
+                usuario=self.user,
+                frequencia=Recorrencia.SEMANAL,
+                intervalo=2,
+                dias_semana=[0, 2],
+                data_inicio=inicio,
+                data_fim=inicio + timedelta(days=60),
+                hora_inicio=time(14, 0),
+                hora_fim=time(15, 0),
+                excecoes=[(inicio + timedelta(days=14)).isoformat()],
+            )
+        corpo = self.baixar(self.url)[1].replace("\r\n ", "")
+        self.assertIn(f"DTSTART:{inicio:%Y%m%d}T140000", corpo)
+        self.assertIn(
+            "RRULE:FREQ=WEEKLY;INTERVAL=2;BYDAY=MO,WE;WKST=MO;"
+            f"UNTIL={inicio + timedelta(days=60):%Y%m%d}T140000",
+            corpo,
+        )
+        self.assertIn(f"EXDATE:{inicio + timedelta(days=14):%Y%m%d}T140000", corpo)
+
+    def test_token_restrito_ao_feed(self):
+        token = self.url.split("token=")[1]
+        resp = self.client.get(
+            f"/api/salas/{self.outra.pk}/calendario.ics?token={token}"
+        )
+        self.assertEqual(resp.status_code, 403)
+        resp = self.client.get(f"/api/salas/{self.sala.pk}/calendario.ics?token=x")
+        self.assertEqual(resp.status_code, 403)
+
+        self.user.is_active = False
+        self.user.save()
+        self.assertEqual(self.client.get(self.url).status_code, 403)
+
+    def test_feed_do_usuario(self):
+        url = self.link(f"/api/usuarios/{self.user.pk}/calendario/")
+        resp, corpo = self.baixar(url)
+        self.assertIn("X-WR-CALNAME:Reservas de ana", corpo)
+        self.assertIn(f"reserva-{self.reserva.pk}@", corpo)
+
+        outro = User.objects.create_user(username="bia", password="123")
+        token = AccessToken.for_user(outro)
+        resp = self.client.get(
+            f"/api/usuarios/{self.user.pk}/calendario/",
+            HTTP_AUTHORIZATION=f"Bearer {token}",
+        )
+        self.assertEqual(resp.status_code, 403)
+
+
+class BootstrapTests(TestCase):
+    def test_sem_migracoes_pendentes_garante_superuser(self):
+        saida = StringIO()
+        # create_superuser.run informa o resultado com print
+        with redirect_stdout(StringIO()):
+            call_command("bootstrap", stdout=saida)
+            call_command("bootstrap", stdout=saida)
+        self.assertIn("Nenhuma migração pendente", saida.getvalue())
+        self.assertIn("superuser:", saida.getvalue())
+        self.assertEqual(User.objects.filter(is_superuser=True).count(), 1)
+
+    def test_modelos_sem_migracoes_por_gerar(self):
+        # o entrypoint não roda mais makemigrations: tudo precisa estar versionado
+        call_command("makemigrations", "api", "--check", "--dry-run", stdout=StringIO())
+
+
+TAXAS_TESTE = {
+    "login": {"anon": "2/min", "usuario": "2/min", "staff": "2/min", "conta": "3/min"},
+    "leitura": {"anon": "2/min", "usuario": "3/min", "staff": "5/min"},
+    "escrita": {"anon": "2/min", "usuario": "2/min", "staff": "2/min"},
+}
+
+
+@override_settings(API_THROTTLE_TAXAS=TAXAS_TESTE)
+class ThrottleTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username="ana", password="123")
+        self.auth = {
+            "HTTP_AUTHORIZATION": f"Bearer {AccessToken.for_user(self.user)}"
+        }
+
+    def test_login_recusado_sem_banco_nem_hash(self):
+        corpo = {"username": "ana", "password": "errada"}
+        for _ in range(2):
+            resp = self.client.post("/api/auth/token/", corpo)
+            self.assertEqual(resp.status_code, 401)
+        with mock.patch(
+            "django.contrib.auth.backends.ModelBackend.authenticate"
+        ) as autenticar, self.assertNumQueries(0):
+            resp = self.client.post("/api/auth/token/", corpo)
+        self.assertEqual(resp.status_code, 429)
+        # meia ficha por minuto: a próxima chega em até 30s
+        self.assertIn(resp["Retry-After"], {str(n) for n in range(1, 31)})
+        autenticar.assert_not_called()
+
+    def test_x_forwarded_for_do_cliente_nao_troca_o_balde(self):
+        status = [
+            self.client.post(
+                "/api/auth/token/",
+                {"username": f"u{n}", "password": "x"},
+                HTTP_X_FORWARDED_FOR=f"10.0.0.{n}",
+            ).status_code
+            for n in range(3)
+        ]
+        self.assertEqual(status, [401, 401, 429])
+
+    def test_login_limitado_por_username_entre_ips(self):
+        corpo = {"username": "ana", "password": "errada"}
+        status = [
+            self.client.post(
+                "/api/auth/token/", corpo, REMOTE_ADDR=f"10.0.0.{n}"
+            ).status_code
+            for n in range(4)
+        ]
+        self.assertEqual(status, [401, 401, 401, 429])
+
+    def test_so_senha_errada_gasta_o_balde_da_conta(self):
+        def entrar(senha, n):
+            return self.client.post(
+                "/api/auth/token/",
+                {"username": "ana", "password": senha},
+                REMOTE_ADDR=f"10.0.0.{n}",
+            ).status_code
+
+        self.assertEqual([entrar("123", n) for n in range(5)], [200] * 5)
+        # erros esvaziam o balde, e aí nem a senha certa passa
+        self.assertEqual([entrar("errada", n) for n in range(5, 8)], [401] * 3)
+        self.assertEqual(entrar("123", 8), 429)
+
+    def test_orcamentos_por_perfil_e_categoria(self):
+        for _ in range(3):
+            self.assertEqual(self.client.get("/api/salas/", **self.auth).status_code, 200)
+        self.assertEqual(self.client.get("/api/salas/", **self.auth).status_code, 429)
+        # escrita e anônimos têm baldes próprios
+        resp = self.client.post("/api/reservas/", {}, **self.auth)
+        self.assertEqual(resp.status_code, 400)
+        self.assertEqual(self.client.get("/api/salas/").status_code, 200)
+
+        self.user.is_staff = True
+        self.user.save()
+        for _ in range(5):
+            self.assertEqual(self.client.get("/api/salas/", **self.auth).status_code, 200)
+        self.assertEqual(self.client.get("/api/salas/", **self.auth).status_code, 429)
+
+    def test_recusa_sem_consultas(self):
+        for _ in range(3):
+            self.client.get("/api/reservas/", **self.auth)
+        with self.assertNumQueries(0):
+            resp = self.client.get("/api/reservas/", **self.auth)
+        self.assertEqual(resp.status_code, 429)
+
+    def test_balde_se_recompoe(self):
+        with mock.patch("api.throttling.time.time", return_value=1000.0):
+            self.assertEqual(throttling.consumir("teste", 2, 60), 0)
+            self.assertEqual(throttling.consumir("teste", 2, 60), 0)
+            self.assertEqual(throttling.consumir("teste", 2, 60), 30)
+        with mock.patch("api.throttling.time.time", return_value=1030.0):
+            self.assertEqual(throttling.consumir("teste", 2, 60), 0)
+            self.assertGreater(throttling.consumir("teste", 2, 60), 0)
+
+    async def test_views_async_usam_o_balde_de_leitura(self):
+        client = AsyncClient()
+        for _ in range(2):
+            resp = await client.get("/api/async/salas/")
+            self.assertEqual(resp.status_code, 200)
+        resp = await client.get("/api/async/salas/")
+        self.assertEqual(resp.status_code, 429)
+        self.assertEqual(resp["Retry-After"], "30")
+
+    @override_settings(API_THROTTLE=False)
+    def test_desligado(self):
+        for _ in range(5):
+            self.assertEqual(self.client.get("/api/salas/").status_code, 200)
@@ -0,0 +1,161 @@
+"""Rate limiting por token bucket guardado no cache compartilhado.
+
+Cada (categoria, perfil, cliente) tem um balde de ``N`` fichas que se
+recompõe continuamente à taxa ``N/período``; cada requisição consome uma
+ficha e o balde vazio responde 429 com ``Retry-After``. Categorias:
+``login``, ``leitura`` e ``escrita``; perfis: ``anon`` (por IP), ``usuario``
+e ``staff`` (por id). As taxas ficam em ``API_THROTTLE_TAXAS``; o IP vem de
+``REMOTE_ADDR``, ou do ``X-Forwarded-For`` somente atrás de ``NUM_PROXIES``
+proxies confiáveis.
+
+O login tem ainda um balde por username (``conta``), contra tentativas
+distribuídas entre IPs. Só senhas erradas o gastam (signal
+``user_login_failed``), então logins bem-sucedidos não bloqueiam ninguém.
+Quem erra a senha de um username de propósito ainda esvazia esse balde e
+bloqueia o dono até ele se recompor; chavear por (username, IP) evitaria
+isso, mas liberaria de novo as tentativas distribuídas.
+
+A checagem roda nos hooks de throttle do DRF, antes da view (o login só lê o
+username do corpo): uma recusa não consulta o banco nem calcula hash de
+senha. Com Redis o balde é atualizado num script Lua (atômico entre
+processos). No cache local o lock é do processo e cada worker tem os seus
+baldes, então o orçamento efetivo é multiplicado pelo número de workers.
+"""
+
+import hashlib
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.cache.backends.redis import RedisCache
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.throttling import BaseThrottle
+
+LOGIN = "login"
+LEITURA = "leitura"
+ESCRITA = "escrita"
+PERIODOS = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+
+_lock = threading.Lock()
+
+_LUA = """
+local estado = redis.call('HMGET', KEYS[1], 'fichas', 't')
+local capacidade = tonumber(ARGV[1])
+local taxa = tonumber(ARGV[2])
+local agora = tonumber(ARGV[3])
+local fichas = tonumber(estado[1]) or capacidade
+local t = tonumber(estado[2]) or agora
+fichas = math.min(capacidade, fichas + math.max(0, agora - t) * taxa)
+local espera = 0
+if fichas < 1 then
+    espera = (1 - fichas) / taxa
+elseif ARGV[4] == '1' then
+    fichas = fichas - 1
+end
+if ARGV[4] == '1' then
+    redis.call('HSET', KEYS[1], 'fichas', fichas, 't', agora)
+    redis.call('EXPIRE', KEYS[1], math.ceil(capacidade / taxa) + 1)
+end
+return tostring(espera)
+"""
+
+
+def taxa(texto):
+    """``"120/min"`` -> (capacidade, segundos para encher o balde)."""
+    quantidade, periodo = texto.split("/")
+    return int(quantidade), PERIODOS[periodo[0]]
+
+
+def _recompor(estado, capacidade, por_segundo, agora, gastar):
+    fichas, t = estado or (capacidade, agora)
+    fichas = min(capacidade, fichas + max(0.0, agora - t) * por_segundo)
+    if fichas < 1:
+        return (fichas, agora), (1 - fichas) / por_segundo
+    return (fichas - 1 if gastar else fichas, agora), 0.0
+
+
+def consumir(chave, capacidade, periodo, gastar=True):
+    """Tira uma ficha do balde; segundos até a próxima ficha (0 = liberado).
+
+    Com ``gastar=False`` só consulta o balde, sem tirar a ficha.
+    """
+    por_segundo = capacidade / periodo
+    agora = time.time()
+    if isinstance(cache, RedisCache):
+        cliente = cache._cache.get_client(chave, write=True)
+        script = cliente.register_script(_LUA)
+        espera = script(
+            keys=[cache.make_key(chave)],
+            args=[capacidade, por_segundo, agora, int(gastar)],
+        )
+        return float(espera)
+    # locmem é por processo: o lock basta para a leitura-e-escrita ser atômica
+    with _lock:
+        estado, espera = _recompor(
+            cache.get(chave), capacidade, por_segundo, agora, gastar
+        )
+        if gastar:
+            cache.set(chave, estado, int(periodo) + 1)
+    return espera
+
+
+def limitar(categoria, usuario, ident):
+    """Consome do balde de ``categoria`` do cliente; segundos de espera."""
+    if not settings.API_THROTTLE:
+        return 0.0
+    if usuario is not None and usuario.is_authenticated:
+        perfil = "staff" if usuario.is_staff else "usuario"
+        cliente = usuario.pk
+    else:
+        perfil, cliente = "anon", ident
+    capacidade, periodo = taxa(settings.API_THROTTLE_TAXAS[categoria][perfil])
+    return consumir(f"throttle:{categoria}:{perfil}:{cliente}", capacidade, periodo)
+
+
+def _conta(username, gastar):
+    capacidade, periodo = taxa(settings.API_THROTTLE_TAXAS[LOGIN]["conta"])
+    conta = hashlib.sha256(username.encode()).hexdigest()
+    return consumir(f"throttle:{LOGIN}:conta:{conta}", capacidade, periodo, gastar)
+
+
+def login_falhou(username):
+    """Gasta uma ficha do balde ``conta`` do username (senha errada)."""
+    if settings.API_THROTTLE and isinstance(username, str) and username:
+        _conta(username, gastar=True)
+
+
+class TokenBucketThrottle(BaseThrottle):
+    """Throttle padrão: leitura para métodos seguros, escrita para os demais."""
+
+    categoria = None
+
+    def allow_request(self, request, view):
+        categoria = self.categoria or (
+            LEITURA if request.method in SAFE_METHODS else ESCRITA
+        )
+        # request.user já vem da autenticação (cache do JWT, sem SELECT)
+        self.espera = limitar(categoria, request.user, self.get_ident(request))
+        return not self.espera
+
+    def wait(self):
+        return self.espera
+
+
+class LoginThrottle(TokenBucketThrottle):
+    """Emissão de token: orçamento próprio por IP e por username.
+
+    O balde do username só é consultado aqui; quem o gasta é ``login_falhou``.
+    """
+
+    categoria = LOGIN
+
+    def allow_request(self, request, view):
+        if not super().allow_request(request, view):
+            return False
+        dados = request.data if settings.API_THROTTLE else None
+        username = dados.get("username") if isinstance(dados, dict) else None
+        if not isinstance(username, str) or not username:
+            return True
+        self.espera = _conta(username, gastar=False)
+        return not self.espera
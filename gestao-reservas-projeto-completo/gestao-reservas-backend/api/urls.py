@@ -1,12 +1,44 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import SalaViewSet, ReservaViewSet, UserViewSet
+from . import views, views_async
+from .metrics import metrics_view
+from .views import (
+    SalaViewSet,
+    ReservaViewSet,
+    RecorrenciaViewSet,
+    UserViewSet,
+    RelatorioViewSet,
+)
 
 router = DefaultRouter()
 router.register("salas", SalaViewSet)
 router.register("reservas", ReservaViewSet)
+router.register("recorrencias", RecorrenciaViewSet)
 router.register("usuarios", UserViewSet)
+router.register("relatorios", RelatorioViewSet, basename="relatorio")
 
 urlpatterns = [
+    path("_metrics", metrics_view, name="metrics"),
+    # leituras assíncronas (ASGI) com as mesmas respostas das rotas síncronas
+    path("async/salas/", views_async.salas, name="async-sala-list"),
+    path(
+        "async/salas/disponiveis/",
+        views_async.salas_disponiveis,
+        name="async-sala-disponiveis",
+    ),
+    path("async/salas/<int:pk>/", views_async.sala, name="async-sala-detail"),
+    path("async/reservas/", views_async.reservas, name="async-reserva-list"),
+    path("async/reservas/<int:pk>/", views_async.reserva, name="async-reserva-detail"),
+    # feeds .ics para aplicativos de calendário (link com ?token= assinado)
+    path(
+        "salas/<int:pk>/calendario.ics",
+        views.calendario_sala,
+        name="calendario-sala",
+    ),
+    path(
+        "usuarios/<int:pk>/calendario.ics",
+        views.calendario_usuario,
+        name="calendario-usuario",
+    ),
     path("", include(router.urls)),
 ]
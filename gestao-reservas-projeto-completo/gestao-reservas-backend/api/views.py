@@ -1,24 +1,361 @@
+import copy
+
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.http import HttpResponse, HttpResponseNotModified, StreamingHttpResponse
+from django.shortcuts import get_object_or_404
+from django.urls import reverse
 from rest_framework import viewsets, permissions
-from .models import Sala, Reserva
-from .serializers import SalaSerializer, ReservaSerializer, UserSerializer
-from .permissions import IsAdminOrReadOnly
+from rest_framework.decorators import (
+    action,
+    api_view,
+    authentication_classes,
+    permission_classes,
+)
+from rest_framework.exceptions import PermissionDenied, ValidationError
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from . import calendario, lote, ocupacao, sync
+from .authentication import CalendarioTokenAuthentication
+from .agenda import (
+    agenda_do_dia,
+    disponibilidade,
+    expandir,
+    expediente,
+    recorrencia_em_conflito,
+    sala_ocupada,
+    salas_livres,
+)
+from .cache import VersionedCacheMixin, aplicar_validadores, nao_modificado
+from .exceptions import ConflitoReserva
+from .exportacao import FORMATOS, gerar
+from .filters import filtrar_com_arquivo, filtrar_reservas
+from .metrics import serializacao
+from .leitura import linhas_reserva, plano_reserva, serializar_reservas
+from .models import Sala, Reserva, Recorrencia
+from .pagination import ReservaCursorPagination
+from .serializers import (
+    SalaSerializer,
+    ReservaSerializer,
+    UserSerializer,
+    DisponibilidadeQuerySerializer,
+    ReservaLoteSerializer,
+    RecorrenciaSerializer,
+    OcorrenciaQuerySerializer,
+    SyncQuerySerializer,
+    RelatorioOcupacaoQuerySerializer,
+)
+from .permissions import IsAdminOrReadOnly, IsSelfOrAdmin
 from django.contrib.auth import get_user_model
 
 User = get_user_model()
 
-class SalaViewSet(viewsets.ModelViewSet):
+
+class SalaViewSet(VersionedCacheMixin, viewsets.ModelViewSet):
     queryset = Sala.objects.all()
     serializer_class = SalaSerializer
     permission_classes = [IsAdminOrReadOnly]
+    cache_namespace = "salas"
+
+    @action(detail=False, methods=["get"])
+    def disponiveis(self, request):
+        """Salas livres em ``data`` entre ``inicio`` e ``fim`` e suas lacunas no dia."""
+        params = DisponibilidadeQuerySerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        data = params.validated_data["data"]
+        abertura, fechamento = expediente()
+        inicio = params.validated_data.get("inicio", abertura)
+        fim = params.validated_data.get("fim", fechamento)
+
+        # anti-join: uma única consulta resolve as salas sem reserva na janela
+        salas = list(
+            salas_livres(data, inicio, fim, params.validated_data.get("capacidade_min"))
+        )
+        reservas, series = agenda_do_dia([sala.id for sala in salas], data)
+        resultado = [
+            {**SalaSerializer(sala).data, "livres": livres}
+            for sala, livres in disponibilidade(
+                salas, reservas, series, data, inicio, fim
+            )
+        ]
+        return Response(resultado)
+
+    @action(
+        detail=True, methods=["get"], permission_classes=[permissions.IsAuthenticated]
+    )
+    def calendario(self, request, pk=None):
+        """Link de assinatura do feed .ics da sala (com token assinado)."""
+        return Response(_link_calendario(request, "sala", self.get_object().pk))
 
 
 class ReservaViewSet(viewsets.ModelViewSet):
     queryset = Reserva.objects.select_related("sala", "usuario").all()
     serializer_class = ReservaSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = ReservaCursorPagination
+
+    def filter_queryset(self, queryset):
+        return filtrar_reservas(
+            queryset, self.request.query_params, self.request.user
+        ).order_by(*ReservaCursorPagination.ordering)
+
+    def list(self, request, *args, **kwargs):
+        # caminho rápido: tuplas de values_list renderizadas pelo plano
+        # pré-computado, com o mesmo JSON do ReservaSerializer
+        plano = plano_reserva()
+        consultas = [
+            linhas_reserva(consulta.order_by(*ReservaCursorPagination.ordering))
+            for consulta in filtrar_com_arquivo(
+                self.get_queryset(), request.query_params, request.user
+            )
+        ]
+        self.paginator.posicao = plano.posicao
+        pagina = self.paginate_queryset(consultas)
+        paginada = pagina is not None
+        if not paginada:
+            pagina = [linha for consulta in consultas for linha in consulta]
+        with serializacao():
+            dados = serializar_reservas(pagina)
+        if not paginada:
+            return Response(dados)
+        return self.get_paginated_response(dados)
+
+    def paginate_queryset(self, consultas):
+        # compatibilidade: clientes antigos recebem a lista completa com ?lista=1
+        if self.request.query_params.get("lista") in ("1", "true"):
+            return None
+        return self.paginator.paginar_consultas(consultas, self.request)
+
+    @action(detail=False, methods=["post", "patch", "delete"], url_path="lote")
+    def em_lote(self, request):
+        """Cria (POST), atualiza (PATCH) ou remove (DELETE) reservas em lote.
+
+        ``modo=atomico`` grava tudo ou nada; ``modo=parcial`` grava os itens
+        válidos. A resposta traz o status de cada item.
+        """
+        serializer = ReservaLoteSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        modo = serializer.validated_data["modo"]
+        campo = "ids" if request.method == "DELETE" else "reservas"
+        if campo not in serializer.validated_data:
+            raise ValidationError({campo: "Este campo é obrigatório."})
+        itens = serializer.validated_data[campo]
+
+        operacoes = {
+            "POST": lote.criar,
+            "PATCH": lote.atualizar,
+            "DELETE": lote.remover,
+        }
+        resultados, status = operacoes[request.method](itens, modo)
+        return Response({"modo": modo, "resultados": resultados}, status=status)
+
+    @action(detail=False, methods=["get"], permission_classes=[permissions.IsAdminUser])
+    def exportar(self, request):
+        """Exporta reservas filtradas em ``?formato=ndjson|csv`` via streaming."""
+        formato = request.query_params.get("formato", "ndjson")
+        if formato not in FORMATOS:
+            raise ValidationError({"formato": f"Use um de: {', '.join(FORMATOS)}."})
+        consultas = filtrar_com_arquivo(Reserva.objects.all(), request.query_params)
+        resposta = StreamingHttpResponse(
+            gerar(formato, consultas), content_type=FORMATOS[formato]
+        )
+        resposta["Content-Disposition"] = f'attachment; filename="reservas.{formato}"'
+        return resposta
+
+    @action(detail=False, methods=["get"])
+    def sync(self, request):
+        """Reservas criadas/alteradas/removidas desde o token ``since``.
+
+        O cliente guarda o ``token`` devolvido e repete enquanto ``mais`` for
+        verdadeiro; se o token não mudou, espera alguns segundos antes.
+        """
+        params = SyncQuerySerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        alteradas, removidas, token, mais = sync.alteracoes_desde(
+            params.validated_data.get("since"),
+            params.validated_data.get("limite", sync.LIMITE_PADRAO),
+        )
+        return Response(
+            {
+                "alteradas": ReservaSerializer(alteradas, many=True).data,
+                "removidas": removidas,
+                "token": token,
+                "mais": mais,
+            }
+        )
+
+    def perform_create(self, serializer):
+        self._salvar_sem_conflito(serializer)
+
+    def perform_update(self, serializer):
+        self._salvar_sem_conflito(serializer)
+
+    def perform_destroy(self, instance):
+        instance.remover()
+
+    def _salvar_sem_conflito(self, serializer):
+        instance = serializer.instance
+        dados = serializer.validated_data
+        sala = dados.get("sala", getattr(instance, "sala", None))
+        data = dados.get("data", getattr(instance, "data", None))
+        inicio = dados.get("hora_inicio", getattr(instance, "hora_inicio", None))
+        fim = dados.get("hora_fim", getattr(instance, "hora_fim", None))
+        try:
+            with transaction.atomic():
+                # trava a sala (Postgres) para serializar reservas concorrentes;
+                # no SQLite a transação IMMEDIATE já garante a exclusividade
+                Sala.objects.select_for_update().filter(pk=sala.pk).first()
+                excluir = getattr(instance, "pk", None)
+                if sala_ocupada(sala, data, inicio, fim, excluir_reserva=excluir):
+                    raise ConflitoReserva()
+                serializer.save()
+        except IntegrityError:
+            # violação da constraint de exclusão no Postgres
+            raise ConflitoReserva()
+
+
+class RecorrenciaViewSet(viewsets.ModelViewSet):
+    queryset = Recorrencia.objects.select_related("sala", "usuario").all()
+    serializer_class = RecorrenciaSerializer
+    permission_classes = [permissions.IsAuthenticated]
+
+    @action(detail=False, methods=["get"])
+    def ocorrencias(self, request):
+        """Ocorrências expandidas apenas para a janela pedida."""
+        params = OcorrenciaQuerySerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        filtros = params.validated_data
+        inicio, fim = filtros["data_inicio"], filtros["data_fim"]
+
+        series = Recorrencia.objects.filter(data_inicio__lte=fim, data_fim__gte=inicio)
+        if "sala" in filtros:
+            series = series.filter(sala_id=filtros["sala"])
+        if "usuario" in filtros:
+            series = series.filter(usuario_id=filtros["usuario"])
+        return Response(
+            [
+                {
+                    "recorrencia_id": o.recorrencia_id,
+                    "sala_id": o.sala_id,
+                    "usuario_id": o.usuario_id,
+                    "data": o.data.isoformat(),
+                    "hora_inicio": o.hora_inicio.isoformat(),
+                    "hora_fim": o.hora_fim.isoformat(),
+                }
+                for o in expandir(series, inicio, fim)
+            ]
+        )
 
+    def perform_create(self, serializer):
+        self._salvar_sem_conflito(serializer)
 
-class UserViewSet(viewsets.ReadOnlyModelViewSet):
+    def perform_update(self, serializer):
+        self._salvar_sem_conflito(serializer)
+
+    def _salvar_sem_conflito(self, serializer):
+        # monta a série sem gravar para verificar conflitos antes do INSERT
+        candidata = copy.copy(serializer.instance) or Recorrencia()
+        for campo, valor in serializer.validated_data.items():
+            setattr(candidata, campo, valor)
+        with transaction.atomic():
+            Sala.objects.select_for_update().filter(pk=candidata.sala_id).first()
+            if recorrencia_em_conflito(candidata):
+                raise ConflitoReserva()
+            serializer.save()
+
+
+class UserViewSet(VersionedCacheMixin, viewsets.ReadOnlyModelViewSet):
     queryset = User.objects.all()
     serializer_class = UserSerializer
     permission_classes = [permissions.IsAdminUser]
+    cache_namespace = "usuarios"
+
+    @action(detail=True, methods=["get"], permission_classes=[IsSelfOrAdmin])
+    def calendario(self, request, pk=None):
+        """Link de assinatura do feed .ics do usuário (com token assinado)."""
+        return Response(_link_calendario(request, "usuario", self.get_object().pk))
+
+
+class RelatorioViewSet(viewsets.ViewSet):
+    permission_classes = [permissions.IsAdminUser]
+
+    @action(detail=False, methods=["get"])
+    def ocupacao(self, request):
+        """Utilização das salas por ``?agrupamento=dia|semana|mes``.
+
+        Lê apenas o rollup ``OcupacaoDiaria``, nunca a tabela de reservas.
+        """
+        params = RelatorioOcupacaoQuerySerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        sala = params.validated_data.get("sala")
+        return Response(
+            ocupacao.relatorio(
+                params.validated_data["data_inicio"],
+                params.validated_data["data_fim"],
+                params.validated_data["agrupamento"],
+                [sala] if sala else None,
+            )
+        )
+
+
+def _link_calendario(request, tipo, pk):
+    url = reverse(f"calendario-{tipo}", kwargs={"pk": pk})
+    token = calendario.assinar(request.user.pk, calendario.recurso(tipo, pk))
+    return {"url": request.build_absolute_uri(f"{url}?token={token}")}
+
+
+def _feed(request, recurso, carregar):
+    """Feed .ics com validador dos dados: 304 e cache custam dois agregados.
+
+    ``carregar`` devolve (nome, reservas, series) e só roda na geração.
+    """
+    liberado = request.auth.get("recurso") if isinstance(request.auth, dict) else None
+    if liberado not in (None, recurso):
+        raise PermissionDenied("Token de outro calendário.")
+    etag, modificado_em, chave = calendario.validadores(recurso)
+    if nao_modificado(request, etag):
+        resposta = HttpResponseNotModified()
+    else:
+        texto = cache.get(chave)
+        if texto is not None:
+            resposta = HttpResponse(texto, content_type=calendario.CONTENT_TYPE)
+        else:
+            trechos = calendario.gerar(*carregar())
+            resposta = StreamingHttpResponse(
+                calendario.em_cache(chave, trechos),
+                content_type=calendario.CONTENT_TYPE,
+            )
+    return aplicar_validadores(resposta, etag, modificado_em)
+
+
+_autenticacao_feed = authentication_classes(
+    [CalendarioTokenAuthentication, *api_settings.DEFAULT_AUTHENTICATION_CLASSES]
+)
+
+
+@api_view(["GET"])
+@_autenticacao_feed
+@permission_classes([permissions.IsAuthenticated])
+def calendario_sala(request, pk):
+    def carregar():
+        sala = get_object_or_404(Sala, pk=pk)
+        return (sala.nome, *calendario.consultas(sala_id=sala.pk))
+
+    return _feed(request, calendario.recurso("sala", pk), carregar)
+
+
+@api_view(["GET"])
+@_autenticacao_feed
+@permission_classes([permissions.IsAuthenticated])
+def calendario_usuario(request, pk):
+    if not (request.user.is_staff or request.user.pk == pk):
+        raise PermissionDenied()
+
+    def carregar():
+        usuario = get_object_or_404(User, pk=pk)
+        return (
+            f"Reservas de {usuario.username}",
+            *calendario.consultas(usuario_id=usuario.pk),
+        )
+
+    return _feed(request, calendario.recurso("usuario", pk), carregar)
@@ -0,0 +1,195 @@
+"""Variantes assíncronas (ASGI) das leituras de salas e reservas.
+
+Mesmas respostas das views do DRF, mas escritas com o ORM assíncrono
+(``aget``/``aiterator``): esperando o banco, a requisição não prende uma
+thread do worker. Servidas em ``/api/async/...``; a autenticação usa as
+mesmas classes configuradas no DRF, e o rate limiting os mesmos baldes de
+leitura.
+"""
+
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.core.cache import cache
+from django.http import Http404, HttpResponse, HttpResponseNotModified
+from django.shortcuts import aget_object_or_404
+from django.views.decorators.http import require_safe
+from rest_framework import exceptions
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+from rest_framework.throttling import BaseThrottle
+
+from .agenda import agenda_do_dia, disponibilidade, expediente, salas_livres
+from .cache import TIMEOUT, aplicar_validadores, aversao, nao_modificado, validadores
+from .filters import filtrar_com_arquivo
+from .leitura import linhas_reserva, plano_reserva, serializar_reservas
+from .metrics import serializacao
+from .models import Reserva, Sala
+from .pagination import ReservaCursorPagination
+from .serializers import (
+    DisponibilidadeQuerySerializer,
+    ReservaSerializer,
+    SalaSerializer,
+)
+from .throttling import LEITURA, limitar
+
+
+def _json(dados, status=200):
+    with serializacao():
+        conteudo = JSONRenderer().render(dados)
+    return HttpResponse(conteudo, status=status, content_type="application/json")
+
+
+def _autenticadores():
+    return [classe() for classe in api_settings.DEFAULT_AUTHENTICATION_CLASSES]
+
+
+async def _autenticar(request, obrigatorio):
+    """Usuário autenticado (ou None), como o DRF faria na view síncrona."""
+    for autenticador in _autenticadores():
+        # as classes do DRF são síncronas (consultam o usuário no banco)
+        resultado = await sync_to_async(autenticador.authenticate)(request)
+        if resultado is not None:
+            return resultado[0]
+    if obrigatorio:
+        raise exceptions.NotAuthenticated()
+    return None
+
+
+def api_async(autenticado):
+    """Trata autenticação e throttle e converte exceções da API em JSON."""
+
+    def decorador(view):
+        @require_safe
+        @wraps(view)
+        async def envoltorio(request, *args, **kwargs):
+            try:
+                usuario = await _autenticar(request, autenticado)
+                # sem sync_to_async: é memória local ou um único comando no Redis
+                espera = limitar(LEITURA, usuario, BaseThrottle().get_ident(request))
+                if espera:
+                    raise exceptions.Throttled(espera)
+                return await view(request, usuario, *args, **kwargs)
+            except exceptions.APIException as exc:
+                detalhe = exc.detail
+                if not isinstance(detalhe, (dict, list)):
+                    detalhe = {"detail": detalhe}
+                resposta = _json(detalhe, status=exc.status_code)
+                if getattr(exc, "wait", None):
+                    resposta["Retry-After"] = str(exc.wait)
+                autenticadores = _autenticadores()
+                if exc.status_code == 401 and autenticadores:
+                    cabecalho = autenticadores[0].authenticate_header(request)
+                    if cabecalho:
+                        resposta["WWW-Authenticate"] = cabecalho
+                return resposta
+            except Http404 as exc:
+                # mesma mensagem que o DRF devolve para get_object_or_404
+                detalhe = (
+                    exc.args[0] if exc.args else exceptions.NotFound.default_detail
+                )
+                return _json({"detail": detalhe}, 404)
+
+        return envoltorio
+
+    return decorador
+
+
+async def _cacheado(request, namespace, gerar):
+    # mesma semântica do VersionedCacheMixin (ETag, 304, invalidação)
+    token = await aversao(namespace)
+    etag, modificado_em = validadores(namespace, token)
+    if nao_modificado(request, etag):
+        resposta = HttpResponseNotModified()
+    else:
+        chave = f"{namespace}:{token}:{request.get_full_path()}"
+        dados = await cache.aget(chave)
+        if dados is None:
+            dados = await gerar()
+            await cache.aset(chave, dados, TIMEOUT)
+        resposta = _json(dados)
+    return aplicar_validadores(resposta, etag, modificado_em)
+
+
+@api_async(autenticado=False)
+async def salas(request, usuario):
+    async def gerar():
+        return [SalaSerializer(s).data async for s in Sala.objects.aiterator()]
+
+    return await _cacheado(request, "salas", gerar)
+
+
+@api_async(autenticado=False)
+async def sala(request, usuario, pk):
+    async def gerar():
+        return SalaSerializer(await aget_object_or_404(Sala, pk=pk)).data
+
+    return await _cacheado(request, "salas", gerar)
+
+
+@api_async(autenticado=False)
+async def salas_disponiveis(request, usuario):
+    params = DisponibilidadeQuerySerializer(data=request.GET)
+    params.is_valid(raise_exception=True)
+    data = params.validated_data["data"]
+    abertura, fechamento = expediente()
+    inicio = params.validated_data.get("inicio", abertura)
+    fim = params.validated_data.get("fim", fechamento)
+
+    livres = salas_livres(
+        data, inicio, fim, params.validated_data.get("capacidade_min")
+    )
+    livres = [s async for s in livres]
+    reservas, series = agenda_do_dia([s.id for s in livres], data)
+    reservas = [r async for r in reservas]
+    series = [r async for r in series]
+    return _json(
+        [
+            {**SalaSerializer(s).data, "livres": lacunas}
+            for s, lacunas in disponibilidade(
+                livres, reservas, series, data, inicio, fim
+            )
+        ]
+    )
+
+
+@api_async(autenticado=True)
+async def reservas(request, usuario):
+    drf_request = Request(request)
+    consultas = [
+        linhas_reserva(consulta.order_by(*ReservaCursorPagination.ordering))
+        for consulta in await sync_to_async(filtrar_com_arquivo)(
+            Reserva.objects.all(), drf_request.query_params, usuario
+        )
+    ]
+    plano = plano_reserva()
+
+    if drf_request.query_params.get("lista") in ("1", "true"):
+        # aiterator() de values_list executa a consulta fora do sync_to_async
+        # no Django 5.x; o __aiter__ do queryset avalia tudo numa thread
+        pagina = [linha for consulta in consultas async for linha in consulta]
+        with serializacao():
+            dados = serializar_reservas(pagina)
+        return _json(dados)
+
+    paginador = ReservaCursorPagination()
+    paginador.posicao = plano.posicao
+    pagina = []
+    for consulta in consultas:
+        pagina += [linha async for linha in paginador.preparar(consulta, drf_request)]
+        if len(pagina) > paginador.page_size:
+            break
+    pagina = paginador.paginar(pagina)
+    with serializacao():
+        dados = serializar_reservas(pagina)
+    return _json({"next": paginador.get_next_link(), "results": dados})
+
+
+@api_async(autenticado=True)
+async def reserva(request, usuario, pk):
+    try:
+        instancia = await Reserva.objects.select_related("sala", "usuario").aget(pk=pk)
+    except Reserva.DoesNotExist:
+        raise Http404
+    return _json(ReservaSerializer(instancia).data)
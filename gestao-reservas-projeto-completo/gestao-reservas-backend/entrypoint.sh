@@ -1,14 +1,18 @@
 #!/bin/sh
+set -e
 
-echo "📌 Aplicando migrações..."
-python manage.py makemigrations api --noinput
-python manage.py migrate --noinput
+# APP_SERVER=runserver mantém o servidor de desenvolvimento (autoreload)
+if [ "$APP_SERVER" = "runserver" ]; then
+  echo "📌 Migrações e superuser..."
+  python manage.py bootstrap
+  echo "🚀 Iniciando servidor de desenvolvimento..."
+  exec python manage.py runserver 0.0.0.0:8000
+fi
 
-echo "📌 Criando superuser (se não existir)..."
-DJANGO_SUPERUSER_USERNAME=admin \
-DJANGO_SUPERUSER_EMAIL=admin@example.com \
-DJANGO_SUPERUSER_PASSWORD=admin123 \
-python manage.py createsuperuser --noinput || true
+# um único processo Django: migrações pendentes (com lock entre réplicas),
+# superuser e estáticos; migrações novas são geradas e revisadas no repositório
+echo "📌 Migrações, superuser e estáticos..."
+python manage.py bootstrap --collectstatic
 
-echo "🚀 Iniciando servidor Django..."
-exec python manage.py runserver 0.0.0.0:8000
+echo "🚀 Iniciando gunicorn..."
+exec gunicorn -c gunicorn.conf.py
@@ -1,11 +1,20 @@
 from pathlib import Path
 import os
 import dj_database_url
+from django.core.exceptions import ImproperlyConfigured
 
 BASE_DIR = Path(__file__).resolve().parent.parent
-SECRET_KEY = "dev-secret-key"
-DEBUG = True
-ALLOWED_HOSTS = []
+# DEBUG guarda todas as consultas SQL em memória: desligado em produção
+DEBUG = os.getenv("DJANGO_DEBUG", "1") == "1"
+# assina os JWT e os links de calendário: sem valor padrão fora do DEBUG
+SECRET_KEY = os.getenv("DJANGO_SECRET_KEY") or ("dev-secret-key" if DEBUG else None)
+if SECRET_KEY is None:
+    raise ImproperlyConfigured("Defina DJANGO_SECRET_KEY quando DJANGO_DEBUG=0.")
+ALLOWED_HOSTS = [
+    host.strip()
+    for host in os.getenv("DJANGO_ALLOWED_HOSTS", "").split(",")
+    if host.strip()
+]
 
 INSTALLED_APPS = [
     "django.contrib.admin",
@@ -23,6 +32,7 @@ INSTALLED_APPS = [
 MIDDLEWARE = [
     "corsheaders.middleware.CorsMiddleware",
     "django.middleware.security.SecurityMiddleware",
+    "api.middleware.WhiteNoiseMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
@@ -31,6 +41,11 @@ MIDDLEWARE = [
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
 ]
 
+# instrumentação por requisição (Server-Timing e /api/_metrics), opcional
+API_METRICS = os.getenv("API_METRICS") == "1"
+if API_METRICS:
+    MIDDLEWARE.insert(0, "api.metrics.MetricsMiddleware")
+
 ROOT_URLCONF = "gestao_reservas_backend.urls"
 
 TEMPLATES = [
@@ -54,10 +69,60 @@ WSGI_APPLICATION = "gestao_reservas_backend.wsgi.application"
 DATABASES = {
     "default": dj_database_url.config(
         default=os.getenv("DATABASE_URL", f"sqlite:///{BASE_DIR / 'db.sqlite3'}"),
-        conn_max_age=600,
+        # sob ASGI cada thread do async_to_sync abre a sua conexão e o Django
+        # não as fecha de forma confiável: sem conexões persistentes
+        conn_max_age=(
+            0 if os.getenv("ASGI") == "1" else int(os.getenv("DB_CONN_MAX_AGE", "600"))
+        ),
+        # conexão persistente é testada antes de ser reutilizada
+        conn_health_checks=True,
     )
 }
 
+# teto, em segundos, de uma transação de escrita: a janela do delta-sync
+# (api.sync.JANELA) depende dele
+DB_TRANSACAO_MAX_S = 20
+
+if DATABASES["default"]["ENGINE"] == "django.db.backends.sqlite3":
+    # BEGIN IMMEDIATE: a verificação de conflito e o INSERT de uma reserva
+    # acontecem com o lock de escrita já obtido, serializando as transações
+    DATABASES["default"].setdefault("OPTIONS", {}).update(
+        {"transaction_mode": "IMMEDIATE", "timeout": DB_TRANSACAO_MAX_S}
+    )
+    # banco de testes em arquivo para que threads concorrentes compartilhem o lock
+    DATABASES["default"]["TEST"] = {"NAME": str(BASE_DIR / "test_db.sqlite3")}
+elif DATABASES["default"]["ENGINE"] == "django.db.backends.postgresql":
+    # no Postgres o teto é imposto pelo servidor: comando lento ou transação
+    # parada são abortados antes de a janela do delta-sync passar por eles
+    limite_ms = DB_TRANSACAO_MAX_S * 1000
+    DATABASES["default"].setdefault("OPTIONS", {})["options"] = (
+        f"-c statement_timeout={limite_ms} "
+        f"-c idle_in_transaction_session_timeout={limite_ms}"
+    )
+
+# cache local por padrão; REDIS_URL aponta para um Redis (ou compatível) local
+if os.getenv("REDIS_URL"):
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": os.getenv("REDIS_URL"),
+        }
+    }
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+            "LOCATION": "gestao-reservas",
+        }
+    }
+
+# TTL (s) das versões do cache (api/cache.py). Sem Redis cada worker tem o seu
+# cache e só enxerga as invalidações feitas nele: o TTL limita a defasagem
+CACHE_VERSAO_TTL = (
+    int(os.getenv("CACHE_VERSAO_TTL", "0" if os.getenv("REDIS_URL") else "30"))
+    or None
+)
+
 AUTH_PASSWORD_VALIDATORS = []
 
 LANGUAGE_CODE = "pt-br"
@@ -66,16 +131,71 @@ USE_I18N = True
 USE_TZ = True
 
 STATIC_URL = "static/"
+STATIC_ROOT = BASE_DIR / "staticfiles"
+# whitenoise serve os estáticos comprimidos e com nome versionado (cache longo)
+STORAGES = {
+    "default": {"BACKEND": "django.core.files.storage.FileSystemStorage"},
+    "staticfiles": {
+        "BACKEND": "whitenoise.storage.CompressedManifestStaticFilesStorage"
+    },
+}
+# sem collectstatic (dev/testes) os arquivos são servidos sem versão
+WHITENOISE_MANIFEST_STRICT = False
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
 AUTH_USER_MODEL = "api.User"
 
+# segundos que o usuário autenticado por JWT fica em cache (sem SELECT). Sem
+# Redis a invalidação não chega aos outros workers: o TTL é o atraso máximo
+# de uma desativação ou perda de permissão, curto como o das versões
+AUTH_USUARIO_CACHE_TTL = int(
+    os.getenv("AUTH_USUARIO_CACHE_TTL", "300" if os.getenv("REDIS_URL") else "30")
+)
+
+# janela usada para disponibilidade quando a consulta não informa horário
+RESERVAS_EXPEDIENTE_INICIO = os.getenv("RESERVAS_EXPEDIENTE_INICIO", "08:00")
+RESERVAS_EXPEDIENTE_FIM = os.getenv("RESERVAS_EXPEDIENTE_FIM", "18:00")
+
+# feeds .ics: reservas a partir de N dias atrás (as futuras entram todas)
+CALENDARIO_DIAS_PASSADOS = int(os.getenv("CALENDARIO_DIAS_PASSADOS", "90"))
+
+# delta-sync: remoções ficam disponíveis por N dias (o arquivamento só descarta
+# tombstones mais antigos); tokens mais velhos exigem sincronizar do zero
+SYNC_RETENCAO_DIAS = int(os.getenv("SYNC_RETENCAO_DIAS", "30"))
+
+# rate limiting (token bucket no cache): "N/período" por categoria e perfil;
+# cada valor pode ser trocado por env, ex.: API_THROTTLE_LEITURA_ANON=60/min.
+# Sem REDIS_URL cada worker tem os seus baldes: os limites valem por worker
+# e o orçamento efetivo é multiplicado pelo número de workers
+API_THROTTLE = os.getenv("API_THROTTLE", "1") == "1"
+API_THROTTLE_TAXAS = {
+    categoria: {
+        perfil: os.getenv(f"API_THROTTLE_{categoria}_{perfil}".upper(), padrao)
+        for perfil, padrao in taxas.items()
+    }
+    for categoria, taxas in {
+        # "conta": senhas erradas por username, de qualquer IP
+        "login": {
+            "anon": "10/min",
+            "usuario": "10/min",
+            "staff": "30/min",
+            "conta": "20/min",
+        },
+        "leitura": {"anon": "120/min", "usuario": "600/min", "staff": "3000/min"},
+        "escrita": {"anon": "30/min", "usuario": "120/min", "staff": "600/min"},
+    }.items()
+}
+
 CORS_ALLOWED_ORIGINS = ["http://localhost:5173","http://127.0.0.1:5173"]
 
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": (
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
+        "api.authentication.CachedJWTAuthentication",
     ),
+    "DEFAULT_THROTTLE_CLASSES": ("api.throttling.TokenBucketThrottle",),
+    # proxies reversos confiáveis à frente do app: 0 identifica o cliente
+    # por REMOTE_ADDR e ignora o X-Forwarded-For enviado por ele
+    "NUM_PROXIES": int(os.getenv("API_NUM_PROXIES", "0")),
     "DEFAULT_SCHEMA_CLASS": "drf_spectacular.openapi.AutoSchema",
 }
 
@@ -0,0 +1,43 @@
+"""Configuração do gunicorn (modo de produção do entrypoint).
+
+Workers e threads saem do número de CPUs e podem ser ajustados por variáveis
+de ambiente (``WEB_CONCURRENCY``, ``GUNICORN_THREADS``).
+"""
+
+import multiprocessing
+import os
+
+bind = os.getenv("GUNICORN_BIND", "0.0.0.0:8000")
+wsgi_app = "gestao_reservas_backend.wsgi:application"
+
+# 2 × CPUs + 1 processos; as threads cobrem a espera por banco/rede
+workers = int(os.getenv("WEB_CONCURRENCY", multiprocessing.cpu_count() * 2 + 1))
+threads = int(os.getenv("GUNICORN_THREADS", "4"))
+worker_class = "gthread"
+
+# ASGI=1: workers uvicorn, para as views assíncronas de /api/async/ (cada
+# conexão esperando o banco não ocupa uma thread). As conexões ao banco deixam
+# de ser persistentes (CONN_MAX_AGE=0, ver settings)
+if os.getenv("ASGI") == "1":
+    wsgi_app = "gestao_reservas_backend.asgi:application"
+    worker_class = "uvicorn_worker.UvicornWorker"
+
+# carrega o Django uma vez no master; os workers nascem por fork já prontos
+preload_app = True
+
+# recicla workers periodicamente (vazamentos), com jitter para não reiniciar
+# todos ao mesmo tempo
+max_requests = int(os.getenv("GUNICORN_MAX_REQUESTS", "2000"))
+max_requests_jitter = max_requests // 10
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "30"))
+keepalive = 5
+
+accesslog = "-"
+errorlog = "-"
+
+
+def post_fork(server, worker):
+    # conexões abertas no master durante o preload não podem ser compartilhadas
+    from django.db import connections
+
+    connections.close_all()
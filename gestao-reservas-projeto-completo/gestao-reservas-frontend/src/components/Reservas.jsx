@@ -1,15 +1,51 @@
 import { useEffect, useState } from "react";
-import { getReservas } from "../services/api";
+import { getOcorrencias, getReservas, getSalas } from "../services/api";
+
+// janela das ocorrências de séries exibidas junto com as reservas
+const DIAS_SERIES = 30;
+
+function dataIso(data) {
+  const local = new Date(data.getTime() - data.getTimezoneOffset() * 60000);
+  return local.toISOString().slice(0, 10);
+}
 
 export default function Reservas() {
   const [reservas, setReservas] = useState([]);
+  const [proxima, setProxima] = useState(null);
+  const [ocorrencias, setOcorrencias] = useState([]);
+  const [nomesSalas, setNomesSalas] = useState({});
   const [erro, setErro] = useState("");
 
-  useEffect(() => {
-    const token = localStorage.getItem("token");
-    getReservas(token)
-      .then((data) => setReservas(data || []))
+  // a listagem vem paginada por cursor: "next" aponta para a página seguinte
+  const carregar = (cursorUrl) =>
+    getReservas(cursorUrl)
+      .then((data) => {
+        const pagina = data?.results || [];
+        // a primeira página substitui a lista (o efeito pode rodar duas vezes)
+        setReservas((atuais) => (cursorUrl ? [...atuais, ...pagina] : pagina));
+        setProxima(data?.next || null);
+      })
+      .catch((e) => setErro(e.message));
+
+  const carregarSeries = () => {
+    const hoje = new Date();
+    const fim = new Date(hoje);
+    fim.setDate(fim.getDate() + DIAS_SERIES);
+    Promise.all([getOcorrencias(dataIso(hoje), dataIso(fim)), getSalas()])
+      .then(([lista, salas]) => {
+        setOcorrencias(Array.isArray(lista) ? lista : []);
+        const nomes = {};
+        (Array.isArray(salas) ? salas : []).forEach((s) => {
+          nomes[s.id] = s.nome;
+        });
+        setNomesSalas(nomes);
+      })
       .catch((e) => setErro(e.message));
+  };
+
+  useEffect(() => {
+    carregar();
+    carregarSeries();
   }, []);
 
   return (
@@ -23,6 +59,25 @@ export default function Reservas() {
           </li>
         ))}
       </ul>
+      {proxima && (
+        <button
+          type="button"
+          onClick={() => carregar(proxima)}
+          className="bg-blue-600 text-white px-4 py-2 rounded hover:bg-blue-700 mt-2"
+        >
+          Carregar mais
+        </button>
+      )}
+      <h3 className="font-semibold mt-4 mb-2">
+        Séries (próximos {DIAS_SERIES} dias)
+      </h3>
+      <ul className="space-y-1">
+        {ocorrencias.map((o) => (
+          <li key={`${o.recorrencia_id}-${o.data}`}>
+            Sala {nomesSalas[o.sala_id] ?? o.sala_id} - {o.data} {o.hora_inicio} até {o.hora_fim}
+          </li>
+        ))}
+      </ul>
     </div>
   );
 }
@@ -72,8 +72,19 @@ export async function getSalas() {
   return resp.json();
 }
 
-export async function getReservas() {
-  const resp = await apiFetch("/reservas/");
+// a listagem de reservas é paginada por cursor: { next, results }
+export async function getReservas(cursorUrl) {
+  const resp = await apiFetch(cursorUrl || "/reservas/");
+  return resp.json();
+}
+
+// séries não entram em /reservas/: as ocorrências vêm expandidas por janela
+export async function getOcorrencias(dataInicio, dataFim) {
+  const params = new URLSearchParams({
+    data_inicio: dataInicio,
+    data_fim: dataFim,
+  });
+  const resp = await apiFetch(`/recorrencias/ocorrencias/?${params}`);
   return resp.json();
 }
 
@@ -85,3 +96,21 @@ export async function criarReserva(reserva) {
   });
   return resp.json();
 }
+
+export async function getSalasDisponiveis({ data, inicio, fim, capacidadeMin }) {
+  const params = new URLSearchParams({ data });
+  if (inicio && fim) {
+    params.set("inicio", inicio);
+    params.set("fim", fim);
+  }
+  if (capacidadeMin) params.set("capacidade_min", capacidadeMin);
+  const resp = await apiFetch(`/salas/disponiveis/?${params}`);
+  return resp.json();
+}
+
+// delta-sync: passe o último token recebido para baixar só o que mudou
+export async function syncReservas(token) {
+  const params = token ? `?${new URLSearchParams({ since: token })}` : "";
+  const resp = await apiFetch(`/reservas/sync/${params}`);
+  return resp.json();
+}